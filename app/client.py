@@ -1,4 +1,9 @@
+import json
+import uuid
+
+import httpx
 import streamlit as st
+from httpx_sse import connect_sse
 from langserve import RemoteRunnable
 
 # Use Markdown and styling to enhance the title with icon and gradient colors
@@ -9,6 +14,10 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Conversation ID, so follow-up questions reuse the server-side retrieval memory
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = str(uuid.uuid4())
+
 # Input field
 input_text = st.text_input("Please enter your question:", key="2")
 
@@ -17,7 +26,7 @@ if input_text:
         try:
             app = RemoteRunnable("http://localhost:8000/youtube_agent_chat")
             responses = []
-            for output in app.stream({"input": input_text}):
+            for output in app.stream({"input": input_text, "session_id": st.session_state["session_id"]}):
                 responses.append(output)
             if responses:
                 st.subheader('Analysis Results')
@@ -35,3 +44,26 @@ if input_text:
             st.error(f"Error occurred during processing: {str(e)}")
 
 
+# Live monitoring: one pushed stream from the server's shared collectors instead of re-running the agent
+with st.sidebar:
+    st.subheader("Live Monitoring")
+    monitor_keywords = st.text_input("Keywords (comma separated):")
+    monitor_rooms = st.text_input("Bilibili live room IDs (comma separated):")
+    monitor_source = st.selectbox("Source:", ["youtube", "bilibili"])
+    monitoring = st.toggle("Stream updates")
+
+if monitoring and (monitor_keywords or monitor_rooms):
+    st.subheader("Live Updates")
+    feed = st.container()
+    params = {"keywords": monitor_keywords, "rooms": monitor_rooms, "source": monitor_source}
+    try:
+        with httpx.Client(timeout=None) as client:
+            with connect_sse(client, "GET", "http://localhost:8000/subscribe/sse", params=params) as event_source:
+                for sse in event_source.iter_sse():
+                    if sse.event == "ping" or not sse.data:
+                        continue
+                    event = json.loads(sse.data)
+                    with feed.expander(f"{event['type']} — {event['topic']}", expanded=event["type"] != "status"):
+                        st.json(event["data"])
+    except Exception as e:
+        st.error(f"Live update stream closed: {str(e)}")
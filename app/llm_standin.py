@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Local LLM Stand-in Server
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Add project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from bili_server.query_planner import local_keywords
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_]+|[\u4e00-\u9fff]")
+
+
+def parse_distribution(spec: str) -> Tuple[str, List[float]]:
+    """
+    Parses a latency distribution: "constant:0.2", "uniform:0.1,0.5", "normal:0.3,0.1" or "lognormal:-1.2,0.5"
+    (mu and sigma of the underlying normal). Values are seconds.
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value.strip()]
+    expected = {"constant": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+    if expected.get(kind) != len(values):
+        raise ValueError(f"Invalid latency distribution: {spec}")
+    return kind, values
+
+
+class StandInConfig:
+    """
+    Behaviour of the stand-in: latency before the first token, decode speed, answer length, injected errors
+    and embedding size. Every random draw comes from one seeded generator, so a run is reproducible.
+    """
+
+    def __init__(self, latency: str = "lognormal:-1.2,0.5", tokens_per_second: float = 50.0,
+                 completion_tokens: int = 120, error_rate: float = 0.0, error_statuses: Tuple[int, ...] = (429, 500),
+                 embedding_latency: str = "constant:0.02", embedding_dims: int = 1536, seed: int = 0):
+        """
+        Args:
+            latency (str): Time-to-first-token distribution of chat completions, see parse_distribution.
+            tokens_per_second (float): Decode speed of chat completions; 0 returns the whole answer at once.
+            completion_tokens (int): Length of generated answers in tokens (grader verdicts are always short).
+            error_rate (float): Fraction of requests answered with an injected error.
+            error_statuses (Tuple[int, ...]): HTTP statuses injected errors are drawn from.
+            embedding_latency (str): Latency distribution of embedding requests.
+            embedding_dims (int): Size of the embedding vectors.
+            seed (int): Seed of the random generator.
+        """
+        self.latency = parse_distribution(latency)
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.embedding_latency = parse_distribution(embedding_latency)
+        self.embedding_dims = embedding_dims
+        self.random = random.Random(seed)
+
+    def sample(self, distribution: Tuple[str, List[float]]) -> float:
+        kind, values = distribution
+        if kind == "constant":
+            return values[0]
+        if kind == "uniform":
+            return self.random.uniform(*values)
+        if kind == "normal":
+            return max(0.0, self.random.gauss(*values))
+        return self.random.lognormvariate(*values)
+
+    def injected_error(self) -> Optional[int]:
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self.random.choice(self.error_statuses)
+        return None
+
+
+def _tokens(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _between(text: str, start: str, end: str) -> str:
+    _, _, rest = text.partition(start)
+    return rest.partition(end)[0].strip()
+
+
+def respond(prompt: str, completion_tokens: int) -> str:
+    """
+    Deterministic reply to a prompt. The grader, planner and rewriter prompts of bili_server.grader get the
+    JSON or text their parsers expect; anything else is treated as an answer generation.
+    """
+    if "assessing relevance of a retrieved document" in prompt:
+        document = _between(prompt, "Here is the retrieved document:", "Here is the user question:")
+        question = _between(prompt, "Here is the user question:", "<|eot_id|>")
+        relevant = set(_tokens(document)) & set(_tokens(question))
+        return json.dumps({"score": "yes" if relevant else "no"})
+    if "grounded in / supported by a set of facts" in prompt:
+        return json.dumps({"score": "yes"})
+    if "You are a code evaluator" in prompt:
+        return json.dumps({"score": "yes", "feedback": "The code answers the question."})
+    if "You are a search planner" in prompt:
+        question = _between(prompt, "Here is the user question:", "<|eot_id|>")
+        limit = re.search(r"at most (\d+) short search keywords", prompt)
+        return json.dumps({"keywords": local_keywords(question, int(limit.group(1)) if limit else 3)})
+    if "question re-writer" in prompt:
+        return _between(prompt, "Here is the initial question:", "Formulate an improved question.")
+
+    question = _between(prompt, "<question>", "</question>") or prompt[-200:]
+    words = _tokens(question) or ["video"]
+    seed = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16)
+    filler = ["the", "videos", "show", "that", "viewers", "discuss", "and", "compare", "recent", "uploads"]
+    body = [words[(seed + i) % len(words)] if i % 3 == 0 else filler[(seed + i) % len(filler)]
+            for i in range(max(completion_tokens - 4, 0))]
+    return "Based on the retrieved videos, " + " ".join(body) + "."
+
+
+def embed(value, dims: int) -> List[float]:
+    """
+    Deterministic bag-of-words embedding: every token is hashed to a signed dimension, so texts sharing words
+    are close and similarity search behaves plausibly. Token id lists (tiktoken input) are hashed per id.
+    """
+    tokens = [str(token) for token in value] if isinstance(value, list) else _tokens(value)
+    vector = [0.0] * dims
+    for token in tokens or [""]:
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dims
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _prompt(messages: List[dict]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def _error(status: int) -> JSONResponse:
+    headers = {"retry-after": "1"} if status == 429 else {}
+    return JSONResponse({"error": {"message": f"Injected error {status}", "type": "standin_error", "code": status}},
+                        status_code=status, headers=headers)
+
+
+def create_app(config: Optional[StandInConfig] = None) -> FastAPI:
+    """
+    Creates the stand-in server: /v1/chat/completions (with streaming), /v1/embeddings, /v1/models and /stats.
+    """
+    config = config or StandInConfig()
+    stats = {"chat": 0, "stream": 0, "embeddings": 0, "inputs_embedded": 0, "errors": 0, "tokens_out": 0}
+    app = FastAPI(title="LLM Stand-in", description="Local OpenAI-compatible server for load testing.")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "standin", "object": "model", "owned_by": "local"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        status = config.injected_error()
+        if status is not None:
+            stats["errors"] += 1
+            return _error(status)
+
+        model = body.get("model", "standin")
+        prompt = _prompt(body.get("messages", []))
+        text = respond(prompt, config.completion_tokens)
+        pieces = re.findall(r"\S+\s*", text)
+        usage = {"prompt_tokens": len(_tokens(prompt)), "completion_tokens": len(pieces),
+                 "total_tokens": len(_tokens(prompt)) + len(pieces)}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        delay = 1 / config.tokens_per_second if config.tokens_per_second else 0
+        stats["tokens_out"] += len(pieces)
+
+        await asyncio.sleep(config.sample(config.latency))
+        if not body.get("stream"):
+            stats["chat"] += 1
+            await asyncio.sleep(delay * len(pieces))
+            return {"id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": "stop"}],
+                    "usage": usage}
+
+        stats["stream"] += 1
+
+        async def events():
+            def chunk(delta: dict, finish_reason=None) -> str:
+                data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+                return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for piece in pieces:
+                await asyncio.sleep(delay)
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        status = config.injected_error()
+        if status is not None:
+            stats["errors"] += 1
+            return _error(status)
+
+        inputs = body.get("input", [])
+        # 单个字符串或单个 token 序列都按一条输入处理
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        await asyncio.sleep(config.sample(config.embedding_latency))
+        stats["embeddings"] += 1
+        stats["inputs_embedded"] += len(inputs)
+        dims = body.get("dimensions") or config.embedding_dims
+        return {"object": "list", "model": body.get("model", "standin"),
+                "data": [{"object": "embedding", "index": i, "embedding": embed(value, dims)}
+                         for i, value in enumerate(inputs)],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in for load testing the agent. "
+                                                 "Point the server at it with LLM_PROVIDER=local and "
+                                                 "EMBEDDING_PROVIDER=local.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="lognormal:-1.2,0.5",
+                        help="time to first token, e.g. constant:0.2, uniform:0.1,0.5, lognormal:-1.2,0.5")
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-statuses", default="429,500")
+    parser.add_argument("--embedding-latency", default="constant:0.02")
+    parser.add_argument("--embedding-dims", type=int, default=1536)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(StandInConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(status) for status in args.error_statuses.split(",")),
+        embedding_latency=args.embedding_latency,
+        embedding_dims=args.embedding_dims,
+        seed=args.seed,
+    )), host=args.host, port=args.port)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Load Generator
+#
+# Drives app/server.py with concurrent questions and reports throughput and tail latency. For an offline run
+# against the local stand-in instead of a paid provider:
+#
+#   python app/llm_standin.py --latency lognormal:-1.2,0.5 --tokens-per-second 50
+#   LLM_PROVIDER=local EMBEDDING_PROVIDER=local DOCUMENT_SOURCES=synthetic QUERY_PLANNER=local python app/server.py
+#   python app/load_test.py --concurrency 16 --requests 200 --standin-url http://localhost:8001
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+
+DEFAULT_QUESTIONS = [
+    "What are the most viewed videos about LangGraph agents?",
+    "Compare the engagement of recent Python tutorial videos",
+    "Which channels post the most about FAISS and vector search?",
+    "How are people reviewing the latest iPhone on video?",
+    "What do viewers say about open source LLM fine-tuning?",
+    "Find popular videos about Rust web frameworks and summarize them",
+]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class LoadGenerator:
+    """
+    Sends questions to the agent server from `concurrency` workers until `requests` have completed or
+    `duration` seconds have passed, and records the latency and outcome of each.
+    """
+
+    def __init__(self, url: str, questions: List[str], concurrency: int = 8, requests: int = 100,
+                 duration: Optional[float] = None, batch_size: int = 0, timeout: float = 300):
+        """
+        Args:
+            url (str): Base URL of app/server.py.
+            questions (List[str]): Questions sent round-robin.
+            concurrency (int): Number of concurrent clients.
+            requests (int): Total number of requests; ignored when a duration is given.
+            duration (Optional[float]): Run length in seconds.
+            batch_size (int): Send this many questions per request to /youtube_agent_batch instead of the chat endpoint.
+            timeout (float): Per-request timeout in seconds.
+        """
+        self.url = url.rstrip("/")
+        self.questions = questions
+        self.concurrency = concurrency
+        self.requests = requests
+        self.duration = duration
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.latencies: List[float] = []
+        self.outcomes = Counter()
+        self._sent = 0
+
+    def _next_request(self) -> Optional[tuple]:
+        if self.duration is None and self._sent >= self.requests:
+            return None
+        index = self._sent
+        self._sent += 1
+        if self.batch_size:
+            questions = [self.questions[(index * self.batch_size + i) % len(self.questions)]
+                         for i in range(self.batch_size)]
+            return "/youtube_agent_batch", {"questions": questions}
+        question = self.questions[index % len(self.questions)]
+        return "/youtube_agent_chat/invoke", {"input": {"input": question, "session_id": uuid.uuid4().hex}}
+
+    async def _worker(self, client: httpx.AsyncClient, deadline: Optional[float]) -> None:
+        while deadline is None or time.perf_counter() < deadline:
+            request = self._next_request()
+            if request is None:
+                return
+            path, body = request
+            start = time.perf_counter()
+            try:
+                response = await client.post(self.url + path, json=body)
+                outcome = str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            self.latencies.append(time.perf_counter() - start)
+            self.outcomes[outcome] += 1
+
+    async def run(self) -> dict:
+        """
+        Returns:
+            dict: Request count, outcomes, throughput and latency percentiles in seconds.
+        """
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            start = time.perf_counter()
+            deadline = start + self.duration if self.duration is not None else None
+            await asyncio.gather(*(self._worker(client, deadline) for _ in range(self.concurrency)))
+            elapsed = time.perf_counter() - start
+
+        return {
+            "requests": len(self.latencies),
+            "questions_per_request": self.batch_size or 1,
+            "outcomes": dict(self.outcomes),
+            "elapsed_seconds": round(elapsed, 2),
+            "throughput_rps": round(len(self.latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_seconds": {name: round(percentile(self.latencies, fraction), 3)
+                                for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))},
+        }
+
+
+async def fetch_json(url: str) -> Optional[dict]:
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            return (await client.get(url)).json()
+    except (httpx.HTTPError, json.JSONDecodeError) as e:
+        print(f"Failed to fetch {url}: {e}")
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load generator for the YouTube agent server.")
+    parser.add_argument("--url", default="http://localhost:8000", help="base URL of app/server.py")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead of a request count")
+    parser.add_argument("--batch-size", type=int, default=0, help="questions per request to the batch endpoint")
+    parser.add_argument("--questions", help="file with one question per line")
+    parser.add_argument("--standin-url", help="base URL of app/llm_standin.py, to include its counters")
+    args = parser.parse_args()
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    report = await LoadGenerator(args.url, questions, concurrency=args.concurrency, requests=args.requests,
+                                 duration=args.duration, batch_size=args.batch_size).run()
+    report["server_llm"] = await fetch_json(args.url.rstrip("/") + "/metrics/llm")
+    if args.standin_url:
+        report["standin"] = await fetch_json(args.standin_url.rstrip("/") + "/stats")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,32 +10,58 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from fastapi import FastAPI
+import asyncio
+import json
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import RedirectResponse
 from langserve import add_routes
 from pydantic import BaseModel
-from utils import create_workflow
+from sse_starlette.sse import EventSourceResponse
+from utils import (create_batch_runner, create_parser_components, create_prewarmer, create_subscription_hub,
+                   create_workflow)
+from models import backend_stats
+from youtube_tools.quota import get_quota
 
 from dotenv import load_dotenv, find_dotenv
 
 load_dotenv(find_dotenv())
 
-# Initialize graph nodes workflow
-chain = create_workflow(
+# Initialize graph nodes workflow; the batch endpoint shares its components
+components = create_parser_components(
     os.getenv('OPENAI_API_KEY'),
     os.getenv('model'),
     os.getenv('BASE_URL')
 )
+chain = create_workflow(
+    os.getenv('OPENAI_API_KEY'),
+    os.getenv('model'),
+    os.getenv('BASE_URL'),
+    components=components
+)
+batch_runner = create_batch_runner(components)
+
+# Shared collectors pushing keyword and live room updates to subscribers
+hub = create_subscription_hub(components)
+
+# Background pre-warming of the index from Bilibili trending feeds (None unless PREWARM_ENABLED)
+prewarmer = create_prewarmer(components)
 
 
 class Input(BaseModel):
     input: str
+    session_id: Optional[str] = None
 
 
 class Output(BaseModel):
     output: dict
 
 
+class BatchInput(BaseModel):
+    questions: List[str]
+
+
 app = FastAPI(
     title="YouTubeAgent Server",
     version="1.0",
@@ -48,6 +74,130 @@ async def redirect_root_to_docs():
     return RedirectResponse("/docs")
 
 
+@app.get("/metrics/youtube_quota")
+async def youtube_quota_metrics():
+    """Units spent per endpoint today and the remaining YouTube quota."""
+    return get_quota().snapshot()
+
+
+@app.post("/youtube_agent_batch")
+async def youtube_agent_batch(batch: BatchInput):
+    """
+    Answers a list of related questions with one shared retrieval pass; results are returned in input order.
+    """
+    if not batch.questions:
+        raise HTTPException(status_code=400, detail="questions must not be empty")
+    return {"results": await batch_runner.run(batch.questions)}
+
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """Requests, retries and in-flight calls of each pooled LLM endpoint."""
+    return backend_stats()
+
+
+@app.get("/metrics/sources")
+async def source_metrics():
+    """Latency, status and video count of the latest request to each source."""
+    return components["retriever"].source_stats
+
+
+@app.get("/metrics/freshness")
+async def freshness_metrics():
+    """Age of every pre-warmed index shard and whether questions about it skip the real-time fetch."""
+    if prewarmer is None:
+        return {"enabled": False}
+    return {"enabled": True, **prewarmer.freshness_report()}
+
+
+@app.get("/metrics/subscriptions")
+async def subscription_metrics():
+    """Running collectors and subscribers per topic."""
+    return hub.stats()
+
+
+def _split(values: str) -> list:
+    return [value.strip() for value in values.split(",") if value.strip()]
+
+
+@app.get("/subscribe/sse")
+async def subscribe_sse(request: Request, keywords: str = "", rooms: str = "", source: str = "bilibili"):
+    """
+    Server-sent event stream of new videos and metric deltas of the given keywords (comma separated) and of
+    hotspot summaries and burst alerts of the given live rooms.
+    """
+    subscription = hub.subscription()
+    try:
+        await hub.subscribe(subscription, hub.topics(_split(keywords), _split(rooms), source))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    continue
+                yield {"event": event["type"], "data": json.dumps(event, ensure_ascii=False)}
+        finally:
+            await hub.unsubscribe(subscription)
+
+    return EventSourceResponse(events(), ping=15)
+
+
+@app.websocket("/subscribe/ws")
+async def subscribe_ws(websocket: WebSocket):
+    """
+    WebSocket variant of /subscribe/sse. Clients send {"action": "subscribe" | "unsubscribe", "keywords": [...],
+    "rooms": [...], "source": "bilibili" | "youtube"} at any time and receive the events of their topics.
+    Malformed messages are answered with an error event and the connection stays open.
+    """
+    await websocket.accept()
+    subscription = hub.subscription()
+
+    async def send_events():
+        async for event in subscription:
+            await websocket.send_json(event)
+
+    sender = asyncio.create_task(send_events())
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise ValueError("message must be a JSON object")
+                topics = hub.topics(message.get("keywords", []), message.get("rooms", []),
+                                    message.get("source", "bilibili"))
+                if message.get("action") == "unsubscribe":
+                    await hub.unsubscribe(subscription, topics)
+                else:
+                    await hub.subscribe(subscription, topics)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "data": str(e)})
+                continue
+            await websocket.send_json({"type": "subscribed", "data": sorted(subscription.topics)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        await hub.unsubscribe(subscription)
+
+
+@app.on_event("startup")
+async def start_prewarmer():
+    if prewarmer is not None:
+        prewarmer.start()
+
+
+@app.on_event("shutdown")
+async def stop_collectors():
+    await hub.close()
+    if prewarmer is not None:
+        await prewarmer.stop()
+
+
 # Add routes
 add_routes(
     app,
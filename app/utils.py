@@ -3,6 +3,7 @@
 # Author: MuyuCheney
 # Date: 2024-10-15
 
+import os
 import sys
 from pathlib import Path
 
@@ -10,13 +11,26 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from langchain_openai import ChatOpenAI
 from bili_server.document_loader import DocumentLoader
+from bili_server.cache import get_cache, is_shared_url
+from bilibili_api import settings as bilibili_settings
 from bili_server.edges import EdgeGraph
 from bili_server.generate_chain import create_generate_chain
 from bili_server.graph import GraphState
 from bili_server.grader import GraderUtils
+from bili_server.grade_cascade import GradingCascade
+from bili_server.batch import BatchRunner
+from bili_server.delta_refresh import DeltaRefresher
+from bili_server.index_pool import IndexPool
+from bili_server.query_planner import QueryPlanner
+from bili_server.session_memory import SessionMemory
+from bili_server.sources import create_providers
 from bili_server.nodes import GraphNodes
+from bili_server.prewarm import Prewarmer
+from bili_server.subscriptions import SubscriptionHub
+from bilibili_tools.get_bilibi import get_credential
+from bilibili_tools.hotspot import HotspotEngine
+from models import create_chat_model
 
 from langgraph.graph import END, StateGraph
 
@@ -34,19 +48,45 @@ def create_parser_components(api_key: str, model: str, base_url: str = None):
     dict: 包含所有创建的组件实例的字典。
     """
 
-    # 创建 retriever 实例，用于文档检索
-    retriever = DocumentLoader()
+    # 配置了 CACHE_URL（sqlite:// 或 redis://）时，B 站接口的 WBI 密钥和 buvid3 缓存与其他进程共享
+    if is_shared_url(os.getenv("CACHE_URL")):
+        bilibili_settings.cache_backend = get_cache("bilibili_api")
+    # WBI 密钥和 buvid3 写入本地文件，同一台机器上的多个进程共享，刷新时只请求一次
+    bilibili_settings.key_cache_path = os.getenv("BILIBILI_KEY_CACHE_PATH", ".bilibili_keys.json")
+    # B 站 GET 接口响应缓存：视频信息、用户卡片、分区和标签等变化缓慢的接口在有效期内不重复请求
+    bilibili_settings.response_cache = os.getenv("BILIBILI_RESPONSE_CACHE", "false").lower() == "true"
+    # 合并并发的相同 B 站 GET 请求：热门视频被多个任务同时查询时只发出一次
+    bilibili_settings.singleflight = os.getenv("BILIBILI_SINGLEFLIGHT", "true").lower() == "true"
+    # B 站请求限速：按域名和接口组的令牌桶匀速发出请求，遇到风控自动降速后逐步恢复
+    bilibili_settings.rate_limit = os.getenv("BILIBILI_RATE_LIMIT", "true").lower() == "true"
+    if os.getenv("BILIBILI_RATE_LIMIT_RPS"):
+        bilibili_settings.rate_limit_default = (float(os.getenv("BILIBILI_RATE_LIMIT_RPS")),
+                                                int(os.getenv("BILIBILI_RATE_LIMIT_BURST", "10")))
 
-    # 创建 LLM model 实例，配置为使用指定的模型和温度参数
-    llm_params = {
-        "api_key": api_key,
-        "model": model,
-        "temperature": 0
-    }
-    if base_url:
-        llm_params["base_url"] = base_url
-    
-    llm = ChatOpenAI(**llm_params)
+    # 创建 retriever 实例，用于文档检索；配置了 INDEX_POOL_DIR 时按关键词分片常驻索引，并在内存预算内做 LRU 淘汰
+    index_pool = None
+    if os.getenv("INDEX_POOL_DIR"):
+        index_pool = IndexPool(os.getenv("INDEX_POOL_DIR"),
+                               memory_budget_mb=float(os.getenv("INDEX_POOL_BUDGET_MB", "512")))
+    # 检索来源：各来源并发查询，各自超时，慢的来源在本次请求中被丢弃
+    source_names = [name.strip() for name in os.getenv("DOCUMENT_SOURCES", "youtube,bilibili").split(",") if name.strip()]
+    sources = create_providers(source_names, {name: float(os.getenv(f"SOURCE_TIMEOUT_{name.upper()}"))
+                                              for name in source_names if os.getenv(f"SOURCE_TIMEOUT_{name.upper()}")})
+    retriever = DocumentLoader(index_pool=index_pool, sources=sources,
+                               warm_max_age=float(os.getenv("PREWARM_MAX_AGE_SECONDS", "1800")),
+                               comment_videos=int(os.getenv("COMMENT_VIDEOS", "5")),
+                               comment_pages=int(os.getenv("COMMENT_PAGES", "1")),
+                               comment_timeout=float(os.getenv("COMMENT_TIMEOUT_SECONDS", "5")))
+
+    # 创建会话级检索记忆，同一 session_id 的追问复用已构建的索引和评分结果
+    session_memory = SessionMemory(memory_budget_mb=float(os.getenv("SESSION_MEMORY_BUDGET_MB", "256")),
+                                   ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")))
+
+    # 创建 LLM model 实例：同一端点的所有组件共用连接池、并发上限和带抖动的重试（LLM_PROVIDER 选择 openai、glm 或 local）
+    # 传入的 api_key / base_url 来自 OPENAI_API_KEY / BASE_URL，只用于 openai，其他服务商读取各自的环境变量
+    provider = os.getenv("LLM_PROVIDER", "openai")
+    credentials = {"api_key": api_key, "base_url": base_url} if provider == "openai" else {}
+    llm = create_chat_model(model, provider=provider, temperature=0, **credentials)
 
     # 创建生成链，用于基于语言模型的生成任务
     generate_chain = create_generate_chain(llm)
@@ -63,6 +103,19 @@ def create_parser_components(api_key: str, model: str, base_url: str = None):
     # 创建代码评估器，用于评估代码执行结果的正确性
     code_evaluator = grader.create_code_evaluator()
 
+    # 创建廉价优先的评分级联：相似度或关键词重合度足以判定的文档不再调用 LLM 评分器
+    grading_cascade = GradingCascade(
+        accept_similarity=float(os.getenv("GRADER_ACCEPT_SIMILARITY", "0.85")),
+        reject_similarity=float(os.getenv("GRADER_REJECT_SIMILARITY", "0.5")),
+        accept_lexical=float(os.getenv("GRADER_ACCEPT_LEXICAL", "0.75")),
+        log_path=os.getenv("GRADER_LOG_PATH") or None,
+        shadow_rate=float(os.getenv("GRADER_SHADOW_RATE", "0.05")),
+    )
+
+    # 创建查询规划器：把问题拆成几个短关键词并发检索；QUERY_PLANNER=local 时不调用 LLM，只做本地关键词抽取
+    keyword_extractor = grader.create_keyword_extractor() if os.getenv("QUERY_PLANNER", "llm") == "llm" else None
+    query_planner = QueryPlanner(keyword_extractor, max_keywords=int(os.getenv("QUERY_MAX_KEYWORDS", "3")))
+
     # 创建问题重写器，用于优化用户问题，使其更适合模型理解和回答
     question_rewriter = grader.create_question_rewriter()
 
@@ -74,14 +127,20 @@ def create_parser_components(api_key: str, model: str, base_url: str = None):
         "retrieval_grader": retrieval_grader,
         "hallucination_grader": hallucination_grader,
         "code_evaluator": code_evaluator,
-        "question_rewriter": question_rewriter
+        "question_rewriter": question_rewriter,
+        "session_memory": session_memory,
+        "grading_cascade": grading_cascade,
+        "query_planner": query_planner
     }
 
 
-def create_workflow(api_key: str, model: str, base_url: str = None):
+def create_workflow(api_key: str, model: str, base_url: str = None, components: dict = None):
     """
     创建并初始化工作流以及其组成的节点和边。
 
+    Args:
+    components (dict): create_parser_components 创建的组件（可选），与批量问答等其他入口共享时传入。
+
     Returns:
     StateGraph: 完全初始化和编译好的工作流对象。
     """
@@ -89,26 +148,30 @@ def create_workflow(api_key: str, model: str, base_url: str = None):
     # 调用函数并直接解构字典以获取所有实例
     (llm, retriever, generate_chain,
      retrieval_grader, hallucination_grader,
-     code_evaluator, question_rewriter) = create_parser_components(api_key, model, base_url).values()
+     code_evaluator, question_rewriter, session_memory,
+     grading_cascade, query_planner) = (components or create_parser_components(api_key, model, base_url)).values()
 
     # 初始化图结构
     workflow = StateGraph(GraphState)
 
     # 创建图节点的实例
-    graph_nodes = GraphNodes(llm, retriever, retrieval_grader, hallucination_grader, code_evaluator, question_rewriter)
+    graph_nodes = GraphNodes(llm, retriever, retrieval_grader, hallucination_grader, code_evaluator, question_rewriter,
+                             session_memory, grading_cascade, query_planner)
 
     # 创建边节点的实例
     edge_graph = EdgeGraph(hallucination_grader, code_evaluator)
 
     # 定义节点
     workflow.add_node("retrieve", graph_nodes.retrieve)  # retrieve documents
+    workflow.add_node("analyze", graph_nodes.analyze)  # compute metric tables locally
     workflow.add_node("grade_documents", graph_nodes.grade_documents)  # grade documents
     workflow.add_node("generate", graph_nodes.generate)  # generate answers
     workflow.add_node("transform_query", graph_nodes.transform_query)  # transform query
 
     # 创建图
     workflow.set_entry_point("retrieve")
-    workflow.add_edge("retrieve", "grade_documents")
+    workflow.add_edge("retrieve", "analyze")
+    workflow.add_edge("analyze", "grade_documents")
     workflow.add_conditional_edges(
         "grade_documents",
         edge_graph.decide_to_generate,
@@ -133,8 +196,72 @@ def create_workflow(api_key: str, model: str, base_url: str = None):
     return chain
 
 
+def create_batch_runner(components: dict):
+    """
+    创建批量问答执行器：多个问题共用一次检索、一个索引，每个 (问题, 文档) 只评分一次，生成并发执行。
+
+    Args:
+    components (dict): create_parser_components 创建的组件。
+
+    Returns:
+    BatchRunner: 批量问答执行器。
+    """
+    return BatchRunner(components["retriever"],
+                       components["retrieval_grader"],
+                       components["generate_chain"],
+                       query_planner=components["query_planner"],
+                       grading_cascade=components["grading_cascade"],
+                       max_concurrency=int(os.getenv("BATCH_MAX_CONCURRENCY", "8")))
+
+
+def create_subscription_hub(components: dict):
+    """
+    创建推送订阅中心：关键词订阅由增量刷新驱动，直播间订阅由弹幕热点引擎驱动，同一主题只运行一个采集器。
+
+    Args:
+    components (dict): create_parser_components 创建的组件。
+
+    Returns:
+    SubscriptionHub: 订阅中心实例；未配置 INDEX_POOL_DIR 时只支持直播间订阅。
+    """
+
+    # 关键词订阅把增量刷新的结果写入检索器的常驻索引池，与检索共用同一个池，避免两个池写同一目录
+    retriever = components["retriever"]
+    refresher = None
+    if retriever.index_pool is not None:
+        refresher = DeltaRefresher(retriever, os.getenv("DELTA_STATE_PATH", ".delta_watermarks.json"))
+
+    return SubscriptionHub(refresher=refresher,
+                           hotspot_engine=HotspotEngine(get_credential()),
+                           keyword_interval=float(os.getenv("SUBSCRIPTION_KEYWORD_INTERVAL", "300")),
+                           linger_seconds=float(os.getenv("SUBSCRIPTION_LINGER_SECONDS", "60")),
+                           youtube_keyword_interval=float(os.getenv("SUBSCRIPTION_YOUTUBE_KEYWORD_INTERVAL", "3600")),
+                           max_youtube_keywords=int(os.getenv("SUBSCRIPTION_MAX_YOUTUBE_KEYWORDS", "2")))
+
+
+def create_prewarmer(components: dict):
+    """
+    创建索引预热器：后台定时抓取 B 站热搜、热门和排行榜视频及其评论写入常驻索引池，
+    命中预热分片的问题直接从索引作答，不再实时抓取。
+
+    Args:
+    components (dict): create_parser_components 创建的组件。
+
+    Returns:
+    Prewarmer: 预热器；未开启 PREWARM_ENABLED 或未配置 INDEX_POOL_DIR 时返回 None。
+    """
+    retriever = components["retriever"]
+    if os.getenv("PREWARM_ENABLED", "false").lower() != "true" or retriever.index_pool is None:
+        return None
+
+    zones = tuple(int(tid) for tid in os.getenv("PREWARM_ZONES", "").split(",") if tid.strip())
+    return Prewarmer(retriever,
+                     interval=float(os.getenv("PREWARM_INTERVAL_SECONDS", "900")),
+                     max_keywords=int(os.getenv("PREWARM_MAX_KEYWORDS", "10")),
+                     zones=zones)
+
+
 if __name__ == '__main__':
-    import os
     from dotenv import load_dotenv, find_dotenv
 
     load_dotenv(find_dotenv())
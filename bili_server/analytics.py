@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Local Analytics Module
+
+import datetime
+import re
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = ["views", "likes", "comments", "favorites", "danmaku"]
+
+
+def _strip_tags(text: str) -> str:
+    return re.sub(r"<[^>]+>", "", text or "")
+
+
+def normalize_youtube(video: dict) -> dict:
+    """
+    Maps a video dict produced by youtube_tools.get_youtube.search_videos to the common metrics schema.
+    """
+    return {
+        "platform": "youtube",
+        "title": video.get("title", ""),
+        "author": video.get("channel", ""),
+        "url": video.get("url", ""),
+        "views": video.get("view_count", 0),
+        "likes": video.get("like_count", 0),
+        "comments": video.get("comment_count", 0),
+        "favorites": None,
+        "danmaku": None,
+        "published_at": video.get("published_at"),
+    }
+
+
+def normalize_bilibili(item: dict) -> dict:
+    """
+    Maps a Bilibili search result item to the common metrics schema.
+    """
+    pubdate = item.get("pubdate")
+    return {
+        "platform": "bilibili",
+        "title": _strip_tags(item.get("title", "")),
+        "author": item.get("author", ""),
+        "url": item.get("arcurl", ""),
+        "views": item.get("play", 0),
+        "likes": item.get("like", 0),
+        "comments": item.get("review", 0),
+        "favorites": item.get("favorites", 0),
+        "danmaku": item.get("video_review", 0),
+        "published_at": datetime.datetime.fromtimestamp(pubdate, datetime.timezone.utc).isoformat() if pubdate else None,
+    }
+
+
+def normalize_bilibili_archive(item: dict) -> dict:
+    """
+    Maps a Bilibili archive record (popular list, ranking, zone top 10) to the common metrics schema.
+    Records without a "stat" object use the flat search result fields.
+    """
+    if "stat" not in item:
+        return normalize_bilibili(item)
+    stat = item["stat"]
+    pubdate = item.get("pubdate") or item.get("ctime")
+    bvid = item.get("bvid")
+    return {
+        "platform": "bilibili",
+        "title": _strip_tags(item.get("title", "")),
+        "author": (item.get("owner") or {}).get("name", item.get("author", "")),
+        "url": f"https://www.bilibili.com/video/{bvid}" if bvid else item.get("short_link_v2", ""),
+        "views": stat.get("view", 0),
+        "likes": stat.get("like", 0),
+        "comments": stat.get("reply", 0),
+        "favorites": stat.get("favorite", 0),
+        "danmaku": stat.get("danmaku", 0),
+        "published_at": datetime.datetime.fromtimestamp(pubdate, datetime.timezone.utc).isoformat() if pubdate else None,
+    }
+
+
+def to_frame(videos: List[dict]) -> pd.DataFrame:
+    """
+    Loads normalized video records into a columnar frame with numeric metric columns.
+
+    Args:
+        videos (List[dict]): Records in the common metrics schema.
+
+    Returns:
+        pd.DataFrame: One row per distinct video URL.
+    """
+    df = pd.DataFrame(videos)
+    if df.empty:
+        return df
+
+    df = df.drop_duplicates(subset="url")
+    for column in METRIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df["published_at"] = pd.to_datetime(df["published_at"], errors="coerce", utc=True)
+    return df.reset_index(drop=True)
+
+
+def compute_metrics(df: pd.DataFrame, top_n: int = 10, now: pd.Timestamp = None) -> Dict[str, pd.DataFrame]:
+    """
+    Computes rankings, engagement ratios, growth and distributions over a metrics frame.
+
+    Args:
+        df (pd.DataFrame): Frame built by to_frame.
+        top_n (int): Number of rows kept in ranking tables.
+        now (pd.Timestamp): Reference time for video age. Defaults to the current time.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Named result tables.
+    """
+    if df.empty:
+        return {}
+
+    if now is None:
+        now = pd.Timestamp.now(tz="UTC")
+    views = df["views"].replace(0, np.nan)
+    df = df.assign(
+        engagement_rate=(df[["likes", "comments", "favorites", "danmaku"]].sum(axis=1, min_count=1) / views),
+        like_rate=df["likes"] / views,
+        age_days=((now - df["published_at"]).dt.total_seconds() / 86400).clip(lower=1),
+    )
+    df["views_per_day"] = df["views"] / df["age_days"]
+
+    columns = ["title", "author", "views", "likes", "comments", "engagement_rate", "views_per_day"]
+    tables = {
+        "Top videos by views": df.nlargest(top_n, "views")[columns],
+        "Top videos by engagement rate": df.nlargest(top_n, "engagement_rate")[columns],
+        "Fastest growing videos (views per day since publish)": df.nlargest(top_n, "views_per_day")[columns],
+    }
+
+    present = [column for column in METRIC_COLUMNS + ["engagement_rate", "views_per_day"] if df[column].notna().any()]
+    distribution = df[present].describe(percentiles=[0.25, 0.5, 0.75, 0.9]).T
+    tables["Metric distributions"] = distribution.drop(columns="count").reset_index().rename(columns={"index": "metric"})
+
+    by_author = (df.groupby("author")
+                 .agg(videos=("url", "count"), total_views=("views", "sum"), mean_engagement=("engagement_rate", "mean"))
+                 .sort_values("total_views", ascending=False)
+                 .head(top_n)
+                 .reset_index())
+    tables["Top authors by total views"] = by_author
+
+    if df["platform"].nunique() > 1:
+        tables["Per platform totals"] = (df.groupby("platform")[present].sum(min_count=1).reset_index())
+    return tables
+
+
+def _format_value(value) -> str:
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return "-"
+        return f"{value:.4f}" if abs(value) < 1 else f"{value:,.0f}"
+    if isinstance(value, (int, np.integer)):
+        return f"{value:,}"
+    text = str(value).replace("|", "/").replace("\n", " ")
+    return text if len(text) <= 60 else text[:57] + "..."
+
+
+def render_tables(tables: Dict[str, pd.DataFrame]) -> str:
+    """
+    Renders result tables as compact pipe tables for the prompt.
+
+    Args:
+        tables (Dict[str, pd.DataFrame]): Output of compute_metrics.
+
+    Returns:
+        str: The tables as text, or an empty string when there is nothing to report.
+    """
+    sections = []
+    for name, table in tables.items():
+        lines = [f"### {name}", "| " + " | ".join(map(str, table.columns)) + " |",
+                 "|" + "---|" * len(table.columns)]
+        for row in table.itertuples(index=False):
+            lines.append("| " + " | ".join(_format_value(value) for value in row) + " |")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def analyze_videos(videos: List[dict], top_n: int = 10) -> str:
+    """
+    Runs the whole analytics pass over normalized video records.
+
+    Args:
+        videos (List[dict]): Records in the common metrics schema.
+        top_n (int): Number of rows kept in ranking tables.
+
+    Returns:
+        str: Rendered tables, or an empty string when there is no data.
+    """
+    return render_tables(compute_metrics(to_frame(videos), top_n=top_n))
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent ANN Index Module
+
+import math
+import os
+import time
+import uuid
+from typing import List, Optional
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+# 支持的索引类型：
+#   flat     精确检索，存储完整 float32 向量（默认）
+#   ivf_flat 倒排分区，只扫描 nprobe 个分区，向量不压缩
+#   ivf_sq8  倒排分区 + int8 标量量化，体积约为 flat 的 1/4
+#   ivf_pq   倒排分区 + 乘积量化，每个向量只存 PQ_M 字节
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_sq8", "ivf_pq")
+
+# IVF 每个分区至少需要这么多训练样本，否则聚类中心不稳定
+MIN_POINTS_PER_LIST = 39
+
+
+def default_index_type() -> str:
+    """Index type configured through the FAISS_INDEX_TYPE environment variable."""
+    return os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """Largest number of PQ sub-quantizers (<= 64) that divides the vector dimension."""
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def create_index(dim: int, num_vectors: int, index_type: str = "flat", nlist: Optional[int] = None) -> faiss.Index:
+    """
+    Builds an untrained FAISS index of the requested type.
+
+    Args:
+        dim (int): Dimension of the vectors.
+        num_vectors (int): Size of the corpus, used to size the IVF partitions.
+        index_type (str): One of INDEX_TYPES.
+        nlist (Optional[int]): Number of IVF partitions. Defaults to about 4 * sqrt(num_vectors).
+
+    Returns:
+        faiss.Index: The index. IVF indexes fall back to flat when the corpus is too small to train them.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if nlist is None:
+        nlist = max(1, int(4 * math.sqrt(num_vectors)))
+    if index_type == "flat" or num_vectors < nlist * MIN_POINTS_PER_LIST:
+        return faiss.IndexFlatL2(dim)
+
+    if index_type == "ivf_flat":
+        factory = f"IVF{nlist},Flat"
+    elif index_type == "ivf_sq8":
+        factory = f"IVF{nlist},SQ8"
+    else:
+        factory = f"IVF{nlist},PQ{_pq_subquantizers(dim)}"
+    return faiss.index_factory(dim, factory)
+
+
+def set_nprobe(index: faiss.Index, nprobe: int) -> None:
+    """
+    Sets how many IVF partitions a query scans. No-op for flat indexes.
+
+    Args:
+        index (faiss.Index): The index to tune.
+        nprobe (int): Number of partitions to scan; higher means better recall and slower queries.
+    """
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+
+
+def build_index(vectors: np.ndarray, index_type: str = "flat", nprobe: Optional[int] = None) -> faiss.Index:
+    """
+    Creates, trains and fills an index with the given vectors.
+
+    Args:
+        vectors (np.ndarray): float32 matrix of shape (n, dim).
+        index_type (str): One of INDEX_TYPES.
+        nprobe (Optional[int]): Partitions scanned per query. Defaults to the NPROBE env variable or 16.
+
+    Returns:
+        faiss.Index: The populated index.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = create_index(vectors.shape[1], vectors.shape[0], index_type)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    set_nprobe(index, nprobe or int(os.getenv("NPROBE", "16")))
+    return index
+
+
+def grow_index(index: faiss.Index, index_type: Optional[str] = None) -> faiss.Index:
+    """
+    Rebuilds a flat index as the configured IVF type once it holds enough vectors to train one. Vectors keep
+    their positions as labels, so the docstore mapping of the FAISS store using the index stays valid; from then
+    on the store must be modified through add_to_store and delete_from_store, which keep those labels stable.
+
+    Args:
+        index (faiss.Index): The index of a store that is being added to.
+        index_type (Optional[str]): One of INDEX_TYPES. Defaults to FAISS_INDEX_TYPE.
+
+    Returns:
+        faiss.Index: The trained replacement, or the index itself when it is already IVF, flat is configured or
+            it is still below the training threshold.
+    """
+    index_type = index_type or default_index_type()
+    if index_type == "flat" or not isinstance(index, faiss.IndexFlat):
+        return index
+    if isinstance(create_index(index.d, index.ntotal, index_type), faiss.IndexFlat):
+        return index
+    grown = build_index(index.reconstruct_n(0, index.ntotal), index_type)
+    # delete_from_store 依赖 IVF 删除后保留其余向量的标签
+    faiss.extract_index_ivf(grown)
+    return grown
+
+
+def add_to_store(store: FAISS, docs: List[Document], ids: List[str]) -> None:
+    """
+    Adds documents to a store without disturbing the labels of the vectors it already holds.
+    FAISS.add_documents labels new vectors by the index size, which only matches the docstore mapping while
+    labels are contiguous; IVF indexes keep their labels across deletes, so they get explicit fresh labels.
+
+    Args:
+        store (FAISS): The store to add to.
+        docs (List[Document]): Already split documents to index.
+        ids (List[str]): Docstore IDs of the documents.
+    """
+    if isinstance(store.index, faiss.IndexFlat):
+        store.add_documents(docs, ids=ids)
+        return
+
+    vectors = np.array(store.embeddings.embed_documents([doc.page_content for doc in docs]), dtype=np.float32)
+    if store._normalize_L2:
+        faiss.normalize_L2(vectors)
+    start = max(store.index_to_docstore_id, default=-1) + 1
+    labels = np.arange(start, start + len(docs), dtype=np.int64)
+    store.index.add_with_ids(vectors, labels)
+    store.docstore.add(dict(zip(ids, docs)))
+    store.index_to_docstore_id.update(zip(labels.tolist(), ids))
+
+
+def delete_from_store(store: FAISS, ids: List[str]) -> None:
+    """
+    Removes documents from a store. FAISS.delete renumbers the docstore mapping to 0..n-1, which is what a flat
+    index does to its vectors but not what an IVF index does: there the remaining vectors keep their labels,
+    so only the deleted labels are dropped from the mapping.
+
+    Args:
+        store (FAISS): The store to delete from.
+        ids (List[str]): Docstore IDs held by the store.
+    """
+    if isinstance(store.index, faiss.IndexFlat):
+        store.delete(ids)
+        return
+
+    labels_by_id = {doc_id: label for label, doc_id in store.index_to_docstore_id.items()}
+    labels = [labels_by_id[doc_id] for doc_id in ids]
+    store.index.remove_ids(np.array(labels, dtype=np.int64))
+    store.docstore.delete(ids)
+    for label in labels:
+        del store.index_to_docstore_id[label]
+
+
+def index_bytes(index: faiss.Index) -> int:
+    """
+    Approximate memory held by an index: full float32 vectors for flat indexes, codes, ids and centroids for IVF.
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return index.ntotal * index.d * 4
+    return index.ntotal * (ivf.code_size + 8) + ivf.nlist * index.d * 4
+
+
+def from_documents(docs: List[Document], embedding_model, index_type: Optional[str] = None,
+                   ids: Optional[List[str]] = None) -> FAISS:
+    """
+    Drop-in replacement for FAISS.from_documents that honours the configured index type.
+
+    Args:
+        docs (List[Document]): Already split documents to index.
+        embedding_model (Embeddings): Embedding model used for documents and queries.
+        index_type (Optional[str]): One of INDEX_TYPES. Defaults to FAISS_INDEX_TYPE.
+        ids (Optional[List[str]]): Docstore IDs of the documents. Defaults to random UUIDs.
+
+    Returns:
+        FAISS: The vector store.
+    """
+    index_type = index_type or default_index_type()
+    if index_type == "flat":
+        return FAISS.from_documents(docs, embedding_model, ids=ids)
+
+    vectors = np.array(embedding_model.embed_documents([doc.page_content for doc in docs]), dtype=np.float32)
+    index = build_index(vectors, index_type)
+    ids = ids or [str(uuid.uuid4()) for _ in docs]
+    docstore = InMemoryDocstore(dict(zip(ids, docs)))
+    return FAISS(embedding_model, index, docstore, dict(enumerate(ids)))
+
+
+def _synthetic_corpus(num_vectors: int, dim: int, num_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Clustered Gaussian vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, num_clusters, size=num_vectors)
+    return centers[labels] + 0.3 * rng.normal(size=(num_vectors, dim)).astype(np.float32)
+
+
+def benchmark(num_vectors: int = 200_000, dim: int = 256, num_queries: int = 500, k: int = 10,
+              nprobes=(1, 4, 16, 64)) -> List[dict]:
+    """
+    Measures recall@k against exact search, per-query latency and memory footprint of every index type
+    on a synthetic corpus.
+
+    Args:
+        num_vectors (int): Corpus size.
+        dim (int): Vector dimension (1536 for OpenAI embeddings, smaller keeps the benchmark quick).
+        num_queries (int): Number of queries.
+        k (int): Number of neighbours compared.
+        nprobes (tuple): nprobe values tried for IVF indexes.
+
+    Returns:
+        List[dict]: One row per (index type, nprobe) with recall, latency in ms and size in MB.
+    """
+    corpus = _synthetic_corpus(num_vectors, dim)
+    queries = _synthetic_corpus(num_queries, dim, seed=1)
+
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(corpus)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for index_type in INDEX_TYPES:
+        started = time.perf_counter()
+        index = build_index(corpus, index_type)
+        build_seconds = time.perf_counter() - started
+        size_mb = faiss.serialize_index(index).nbytes / 1024 / 1024
+
+        for nprobe in (nprobes if index_type != "flat" else (None,)):
+            if nprobe is not None:
+                set_nprobe(index, nprobe)
+            started = time.perf_counter()
+            # 逐条查询，与线上单次检索的延迟口径一致
+            found = np.vstack([index.search(queries[i:i + 1], k)[1] for i in range(num_queries)])
+            latency_ms = (time.perf_counter() - started) * 1000 / num_queries
+            recall = np.mean([len(set(found[i]) & set(truth[i])) / k for i in range(num_queries)])
+            rows.append({
+                "index_type": index_type,
+                "nprobe": nprobe,
+                "recall": round(float(recall), 4),
+                "latency_ms": round(latency_ms, 3),
+                "size_mb": round(size_mb, 1),
+                "build_s": round(build_seconds, 1),
+            })
+    return rows
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recall vs latency benchmark of compressed FAISS indexes")
+    parser.add_argument("--num-vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--num-queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'index':<10}{'nprobe':>8}{'recall':>10}{'ms/query':>10}{'MB':>10}{'build s':>10}")
+    for row in benchmark(args.num_vectors, args.dim, args.num_queries, args.k):
+        print(f"{row['index_type']:<10}{str(row['nprobe'] or '-'):>8}{row['recall']:>10}"
+              f"{row['latency_ms']:>10}{row['size_mb']:>10}{row['build_s']:>10}")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Batch Question Module
+
+import asyncio
+from typing import Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+from bili_server.analytics import analyze_videos
+from bili_server.index_pool import scored_documents
+from bili_server.query_planner import QueryPlanner
+
+
+class BatchRunner:
+    """
+    Answers many related questions with one retrieval pass. The keywords planned for all questions are
+    fetched once into a single shared index, each distinct question is searched against it, every
+    (question, document) pair is graded at most once, and the generations run concurrently.
+
+    Unlike the graph, a batch does not loop through query rewrites: each question is answered from the
+    shared index in a single round.
+    """
+
+    def __init__(self, retriever, retrieval_grader, generate_chain, query_planner: QueryPlanner = None,
+                 grading_cascade=None, max_concurrency: int = 8, k: int = 10):
+        """
+        Args:
+            retriever (DocumentLoader): Fetches the documents and builds the shared index.
+            retrieval_grader (Runnable): LLM relevance grader.
+            generate_chain (Runnable): Answer generation chain.
+            query_planner (QueryPlanner): Splits each question into search keywords. Defaults to local extraction.
+            grading_cascade (GradingCascade, optional): Cheap-first grading in front of the LLM grader.
+            max_concurrency (int): Maximum number of LLM calls in flight.
+            k (int): Documents retrieved per question.
+        """
+        self.retriever = retriever
+        self.retrieval_grader = retrieval_grader
+        self.generate_chain = generate_chain
+        self.query_planner = query_planner or QueryPlanner()
+        self.grading_cascade = grading_cascade
+        self.max_concurrency = max_concurrency
+        self.k = k
+
+    async def run(self, questions: List[str]) -> List[dict]:
+        """
+        Args:
+            questions (List[str]): The questions; duplicates are answered once.
+
+        Returns:
+            List[dict]: One result per input question, in order: input, keywords, generation and the relevant documents.
+        """
+        distinct = list(dict.fromkeys(question.strip() for question in questions if question.strip()))
+        if not distinct:
+            return []
+
+        # 1. 规划：所有问题的关键词取并集，只检索一次
+        plans = await asyncio.gather(*(self.query_planner.plan(question) for question in distinct))
+        keywords = list(dict.fromkeys(keyword for plan in plans for keyword in plan))
+        print(f"Batch of {len(distinct)} questions planned {len(keywords)} distinct keywords: {keywords}")
+
+        # 2. 共享索引：一次抓取、一次向量化
+        docs = await self.retriever.get_docs(keywords, page=1)
+        if docs:
+            answers = await self._answer(distinct, plans, docs)
+        else:
+            print(f"Batch found no documents for keywords: {keywords}")
+            answers = {question: self._result(question, plan, error="no documents found")
+                       for question, plan in zip(distinct, plans)}
+        return [answers[question.strip()] if question.strip() else self._result(question, [], error="empty question")
+                for question in questions]
+
+    @staticmethod
+    def _result(question: str, plan: List[str], generation=None, error: str = None,
+                documents: List[Document] = ()) -> dict:
+        return {
+            "input": question,
+            "keywords": plan,
+            "generation": generation,
+            "error": error,
+            "documents": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+        }
+
+    async def _answer(self, distinct: List[str], plans: List[List[str]], docs: List[Document]) -> Dict[str, dict]:
+        """
+        Indexes the fetched documents once, then retrieves, grades and generates for every distinct question.
+        """
+        store = await self.retriever.create_vector_store(docs, index_type="flat")
+        retrieved = {question: scored_documents(store.similarity_search_with_score(question, k=self.k))
+                     for question in distinct}
+
+        # 3. 评分：每个 (问题, 文档) 只评一次
+        grades = await self._grade(retrieved)
+        relevant = {question: [doc for doc in documents if grades[(question, doc.page_content)] == "yes"]
+                    for question, documents in retrieved.items()}
+
+        # 4. 并发生成
+        inputs = []
+        for question, plan in zip(distinct, plans):
+            videos = self.retriever.get_metrics(plan)
+            inputs.append({"context": relevant[question], "input": question,
+                           "analytics": (analyze_videos(videos) if videos else "") or "No metrics available."})
+        generations = await self.generate_chain.abatch(inputs, config={"max_concurrency": self.max_concurrency},
+                                                       return_exceptions=True)
+
+        answers = {}
+        for question, plan, generation in zip(distinct, plans, generations):
+            failed = isinstance(generation, Exception)
+            answers[question] = self._result(question, plan, None if failed else generation,
+                                             str(generation) if failed else None, relevant[question])
+        return answers
+
+    async def _grade(self, retrieved: Dict[str, List[Document]]) -> Dict[Tuple[str, str], str]:
+        """
+        Grades every distinct (question, document) pair, with the cascade first and one batched LLM call
+        for the rest. The shadow sample of the cascade's own verdicts rides along in the same LLM batch and
+        is only logged.
+        """
+        grades: Dict[Tuple[str, str], str] = {}
+        pending: Dict[Tuple[str, str], Document] = {}
+        shadow: Dict[Tuple[str, str], Document] = {}
+        for question, documents in retrieved.items():
+            for doc in documents:
+                key = (question, doc.page_content)
+                if key in grades or key in pending:
+                    continue
+                grade = self.grading_cascade.decide(question, doc) if self.grading_cascade is not None else None
+                if grade is not None:
+                    grades[key] = grade
+                    if self.grading_cascade.should_shadow():
+                        shadow[key] = doc
+                else:
+                    pending[key] = doc
+
+        if pending or shadow:
+            graded = {**pending, **shadow}
+            scores = await self.retrieval_grader.abatch(
+                [{"input": question, "document": content} for question, content in graded],
+                config={"max_concurrency": self.max_concurrency}, return_exceptions=True)
+            for (key, doc), score in zip(graded.items(), scores):
+                grade = "no" if isinstance(score, Exception) else score.get("score", "no")
+                if key in shadow:
+                    if not isinstance(score, Exception):
+                        self.grading_cascade.record_llm_verdict(key[0], doc, grade, cascade_grade=grades[key])
+                    continue
+                grades[key] = grade
+                if self.grading_cascade is not None and not isinstance(score, Exception):
+                    self.grading_cascade.record_llm_verdict(key[0], doc, grade)
+
+        print(f"Batch grading: {len(grades)} pairs, {len(pending)} sent to the LLM grader")
+        return grades
@@ -0,0 +1,568 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Shared Cache Backend Module
+
+import asyncio
+import json
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_core.stores import BaseStore
+
+from models import create_embeddings
+
+_MISSING = object()
+
+SERIALIZERS = {
+    "pickle": (lambda value: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+    "json": (lambda value: json.dumps(value, ensure_ascii=False).encode("utf-8"), lambda data: json.loads(data)),
+    "raw": (bytes, bytes),
+}
+
+
+class CacheBackend:
+    """
+    Key-value cache shared by every cache in the project. Values are serialized to bytes, so one interface
+    covers an in-process LRU, a local SQLite file shared by the workers of one host and a Redis-protocol
+    server shared by several hosts. Keys live in a namespace; namespaced() returns a view with another one.
+
+    Subclasses implement _get, _set and _delete on serialized values. A backend that cannot be reached
+    behaves like an empty cache instead of failing the request. Backends doing disk or network IO are
+    marked blocking; async code uses aget, aset and adelete, which run them in a worker thread.
+    """
+
+    # pickle 能还原任意对象，只有本机可信的后端默认使用
+    default_serializer = "pickle"
+    allow_pickle = True
+    blocking = True
+
+    def __init__(self, namespace: str = "", serializer: Optional[str] = None, default_ttl: Optional[float] = None):
+        """
+        Args:
+            namespace (str): Prefix of every key, e.g. "youtube_search".
+            serializer (Optional[str]): "pickle", "json" or "raw" (values are already bytes). Defaults to
+                default_serializer of the backend.
+            default_ttl (Optional[float]): Expiry in seconds of entries set without an explicit TTL.
+        """
+        serializer = serializer or self.default_serializer
+        if serializer == "pickle" and not self.allow_pickle:
+            backend = getattr(self, "backend", self)
+            raise ValueError(f"{type(backend).__name__} only accepts pickled values when created with allow_pickle=True")
+        self.namespace = namespace
+        self.serializer = serializer
+        self.default_ttl = default_ttl
+        self._dumps, self._loads = SERIALIZERS[serializer]
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    def _get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _set(self, key: str, data: bytes, ttl: Optional[float]) -> None:
+        raise NotImplementedError
+
+    def _delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def get(self, key: str, default: Any = None) -> Any:
+        data = self._get(self._key(key))
+        if data is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self._loads(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = _MISSING) -> None:
+        """
+        Args:
+            key (str): Key inside the namespace.
+            value (Any): Serializable value.
+            ttl (Optional[float]): Expiry in seconds; None never expires. Defaults to default_ttl.
+        """
+        self._set(self._key(key), self._dumps(value), self.default_ttl if ttl is _MISSING else ttl)
+
+    def delete(self, key: str) -> None:
+        self._delete(self._key(key))
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """get() that does not block the event loop."""
+        if not self.blocking:
+            return self.get(key, default)
+        return await asyncio.to_thread(self.get, key, default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = _MISSING) -> None:
+        """set() that does not block the event loop."""
+        if not self.blocking:
+            return self.set(key, value, ttl)
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    async def adelete(self, key: str) -> None:
+        """delete() that does not block the event loop."""
+        if not self.blocking:
+            return self.delete(key)
+        await asyncio.to_thread(self.delete, key)
+
+    def namespaced(self, namespace: str, serializer: Optional[str] = None,
+                   default_ttl: Optional[float] = _MISSING) -> "CacheBackend":
+        """
+        Returns a view of the same storage with keys under another namespace.
+        """
+        return _NamespacedCache(self, self._key(namespace) if namespace else self.namespace,
+                                serializer or self.serializer,
+                                self.default_ttl if default_ttl is _MISSING else default_ttl)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        backend = getattr(self, "backend", self)
+        return {"backend": type(backend).__name__, "namespace": self.namespace, "hits": self.hits,
+                "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+
+class _NamespacedCache(CacheBackend):
+    """View of a backend under another namespace and serializer."""
+
+    def __init__(self, backend: CacheBackend, namespace: str, serializer: str, default_ttl: Optional[float]):
+        self.backend = backend
+        super().__init__(namespace, serializer, default_ttl)
+
+    @property
+    def allow_pickle(self) -> bool:
+        return self.backend.allow_pickle
+
+    @property
+    def blocking(self) -> bool:
+        return self.backend.blocking
+
+    def _get(self, key):
+        return self.backend._get(key)
+
+    def _set(self, key, data, ttl):
+        self.backend._set(key, data, ttl)
+
+    def _delete(self, key):
+        self.backend._delete(key)
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache. Private to one worker; the default when no shared backend is configured.
+    """
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 4096, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def _set(self, key, data, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl if ttl is not None else None, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCache(CacheBackend):
+    """
+    Cache in a local SQLite file in WAL mode, shared by all worker processes of one host and kept across restarts.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+        self._conn.commit()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared between threads, so each thread opens its own.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key):
+        try:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            self._delete(key)
+            return None
+        return row[0]
+
+    def _set(self, key, data, ttl):
+        try:
+            self._conn.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                               (key, data, time.time() + ttl if ttl is not None else None))
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Cache write failed: {e}")
+
+    def _delete(self, key):
+        try:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Cache delete failed: {e}")
+
+    def purge_expired(self) -> int:
+        """Deletes expired entries and returns how many were removed."""
+        cursor = self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                    (time.time(),))
+        self._conn.commit()
+        return cursor.rowcount
+
+
+def _encode_command(*args) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    return b"".join(parts)
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache on a Redis-protocol server, shared by every worker on every node. Speaks RESP2 directly over one
+    socket per thread, so no client library is needed; expiry is delegated to the server. After a failed
+    connection the server is not contacted again for retry_interval seconds.
+
+    Values are stored as JSON by default. Unpickling what a network server returns would let anyone who can
+    write to it run code in every worker, so pickle has to be enabled explicitly with allow_pickle.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 socket_timeout: float = 1.0, retry_interval: float = 5.0, allow_pickle: bool = False, **kwargs):
+        self.allow_pickle = allow_pickle
+        self.default_serializer = "pickle" if allow_pickle else "json"
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.socket_timeout = socket_timeout
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+        self._local.sock, self._local.reader = sock, sock.makefile("rb")
+        if self.password:
+            self._roundtrip("AUTH", self.password)
+        if self.db:
+            self._roundtrip("SELECT", self.db)
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix in (b"+", b":"):
+            return int(payload) if prefix == b":" else payload.decode()
+        if prefix == b"-":
+            raise RuntimeError(payload.decode())
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            count = int(payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"unexpected reply: {line!r}")
+
+    def _roundtrip(self, *args):
+        self._local.sock.sendall(_encode_command(*args))
+        return self._read_reply()
+
+    def execute(self, *args):
+        """
+        Sends one command, reconnecting once if the connection was dropped.
+        """
+        for attempt in range(2):
+            try:
+                if getattr(self._local, "sock", None) is None:
+                    if time.time() < self._down_until:
+                        raise ConnectionError(f"cache server {self.host}:{self.port} is unavailable")
+                    self._connect()
+                return self._roundtrip(*args)
+            except (OSError, ConnectionError):
+                self.close()
+                if attempt:
+                    self._down_until = time.time() + self.retry_interval
+                    raise
+
+    def close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = self._local.reader = None
+
+    def _get(self, key):
+        try:
+            return self.execute("GET", key)
+        except (OSError, ConnectionError, RuntimeError) as e:
+            print(f"Cache read failed: {e}")
+            return None
+
+    def _set(self, key, data, ttl):
+        args = ["SET", key, data]
+        if ttl is not None:
+            args += ["PX", max(1, int(ttl * 1000))]
+        try:
+            self.execute(*args)
+        except (OSError, ConnectionError, RuntimeError) as e:
+            print(f"Cache write failed: {e}")
+
+    def _delete(self, key):
+        try:
+            self.execute("DEL", key)
+        except (OSError, ConnectionError, RuntimeError) as e:
+            print(f"Cache delete failed: {e}")
+
+
+class CacheByteStore(BaseStore[str, bytes]):
+    """
+    LangChain byte store on top of a cache backend, for CacheBackedEmbeddings.
+    """
+
+    def __init__(self, cache: CacheBackend, ttl: Optional[float] = None):
+        self.cache = cache.namespaced("", serializer="raw")
+        self.ttl = ttl
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [self.cache.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, bytes]]) -> None:
+        for key, value in key_value_pairs:
+            self.cache.set(key, value, ttl=self.ttl)
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self.cache.delete(key)
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        raise NotImplementedError("cache backends do not support key listing")
+
+
+def cached_embeddings(embedding_model: Optional[Embeddings] = None, ttl: Optional[float] = None) -> Embeddings:
+    """
+    Wraps an embedding model so document embeddings are read from and written to the shared cache,
+    keyed by model name and text hash. Texts embedded by any worker are not paid for again.
+
+    Args:
+        embedding_model (Optional[Embeddings]): The model. Defaults to the pooled embedding client of models.
+        ttl (Optional[float]): Expiry of cached vectors in seconds; None keeps them until evicted.
+
+    Returns:
+        Embeddings: The caching embedding model.
+    """
+    embedding_model = embedding_model or create_embeddings()
+    model_name = getattr(embedding_model, "model", type(embedding_model).__name__)
+    return CacheBackedEmbeddings.from_bytes_store(embedding_model, CacheByteStore(get_cache("embeddings"), ttl),
+                                                  namespace=f"{model_name}:")
+
+
+def cache_from_url(url: str, **kwargs) -> CacheBackend:
+    """
+    Creates a cache backend from a URL:
+    memory://?max_entries=4096, sqlite:///path/to/cache.db, redis://[:password@]host:port/db[?allow_pickle=true].
+
+    Args:
+        url (str): The backend URL.
+        **kwargs: namespace, serializer and default_ttl.
+
+    Returns:
+        CacheBackend: The backend.
+    """
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    if parsed.scheme == "memory":
+        return MemoryCache(max_entries=int(query.get("max_entries", ["4096"])[0]), **kwargs)
+    if parsed.scheme == "sqlite":
+        return SqliteCache(parsed.path.lstrip("/") if parsed.netloc == "." else parsed.path, **kwargs)
+    if parsed.scheme == "redis":
+        return RedisCache(parsed.hostname or "localhost", parsed.port or 6379,
+                          db=int(parsed.path.lstrip("/") or 0), password=parsed.password,
+                          allow_pickle=query.get("allow_pickle", ["false"])[0].lower() == "true", **kwargs)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+
+def is_shared_url(url: Optional[str]) -> bool:
+    """Whether a CACHE_URL names a backend shared between processes (sqlite:// or redis://)."""
+    return urlparse(url or "memory://").scheme in ("sqlite", "redis")
+
+
+def get_cache(namespace: str = "", **kwargs) -> CacheBackend:
+    """
+    Process-wide cache configured by the CACHE_URL environment variable (default: in-process LRU),
+    viewed under a namespace.
+
+    Args:
+        namespace (str): Namespace of the caller, e.g. "youtube_search".
+        **kwargs: serializer and default_ttl of the view.
+
+    Returns:
+        CacheBackend: The namespaced cache.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = cache_from_url(os.getenv("CACHE_URL") or "memory://", namespace=os.getenv("CACHE_PREFIX", "agent"))
+    return _cache.namespaced(namespace, **kwargs) if namespace or kwargs else _cache
+
+
+class RespServer:
+    """
+    Minimal in-memory Redis-protocol server (GET, SET with EX/PX, DEL, EXISTS, EXPIRE, TTL, PING, SELECT,
+    AUTH, FLUSHDB, DBSIZE) standing in for Redis in tests and local multi-worker runs.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6390):
+        self.host = host
+        self.port = port
+        self._data = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def _alive(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def _execute(self, args: List[bytes]) -> bytes:
+        command = args[0].upper()
+        if command == b"PING":
+            return b"+PONG\r\n"
+        if command in (b"SELECT", b"AUTH", b"QUIT"):
+            return b"+OK\r\n"
+        if command == b"GET":
+            value = self._alive(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == b"SET":
+            expires_at, options = None, [arg.upper() for arg in args[3:]]
+            for i, option in enumerate(options[:-1]):
+                if option in (b"EX", b"PX"):
+                    expires_at = time.time() + int(args[4 + i]) / (1 if option == b"EX" else 1000)
+            self._data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if command in (b"DEL", b"EXISTS"):
+            keys = [key for key in args[1:] if self._alive(key) is not None]
+            if command == b"DEL":
+                for key in keys:
+                    del self._data[key]
+            return b":%d\r\n" % len(keys)
+        if command == b"EXPIRE":
+            value = self._alive(args[1])
+            if value is None:
+                return b":0\r\n"
+            self._data[args[1]] = (value, time.time() + int(args[2]))
+            return b":1\r\n"
+        if command == b"TTL":
+            if self._alive(args[1]) is None:
+                return b":-2\r\n"
+            expires_at = self._data[args[1]][1]
+            return b":%d\r\n" % (-1 if expires_at is None else int(expires_at - time.time()))
+        if command == b"FLUSHDB":
+            self._data.clear()
+            return b"+OK\r\n"
+        if command == b"DBSIZE":
+            return b":%d\r\n" % len(self._data)
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._execute(args))
+                await writer.drain()
+                if args[0].upper() == b"QUIT":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"RESP stand-in server listening on {self.host}:{self.port}")
+        await self._server.serve_forever()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local Redis-protocol stand-in server for the shared cache.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    asyncio.run(RespServer(args.host, args.port).serve_forever())
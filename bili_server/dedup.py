@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Near-Duplicate Detection Module
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+from langchain_core.documents import Document
+
+T = TypeVar("T")
+
+SIMHASH_BITS = 64
+# 64 位指纹切成 8 段，汉明距离 <= 7 的两个指纹至少有一段完全相同（抽屉原理）
+NUM_BANDS = 8
+BAND_BITS = SIMHASH_BITS // NUM_BANDS
+
+_NOISE_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+_URL_RE = re.compile(r"https?://\S+")
+_NUMBER_RE = re.compile(r"\d+")
+
+# Field labels of the video records built by the source pipelines (English for YouTube, Chinese for Bilibili)
+_RECORD_LABELS = {
+    "type", "author", "video url", "title", "description", "views", "likes", "comments", "published",
+    "类型", "作者", "分类", "视频链接", "标题", "描述", "播放量", "弹幕数", "收藏数", "标签", "评论数", "评论", "发布日期",
+}
+_CONTENT_LABELS = {"title", "description", "标题", "描述"}
+_PLACEHOLDERS = {"no description", "无描述", "无标题"}
+
+
+def _normalize(text: str) -> str:
+    return _NOISE_RE.sub("", text.lower())
+
+
+def _shingles(text: str, size: int = 3) -> List[str]:
+    if len(text) <= size:
+        return [text]
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash of a text over character 3-grams, so it works for Chinese without a segmenter.
+    Texts that differ only in punctuation, spacing or a few characters get fingerprints a few bits apart.
+
+    Args:
+        text (str): The text to fingerprint.
+
+    Returns:
+        int: The fingerprint.
+    """
+    weights = [0] * SIMHASH_BITS
+    for shingle in _shingles(_normalize(text)):
+        h = _hash64(shingle)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+
+def record_fields(content: str) -> Dict[str, str]:
+    """
+    Splits a formatted video record ("Label: value" lines) into its fields, keyed by lowercased label.
+    Lines without a known label continue the previous field, so multi-line descriptions stay whole.
+    """
+    fields: Dict[str, str] = {}
+    label = None
+    for line in content.splitlines():
+        head, sep, value = line.partition(":")
+        if sep and head.strip().lower() in _RECORD_LABELS:
+            label = head.strip().lower()
+            fields[label] = value.strip()
+        elif label is not None:
+            fields[label] += "\n" + line
+    return fields
+
+
+def content_text(content: str) -> str:
+    """
+    The part of a video record that identifies the video: title and description only, without the shared labels,
+    URLs, authors and stat lines that would otherwise dominate the fingerprint. Text that is not a record is
+    returned as is.
+    """
+    fields = record_fields(content)
+    if not any(label in fields for label in _CONTENT_LABELS):
+        return content
+    parts = [fields[label] for label in ("title", "标题", "description", "描述")
+             if fields.get(label) and fields[label].strip().lower() not in _PLACEHOLDERS]
+    return _URL_RE.sub(" ", "\n".join(parts))
+
+
+def title_numbers(content: str) -> Tuple[str, ...]:
+    """
+    Numbers in the title of a video record, such as part or episode numbers. Videos of a series differ only
+    there, so records whose titles carry different numbers are never treated as duplicates.
+    """
+    fields = record_fields(content)
+    title = fields.get("title") or fields.get("标题") or ""
+    return tuple(number.lstrip("0") or "0" for number in _NUMBER_RE.findall(title))
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def cluster(texts: Sequence[str], max_distance: int = 6) -> List[List[int]]:
+    """
+    Groups near-duplicate texts with SimHash and LSH banding.
+
+    Only texts sharing a band are compared, so the cost stays close to linear in the number of texts.
+
+    Args:
+        texts (Sequence[str]): The texts to cluster.
+        max_distance (int): Largest Hamming distance between fingerprints of near-duplicates (at most NUM_BANDS - 1).
+
+    Returns:
+        List[List[int]]: Clusters of indexes into texts, each in input order, ordered by first member.
+    """
+    fingerprints = [simhash(text) for text in texts]
+    # 指纹完全相同的文本（刷屏的 "666" 等）先直接归为一组，LSH 只在不同的指纹之间进行
+    by_fingerprint: Dict[int, List[int]] = defaultdict(list)
+    for i, fingerprint in enumerate(fingerprints):
+        by_fingerprint[fingerprint].append(i)
+    unique = list(by_fingerprint)
+    parent = list(range(len(unique)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    mask = (1 << BAND_BITS) - 1
+    for i, fingerprint in enumerate(unique):
+        for band in range(NUM_BANDS):
+            buckets[(band, (fingerprint >> (band * BAND_BITS)) & mask)].append(i)
+
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if find(i) != find(j) and hamming(unique[i], unique[j]) <= max_distance:
+                    parent[max(find(i), find(j))] = min(find(i), find(j))
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i, fingerprint in enumerate(unique):
+        clusters[find(i)].extend(by_fingerprint[fingerprint])
+    return sorted((sorted(members) for members in clusters.values()), key=lambda members: members[0])
+
+
+def collapse(items: Sequence[T], key: Callable[[T], str] = str, max_distance: int = 6,
+             partition: Optional[Callable[[T], Hashable]] = None) -> List[Tuple[T, int]]:
+    """
+    Keeps one representative per near-duplicate cluster together with the cluster size.
+
+    Args:
+        items (Sequence[T]): Items to collapse.
+        key (Callable[[T], str]): Text of an item that is fingerprinted.
+        max_distance (int): See cluster.
+        partition (Callable[[T], Hashable], optional): Items are only clustered with items of the same partition.
+
+    Returns:
+        List[Tuple[T, int]]: (first item of the cluster, cluster size), most repeated first.
+    """
+    partitions: Dict[Hashable, List[int]] = defaultdict(list)
+    for i, item in enumerate(items):
+        partitions[partition(item) if partition is not None else None].append(i)
+
+    groups = []
+    for indexes in partitions.values():
+        for members in cluster([key(items[i]) for i in indexes], max_distance):
+            groups.append([indexes[member] for member in members])
+    groups.sort(key=lambda members: members[0])
+    collapsed = [(items[members[0]], len(members)) for members in groups]
+    return sorted(collapsed, key=lambda pair: pair[1], reverse=True)
+
+
+def collapse_documents(docs: List[Document], max_distance: int = 3) -> List[Document]:
+    """
+    Collapses near-duplicate documents, such as reuploads with almost identical titles and descriptions,
+    before they are split, embedded and graded. The cluster size is kept in metadata["duplicates"] only; the text
+    is left unchanged, so a record whose copies come and go keeps its chunk IDs and is not re-embedded.
+
+    Only the title and description are fingerprinted (see content_text), and videos whose titles carry
+    different numbers, like the parts of a series, are kept apart.
+
+    Args:
+        docs (List[Document]): Documents from the source pipelines.
+        max_distance (int): See cluster.
+
+    Returns:
+        List[Document]: One document per cluster.
+    """
+    collapsed = []
+    for doc, count in collapse(docs, key=lambda doc: content_text(doc.page_content), max_distance=max_distance,
+                               partition=lambda doc: title_numbers(doc.page_content)):
+        if count > 1:
+            doc = Document(page_content=doc.page_content, metadata={**doc.metadata, "duplicates": count})
+        collapsed.append(doc)
+
+    if len(collapsed) < len(docs):
+        print(f"Collapsed {len(docs)} documents into {len(collapsed)} near-duplicate clusters")
+    return collapsed
+
+
+def collapse_texts(texts: List[str], max_distance: int = 6) -> List[str]:
+    """
+    Collapses repeated short texts such as comments, tagging repeated ones with their count, e.g. "666 (x42)".
+
+    Args:
+        texts (List[str]): The texts.
+        max_distance (int): See cluster.
+
+    Returns:
+        List[str]: One text per cluster, most repeated first.
+    """
+    return [text if count == 1 else f"{text} (x{count})" for text, count in collapse(texts, max_distance=max_distance)]
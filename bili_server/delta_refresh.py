@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Delta Refresh Module
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from bili_server.analytics import METRIC_COLUMNS, normalize_bilibili, normalize_youtube
+from bili_server.index_pool import IndexPool, document_ids, scored_documents
+from bilibili_tools import get_bilibi
+from bilibili_api import search
+from youtube_tools import get_youtube
+from youtube_tools.quota import Priority
+
+SOURCES = ("youtube", "bilibili")
+
+
+def _youtube_timestamp(published_at: str) -> float:
+    return datetime.datetime.fromisoformat(published_at.replace("Z", "+00:00")).timestamp()
+
+
+def _rfc3339(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _youtube_entry(video: dict) -> Tuple[str, float, str, dict]:
+    """(video ID, publish timestamp, text to embed, normalized record) of a YouTube video."""
+    description = video["description"][:200] if video["description"] else "No description"
+    text = (
+        f"Type: video\n"
+        f"Author: {video['channel']}\n"
+        f"Video URL: {video['url']}\n"
+        f"Title: {video['title']}\n"
+        f"Description: {description}\n"
+        f"Published: {video['published_at']}\n"
+    )
+    return video["video_id"], _youtube_timestamp(video["published_at"]), text, normalize_youtube(video)
+
+
+def _bilibili_entry(item: dict) -> Tuple[str, float, str, dict]:
+    """(video ID, publish timestamp, text to embed, normalized record) of a Bilibili search item."""
+    record = normalize_bilibili(item)
+    text = (
+        f"类型: {item.get('type', 'video')}\n"
+        f"作者: {record['author']}\n"
+        f"分类: {item.get('typename', '未知分类')}\n"
+        f"视频链接: {record['url']}\n"
+        f"标题: {record['title']}\n"
+        f"描述: {item.get('description', '无描述')}\n"
+        f"标签: {item.get('tag', '')}\n"
+        f"发布日期: {record['published_at']}\n"
+    )
+    return str(item.get("bvid") or item.get("aid")), float(item.get("pubdate", 0)), text, record
+
+
+class DeltaRefresher:
+    """
+    Keeps the index of tracked keywords current at a cost proportional to what changed. Each (source, keyword)
+    has a watermark holding the newest publish time seen and the known videos. A refresh only asks the sources
+    for videos published after the watermark, embeds just those, and writes the new statistics of known videos
+    into the stored documents' metadata instead of re-embedding them. Statistics are kept out of the embedded
+    text for that reason; the analytics node reads them through DocumentLoader.record_metrics.
+
+    The watermark only advances after a fetch that reached it. When more videos were published than max_pages
+    pages hold, it stays put, and the next refresh pages through the same window again: videos already known
+    are skipped and the older ones that did not fit are picked up.
+    """
+
+    def __init__(self, loader, state_path: str, max_pages: int = 3):
+        """
+        Args:
+            loader (DocumentLoader): Loader whose index pool holds the tracked shards and whose metrics cache is fed.
+            state_path (str): JSON file holding the watermarks.
+            max_pages (int): Maximum number of result pages fetched per source and refresh.
+        """
+        if loader.index_pool is None:
+            raise ValueError("Delta refresh needs an index pool, set INDEX_POOL_DIR")
+        self.loader = loader
+        self.index_pool: IndexPool = loader.index_pool
+        self.state_path = state_path
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self._watermarks: Dict[str, dict] = {}
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, encoding="utf-8") as f:
+                    self._watermarks = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Failed to load delta refresh watermarks: {e}")
+
+    @staticmethod
+    def namespace(keyword: str, source: str) -> str:
+        """Index pool shard of a tracked keyword."""
+        return f"tracked:{source}:{keyword}"
+
+    def _save(self) -> None:
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._watermarks, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def watermark(self, keyword: str, source: str) -> dict:
+        """
+        Returns the watermark of a tracked keyword, creating an empty one if needed.
+        """
+        with self._lock:
+            return self._watermarks.setdefault(f"{source}:{keyword}",
+                                               {"last_published": 0.0, "refreshed_at": None, "videos": {}})
+
+    async def _fetch(self, keyword: str, source: str, watermark: dict,
+                     priority: Priority) -> Tuple[List[tuple], Dict[str, dict], bool]:
+        """
+        Asks a source for the videos published after the watermark and the statistics of the known videos.
+
+        Returns:
+            Tuple[List[tuple], Dict[str, dict], bool]: Entries of the returned videos, refreshed records by video ID,
+                and whether every video published after the watermark was returned.
+        """
+        known = list(watermark["videos"])
+        since = watermark["last_published"]
+
+        if source == "youtube":
+            videos, complete = await get_youtube.search_videos_since(
+                keyword, _rfc3339(since) if since else None, max_pages=self.max_pages, priority=priority)
+            entries = [_youtube_entry(video) for video in videos]
+            statistics = await get_youtube.get_video_statistics(known, priority=priority) if known else {}
+            refreshed = {}
+            for video_id, stats in statistics.items():
+                record = dict(watermark["videos"][video_id]["record"])
+                record.update(views=stats.get("viewCount", 0), likes=stats.get("likeCount", 0),
+                              comments=stats.get("commentCount", 0))
+                refreshed[video_id] = record
+            return entries, refreshed, complete
+
+        if source == "bilibili":
+            items, complete = await get_bilibi.search_videos_since(keyword, since=since, max_pages=self.max_pages)
+            entries = [_bilibili_entry(item) for item in items]
+            # 一页综合排序结果即可刷新最受关注的已知视频的统计数据，无需逐个视频请求
+            refreshed = {}
+            if known:
+                result = await search.search_by_type(keyword, search_type=search.SearchObjectType.VIDEO)
+                for item in result.get("result") or []:
+                    video_id, _, _, record = _bilibili_entry(item)
+                    if video_id in watermark["videos"]:
+                        refreshed[video_id] = record
+            return entries, refreshed, complete
+
+        raise ValueError(f"Unknown source: {source}, expected one of {SOURCES}")
+
+    async def refresh(self, keyword: str, source: str = "youtube",
+                      priority: Priority = Priority.BACKGROUND) -> dict:
+        """
+        Brings the shard of a tracked keyword up to date.
+
+        Args:
+            keyword (str): The tracked keyword.
+            source (str): "youtube" or "bilibili".
+            priority (Priority): YouTube scheduling priority.
+
+        Returns:
+            dict: Refresh report: new videos (normalized records), videos whose statistics changed (with their
+                deltas), titles of videos whose text changed and had to be re-embedded, and the number of chunks
+                embedded.
+        """
+        watermark = self.watermark(keyword, source)
+        namespace = self.namespace(keyword, source)
+        entries, refreshed, complete = await self._fetch(keyword, source, watermark, priority)
+
+        new_videos, reembedded, docs = [], [], []
+        stale_ids: List[str] = []
+        # 新条目在向量写入成功后才并入水位，写入失败的视频下次刷新仍会被重新抓取和嵌入
+        embedded: Dict[str, dict] = {}
+        for video_id, published, text, record in entries:
+            known = watermark["videos"].get(video_id)
+            if known is not None:
+                refreshed.setdefault(video_id, record)
+                if known["text_hash"] == _text_hash(text):
+                    continue
+                # 标题或简介被修改，旧文本的向量作废
+                stale_ids.extend(known["doc_ids"])
+                reembedded.append(record["title"])
+            else:
+                new_videos.append(record)
+            metadata = {"keyword": keyword, "source": source, "video_id": video_id,
+                        **{column: record.get(column) for column in METRIC_COLUMNS}}
+            chunks = self.loader.split_documents([Document(page_content=text, metadata=metadata)])
+            docs.extend(chunks)
+            embedded[video_id] = {
+                "text_hash": _text_hash(text),
+                "doc_ids": document_ids(chunks),
+                "record": record,
+            }
+
+        if stale_ids:
+            live_ids = {doc_id for video in {**watermark["videos"], **embedded}.values()
+                        for doc_id in video["doc_ids"]}
+            self.index_pool.delete_documents(namespace, [doc_id for doc_id in stale_ids if doc_id not in live_ids])
+        added = self.index_pool.add_documents(namespace, docs) if docs else 0
+        watermark["videos"].update(embedded)
+
+        # 首次刷新只建立基线，不追溯更早的视频
+        if complete or not watermark["last_published"]:
+            watermark["last_published"] = max([watermark["last_published"]] +
+                                              [published for _, published, _, _ in entries])
+
+        updated, updates = [], {}
+        for video_id, record in refreshed.items():
+            known = watermark["videos"][video_id]
+            deltas = {column: _delta(known["record"].get(column), record.get(column)) for column in METRIC_COLUMNS}
+            deltas = {column: delta for column, delta in deltas.items() if delta}
+            known["record"] = record
+            if deltas:
+                updated.append({"title": record["title"], "url": record["url"], "deltas": deltas})
+                for doc_id in known["doc_ids"]:
+                    updates[doc_id] = {column: record.get(column) for column in METRIC_COLUMNS}
+        self.index_pool.update_metadata(namespace, updates)
+
+        watermark["refreshed_at"] = time.time()
+        with self._lock:
+            self._save()
+        self.loader.record_metrics(keyword, [video["record"] for video in watermark["videos"].values()])
+
+        report = {
+            "keyword": keyword,
+            "source": source,
+            "new": new_videos,
+            "updated": updated,
+            "reembedded": reembedded,
+            "chunks_embedded": added,
+            "known_videos": len(watermark["videos"]),
+            "complete": complete,
+            "last_published": _rfc3339(watermark["last_published"]) if watermark["last_published"] else None,
+        }
+        print(f"Delta refresh of {source}:{keyword}: {len(new_videos)} new, {len(updated)} updated, "
+              f"{len(reembedded)} re-embedded, {added} chunks embedded"
+              f"{'' if complete else ', more new videos remain, watermark kept'}")
+        return report
+
+    def search(self, keyword: str, query: str, k: int = 10) -> List[Document]:
+        """
+        Searches the tracked shards of a keyword across all sources.
+
+        Args:
+            keyword (str): The tracked keyword.
+            query (str): The query text.
+            k (int): Number of documents to return.
+
+        Returns:
+            List[Document]: The closest documents, with their current statistics in metadata.
+        """
+        namespaces = [self.namespace(keyword, source) for source in SOURCES]
+        return scored_documents(self.index_pool.search(query, namespaces, k=k))
+
+
+def _text_hash(text: str) -> str:
+    """Fingerprint of the indexed text of a video, to notice edited titles and descriptions."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _delta(old, new) -> Optional[float]:
+    """Numeric change of a metric, or None when it did not change or is not numeric."""
+    try:
+        change = float(new) - float(old)
+    except (TypeError, ValueError):
+        return None
+    return change or None
+
+
+if __name__ == '__main__':
+    import argparse
+    import asyncio
+
+    from dotenv import load_dotenv, find_dotenv
+
+    from bili_server.document_loader import DocumentLoader
+
+    load_dotenv(find_dotenv())
+
+    parser = argparse.ArgumentParser(description="Incrementally refresh the index of tracked keywords.")
+    parser.add_argument("keywords", nargs="+")
+    parser.add_argument("--source", choices=SOURCES, default="youtube")
+    args = parser.parse_args()
+
+    async def main():
+        pool = IndexPool(os.getenv("INDEX_POOL_DIR") or "index_pool",
+                         memory_budget_mb=float(os.getenv("INDEX_POOL_BUDGET_MB", "512")))
+        refresher = DeltaRefresher(DocumentLoader(index_pool=pool),
+                                   os.getenv("DELTA_STATE_PATH", ".delta_watermarks.json"))
+        for keyword in args.keywords:
+            print(json.dumps(await refresher.refresh(keyword, args.source), ensure_ascii=False, indent=2))
+        pool.flush()
+
+    asyncio.run(main())
@@ -2,12 +2,25 @@
 # -*- coding: utf-8 -*-
 # YouTube Agent Document Loader Module
 
+import asyncio
+import re
+import time
+from collections import OrderedDict
 from langchain_core.documents import Document
-from youtube_tools import get_youtube
-from typing import List, Optional
-from langchain_openai import OpenAIEmbeddings
+from bilibili_tools import get_bilibi
+from typing import Dict, List, Optional, Tuple
 from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from bili_server import ann_index
+from bili_server.cache import CacheBackend, cached_embeddings, get_cache
+from bili_server.dedup import collapse_documents, collapse_texts
+from bili_server.index_pool import IndexPool, scored_documents, source_id
+from bili_server.sources import SourceProvider, YouTubeProvider
+
+
+def _report_comment_failure(task: asyncio.Future) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Comment harvesting failed: {task.exception()}")
 
 
 class DocumentLoader:
@@ -15,71 +28,355 @@ class DocumentLoader:
     This class uses the get_docs function to take a Keyword as input, and outputs a list of documents (including metadata).
     """
 
-    async def get_docs(self, keywords: List[str], page: int) -> List[Document]:
+    def __init__(self, index_pool: Optional[IndexPool] = None, metrics_cache: Optional[CacheBackend] = None,
+                 sources: Optional[List[SourceProvider]] = None, warm_max_age: float = 1800,
+                 comment_videos: int = 5, comment_pages: int = 1, comment_timeout: float = 5.0):
+        """
+        Args:
+            index_pool (Optional[IndexPool]): Long-lived pool of per-keyword shards. When set, retrieved documents are
+                kept in the shard of their keyword instead of a throwaway vector store.
+            metrics_cache (Optional[CacheBackend]): Where the video metrics of each keyword are kept. Defaults to the
+                shared cache, so the analytics node sees metrics fetched by any worker.
+            sources (Optional[List[SourceProvider]]): Platforms searched concurrently for every request. Defaults to
+                YouTube only.
+            warm_max_age (float): Seconds a pre-warmed index shard is served without asking the sources again.
+            comment_videos (int): Top Bilibili videos per keyword whose comments are indexed for a question. 0 disables it.
+            comment_pages (int): Comment pages fetched per video.
+            comment_timeout (float): Seconds a question waits for comments before the index is searched.
+        """
+        self.index_pool = index_pool
+        self.sources = sources or [YouTubeProvider()]
+        # 每个来源最近一次请求的耗时与状态
+        self.source_stats: Dict[str, dict] = {}
+        # 预热过的索引分片及其预热时间，新鲜的分片直接检索，不再实时请求来源
+        self.warm_max_age = warm_max_age
+        self.warmed_at: Dict[str, float] = {}
+        # 每个关键词最近一次检索到的结构化视频指标，供本地分析节点使用
+        self.video_metrics = metrics_cache or get_cache("video_metrics", default_ttl=24 * 3600)
+        self.comment_videos = comment_videos
+        self.comment_pages = comment_pages
+        self.comment_timeout = comment_timeout
+        # 超时后仍在后台写入索引的评论抓取任务，保留引用以免被回收
+        self._comment_tasks = set()
+
+    async def get_docs(self, keywords: List[str], page: int,
+                       sources: Optional[List[SourceProvider]] = None) -> List[Document]:
         """
-        Asynchronously retrieves documents based on specific keywords from the YouTube API.
-        This function utilizes a pipeline to fetch and format video data, returning it as Document objects.
+        Asynchronously retrieves documents based on specific keywords from every configured source.
+        The sources are queried concurrently, each under its own timeout; a source that is slow or fails is
+        dropped from this request instead of stalling it.
 
         Args:
-        keywords (List[str]): A list of keywords used to query the YouTube API.
+        keywords (List[str]): A list of keywords used to query the sources.
         page (int): The page number in the API request, used for pagination.
+        sources (Optional[List[SourceProvider]]): Sources to query instead of the configured ones.
 
         Returns:
             List[Document]: A list of Document objects containing the retrieved content.
         """
+        docs, _ = await self._fetch_documents(keywords, page, sources)
+        return docs
 
-        raw_docs = await get_youtube.youtube_detail_pipeline(keywords=keywords, page=page)
+    async def _fetch_documents(self, keywords: List[str], page: int,
+                               sources: Optional[List[SourceProvider]] = None) -> Tuple[List[Document], Dict[str, List[int]]]:
+        """
+        Does the work of get_docs and also returns the Bilibili aids found for each keyword, for comment harvesting.
+        """
+        per_source = await asyncio.gather(*(self._fetch_source(source, keywords, page)
+                                            for source in sources or self.sources))
+        raw_docs = [result for results in per_source for result in results]
 
-        docs = [Document(page_content=doc["real_data"]) for doc in raw_docs]
+        # One document per video, so reuploads can be collapsed before embedding
+        docs, seen = [], set()
+        for doc in raw_docs:
+            # The same video is often found by several keywords of a decomposed question; keep the first copy
+            items = [item for item in doc["items"] if item not in seen]
+            seen.update(items)
+            docs.extend(Document(page_content=item, metadata={"keyword": doc["keyword"], "source": doc["source"]})
+                        for item in items)
+        docs = collapse_documents(docs)
 
-        return docs
+        metrics: Dict[str, List[dict]] = OrderedDict()
+        for doc in raw_docs:
+            metrics.setdefault(doc["keyword"], []).extend(doc["videos"])
+        for keyword, videos in metrics.items():
+            await self.video_metrics.aset(keyword, videos)
+
+        oids: Dict[str, List[int]] = OrderedDict()
+        for doc in raw_docs:
+            if doc.get("oids"):
+                oids.setdefault(doc["keyword"], []).extend(doc["oids"])
 
-    async def create_vector_store(self, docs, store_path: Optional[str] = None) -> 'FAISS':
+        return docs, oids
+
+    async def _fetch_source(self, source: SourceProvider, keywords: List[str], page: int) -> List[dict]:
+        """
+        Fetches one source under its timeout, returning nothing when it times out or fails.
+        """
+        start = time.perf_counter()
+        try:
+            results = await asyncio.wait_for(source.fetch(keywords, page), timeout=source.timeout)
+            status = "ok"
+        except asyncio.TimeoutError:
+            print(f"Source {source.name} timed out after {source.timeout}s, dropped from this request")
+            results, status = [], "timeout"
+        except Exception as e:
+            print(f"Source {source.name} failed, dropped from this request: {e}")
+            results, status = [], "error"
+        self.source_stats[source.name] = {"status": status, "seconds": round(time.perf_counter() - start, 3),
+                                          "videos": sum(len(result["videos"]) for result in results)}
+        return results
+
+    def record_metrics(self, keyword: str, videos: List[dict]) -> None:
+        """
+        Remembers the structured metrics of the videos retrieved for a keyword.
+
+        Args:
+            keyword (str): The search keyword.
+            videos (List[dict]): Video records in the common metrics schema of bili_server.analytics.
+        """
+        self.video_metrics.set(keyword, videos)
+
+    def get_metrics(self, keywords: List[str]) -> List[dict]:
+        """
+        Returns the structured metrics recorded for the given keywords.
+
+        Args:
+            keywords (List[str]): Search keywords.
+
+        Returns:
+            List[dict]: Video records in the common metrics schema.
+        """
+        return [video for keyword in keywords for video in self.video_metrics.get(keyword, [])]
+
+    def split_documents(self, docs: List[Document]) -> List[Document]:
+        """
+        Splits documents into overlapping chunks ready to be embedded. Every chunk carries metadata["video_id"]
+        of its document, so the index pool can replace all chunks of a video when it changes.
+
+        Args:
+            docs (List[Document]): A list of Document objects.
+
+        Returns:
+            List[Document]: The chunked documents.
+        """
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=300)
+        docs = [Document(page_content=doc.page_content, metadata={"video_id": source_id(doc), **doc.metadata})
+                for doc in docs]
+        return text_splitter.split_documents(docs)
+
+    async def create_vector_store(self, docs, store_path: Optional[str] = None,
+                                  index_type: Optional[str] = None) -> 'FAISS':
         """
         Creates a FAISS vector store from a list of documents.
 
         Args:
             docs (List[Document]): A list of Document objects containing the content to be stored.
             store_path (Optional[str]): The path to store the vector store locally. If None, the vector store will not be stored.
+            index_type (Optional[str]): FAISS index type, see bili_server.ann_index. Defaults to FAISS_INDEX_TYPE.
 
         Returns:
             FAISS: The FAISS vector store containing the documents.
         """
         # 执行文本切分，并使用OpenAI Embedding模型生成向量表示
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=300)
-        texts = text_splitter.split_documents(docs)
-        embedding_model = OpenAIEmbeddings()
-        store = FAISS.from_documents(texts, embedding_model)
+        texts = self.split_documents(docs)
+        embedding_model = cached_embeddings()
+        store = ann_index.from_documents(texts, embedding_model, index_type)
 
         if store_path:
             store.save_local(store_path)
         return store
 
-    async def get_retriever(self, keywords: List[str], page: int):
+    async def build_vector_store(self, keywords: List[str], page: int, index_type: Optional[str] = None) -> 'FAISS':
+        """
+        Fetches documents for the keywords and returns the vector store built from them.
+
+        Args:
+            keywords (List[str]): Keywords to search documents.
+            page (int): Page number for pagination of results.
+            index_type (Optional[str]): FAISS index type, see bili_server.ann_index.
+
+        Returns:
+            FAISS: The vector store.
+        """
+        docs = await self.get_docs(keywords, page)
+        return await self.create_vector_store(docs, index_type=index_type)
+
+    async def get_retriever(self, keywords: List[str], page: int, query: Optional[str] = None):
         """
         Retrieves documents and returns a retriever based on the documents.
 
         Args:
             keywords (List[str]): Keywords to search documents.
             page (int): Page number for pagination of results.
+            query (Optional[str]): Text the merged index is searched with, typically the full question.
+                Defaults to the keywords.
 
         Returns:
             Retriever instance or FAISS vector store.
         """
-        print(f"Starting real-time query to YouTube API for data retrieval")
-        docs = await self.get_docs(keywords, page)
-        print(f"Received YouTube data: {docs}")
+        if self.index_pool is not None:
+            # Keywords whose shards were pre-warmed recently, and trending topics the question mentions, are served
+            # from the index; the remaining keywords are always fetched in real time
+            cold = [keyword for keyword in keywords if not self.is_warm(keyword)]
+            mentioned = self.warm_namespaces(query or "")
+            warm = list(dict.fromkeys([keyword for keyword in keywords if keyword not in cold] + mentioned))
+            if not cold:
+                print(f"Serving from warm index shards: {warm}")
+                return self.search_pool(keywords, [], query=query, extra_namespaces=warm)
+            keywords_to_fetch = cold
+        else:
+            warm, keywords_to_fetch = [], keywords
+
+        print(f"Starting real-time query to {', '.join(source.name for source in self.sources)} for data retrieval")
+        docs, oids = await self._fetch_documents(keywords_to_fetch, page)
+        print(f"Received source data: {docs}")
         print("-------------------------")
         print(f"Starting vector database storage")
+        if self.index_pool is not None:
+            await self.enrich_with_comments(oids)
+            return self.search_pool(keywords, docs, query=query, extra_namespaces=warm)
+        if not docs:
+            # FAISS 无法从空文档列表建库
+            print(f"No documents retrieved for keywords: {keywords}")
+            return []
         vector_store = await self.create_vector_store(docs)
+        await self.enrich_with_comments(oids, store=vector_store)
         print(f"Successfully completed vector database storage")
         print("-------------------------")
         print(f"Starting text retrieval")
-        retriever = vector_store.as_retriever(search_kwargs={"k": 10})
-        retriever_result = retriever.invoke(str(keywords))
+        hits = vector_store.similarity_search_with_score(query or str(keywords), k=10)
+        retriever_result = scored_documents(hits)
         print(f"Retrieved data: {retriever_result}")
         return retriever_result
 
+    def search_pool(self, keywords: List[str], docs: List[Document], k: int = 10,
+                    query: Optional[str] = None, extra_namespaces: List[str] = ()) -> List[Document]:
+        """
+        Stores documents in the index pool shard of their keyword and searches all keyword shards at once.
+
+        Args:
+            keywords (List[str]): Keywords used as shard namespaces.
+            docs (List[Document]): Documents retrieved for those keywords.
+            k (int): Number of documents to return.
+            query (Optional[str]): Text the shards are searched with. Defaults to the keywords.
+            extra_namespaces (List[str]): Further shards to search, e.g. pre-warmed trending shards.
+
+        Returns:
+            List[Document]: The closest documents across the keyword shards.
+        """
+        namespaces = self.index_documents(keywords, docs)
+        print("-------------------------")
+        print(f"Starting text retrieval")
+        namespaces = list(dict.fromkeys([*namespaces, *keywords, *extra_namespaces]))
+        hits = self.index_pool.search(query or str(keywords), namespaces, k=k)
+        retriever_result = scored_documents(hits)
+        print(f"Retrieved data: {retriever_result}")
+        return retriever_result
+
+    def index_documents(self, keywords: List[str], docs: List[Document]) -> List[str]:
+        """
+        Adds documents to the index pool shards of their keyword (metadata["keyword"]), or of the keywords
+        when a document carries none.
+
+        Args:
+            keywords (List[str]): Keywords the documents were fetched for.
+            docs (List[Document]): The documents.
+
+        Returns:
+            List[str]: The shards written to.
+        """
+        fallback = keywords[0] if len(keywords) == 1 else " | ".join(keywords)
+        by_namespace = OrderedDict()
+        for text in self.split_documents(docs):
+            by_namespace.setdefault(text.metadata.get("keyword", fallback), []).append(text)
+        for namespace, texts in by_namespace.items():
+            added = self.index_pool.add_documents(namespace, texts)
+            print(f"Successfully added {added} new chunks to index shard: {namespace}")
+        return list(by_namespace)
+
+    def mark_warm(self, namespace: str, warmed_at: Optional[float] = None) -> None:
+        """Records that the shard of a namespace has just been refreshed in the background."""
+        self.warmed_at[namespace] = time.time() if warmed_at is None else warmed_at
+
+    def is_warm(self, namespace: str) -> bool:
+        """Whether the shard of a namespace was pre-warmed within warm_max_age."""
+        warmed_at = self.warmed_at.get(namespace)
+        return warmed_at is not None and time.time() - warmed_at <= self.warm_max_age
+
+    def warm_namespaces(self, text: str) -> List[str]:
+        """
+        Fresh pre-warmed namespaces mentioned in a text, e.g. trending keywords appearing in the question.
+        A keyword only matches as a whole token: "AI" matches "new AI tools" but not "explain". Chinese text has
+        no word boundaries, so only adjacent Latin letters and digits prevent a match.
+        """
+        text = text.lower()
+        return [namespace for namespace in self.warmed_at
+                if self.is_warm(namespace) and re.search(rf"(?<![0-9a-z_]){re.escape(namespace.lower())}(?![0-9a-z_])",
+                                                         text)]
+
+    async def enrich_with_comments(self, oids: Dict[str, List[int]], store: Optional[FAISS] = None) -> None:
+        """
+        Indexes the comments of the top Bilibili videos of each keyword, so opinion questions can be answered from
+        what viewers said. Waits at most comment_timeout seconds; with an index pool the harvest then keeps
+        streaming into the keyword shards in the background, otherwise it is cancelled.
+
+        Args:
+            oids (Dict[str, List[int]]): Bilibili video aids by keyword, best ranked first.
+            store (Optional[FAISS]): Throwaway vector store of this request when no index pool is configured.
+        """
+        jobs = {keyword: keyword_oids[:self.comment_videos] for keyword, keyword_oids in oids.items()}
+        jobs = {keyword: keyword_oids for keyword, keyword_oids in jobs.items() if keyword_oids}
+        if not jobs:
+            return
+
+        async def harvest():
+            await asyncio.gather(*(self.index_comments(keyword_oids, keyword, pages=self.comment_pages, store=store)
+                                   for keyword, keyword_oids in jobs.items()))
+
+        task = asyncio.ensure_future(harvest())
+        task.add_done_callback(_report_comment_failure)
+        done, _ = await asyncio.wait({task}, timeout=self.comment_timeout)
+        if done:
+            return
+        if self.index_pool is None:
+            task.cancel()
+        else:
+            print(f"Comments still arriving after {self.comment_timeout}s, indexing the rest in the background")
+            self._comment_tasks.add(task)
+            task.add_done_callback(self._comment_tasks.discard)
+
+    async def index_comments(self, oids: List[int], namespace: str, pages: int = 3,
+                             store: Optional[FAISS] = None) -> int:
+        """
+        Harvests Bilibili comments for many videos concurrently and indexes each video's comments as soon as
+        they arrive, instead of waiting for the slowest video.
+
+        Args:
+            oids (List[int]): Bilibili video aids.
+            namespace (str): Index pool shard the comments are added to.
+            pages (int): Maximum number of comment pages fetched per video.
+            store (Optional[FAISS]): Vector store to add to when no index pool is configured.
+
+        Returns:
+            int: Number of comment chunks indexed.
+        """
+        indexed = 0
+        async for oid, comments in get_bilibi.harvest_comments(oids, pages=pages):
+            if not comments:
+                continue
+            doc = Document(page_content="评论:\n" + "\n".join(collapse_texts(comments)),
+                           metadata={"source": "bilibili_comments", "oid": oid})
+            texts = self.split_documents([doc])
+            # 索引池加锁，可在线程中向量化而不阻塞事件循环；一次性的请求向量库在超时后即被检索，仍同步写入
+            if self.index_pool is not None:
+                indexed += await asyncio.to_thread(self.index_pool.add_documents, namespace, texts)
+            elif store is not None:
+                store.add_documents(texts)
+                indexed += len(texts)
+            print(f"Indexed {len(comments)} comments of video av{oid}")
+        return indexed
+
 
 if __name__ == '__main__':
     import asyncio
@@ -31,18 +31,22 @@ def create_generate_chain(llm):
     If you cannot find an answer, please respond honestly that you do not know. Do not attempt to fabricate an answer.  
     If the question is unrelated to the context, politely respond that you can only answer questions related to the context provided.
     
-    For questions involving data analysis, please write the code in Python and provide a detailed analysis of the results to offer as comprehensive an answer as possible.
+    For questions involving data analysis, use the metric tables enclosed by <analytics></analytics> tags. They were computed exactly from the retrieved videos, so quote and compare those numbers instead of recomputing them, and provide a detailed analysis of the results to offer as comprehensive an answer as possible.
     
     <context>
     {context}
     </context>
     
+    <analytics>
+    {analytics}
+    </analytics>
+    
     <question>
     {input}
     </question>
     """
 
-    generate_prompt = PromptTemplate(template=generate_template, input_variables=["context", "input"])
+    generate_prompt = PromptTemplate(template=generate_template, input_variables=["context", "input", "analytics"])
 
     # 没有StrOutputParser() 输出可能如下所示：
     # {
@@ -74,6 +78,7 @@ if __name__ == '__main__':
     generate_chain = create_generate_chain(llm)
     final_answer = generate_chain.invoke({
         "context": "这是我查询到的热门视频的描述：ChatGLM3-6B的安装部署、微调、训练智能客服。文档、数据集、微调脚本获取方式：麻烦一键三连，评论后，我会找到评论私发源码，谢谢大家。",
-        "input": "请帮我梳理一下热门视频的描述信息"
+        "input": "请帮我梳理一下热门视频的描述信息",
+        "analytics": "No metrics available."
     })
     print(final_answer)
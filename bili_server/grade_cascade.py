@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Grading Cascade Module
+
+import json
+import random
+import re
+import threading
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]+")
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "for", "and", "or", "is", "are", "be", "me", "my", "i", "you",
+    "what", "which", "how", "about", "please", "with", "that", "this", "find", "give", "video", "videos",
+    "请", "帮我", "一下", "视频", "什么", "哪些", "怎么", "如何", "我想",
+}
+
+
+def _terms(text: str) -> set:
+    """Latin words and CJK bigrams of a text, without stopwords."""
+    text = text.lower()
+    terms = {word for word in _WORD_RE.findall(text) if word not in _STOPWORDS and len(word) > 1}
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            continue
+        terms.update(bigram for bigram in (run[i:i + 2] for i in range(len(run) - 1)) if bigram not in _STOPWORDS)
+    return terms
+
+
+def lexical_overlap(question: str, text: str) -> float:
+    """
+    Share of the question's terms that appear in the document.
+
+    Args:
+        question (str): The user question.
+        text (str): The document text.
+
+    Returns:
+        float: Overlap in [0, 1]; 0 when the question has no usable terms.
+    """
+    question_terms = _terms(question)
+    if not question_terms:
+        return 0.0
+    return len(question_terms & _terms(text)) / len(question_terms)
+
+
+class GradingCascade:
+    """
+    Cheap-first relevance grading in front of the LLM retrieval grader. Documents whose retrieval similarity
+    or keyword overlap is high enough are accepted, documents whose similarity is low enough are rejected,
+    and only the ambiguous middle band is sent to the LLM. Every LLM verdict can be logged together with
+    the cheap signals so the thresholds can be recalibrated with calibrate(). While logging, a random sample
+    of the documents the cascade decides alone is graded by the LLM as well (shadow grading), so calibration
+    also sees how often the cascade's own accepts and rejects are wrong.
+    """
+
+    def __init__(self, accept_similarity: float = 0.85, reject_similarity: float = 0.5,
+                 accept_lexical: float = 0.75, log_path: Optional[str] = None, shadow_rate: float = 0.05):
+        """
+        Args:
+            accept_similarity (float): Relevance score at or above which a document is accepted.
+            reject_similarity (float): Relevance score below which a document is rejected.
+            accept_lexical (float): Question term overlap at or above which a document is accepted.
+            log_path (Optional[str]): JSONL file the LLM verdicts are appended to, for calibration.
+            shadow_rate (float): Share of the cascade's own accepts and rejects also graded by the LLM and logged.
+                Only applies when log_path is set; the cascade's verdict is kept either way.
+        """
+        self.accept_similarity = accept_similarity
+        self.reject_similarity = reject_similarity
+        self.accept_lexical = accept_lexical
+        self.log_path = log_path
+        self.shadow_rate = shadow_rate
+        self.accepted = 0
+        self.rejected = 0
+        self.llm_calls = 0
+        self.shadow_calls = 0
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def signals(self, question: str, doc: Document) -> Tuple[Optional[float], float]:
+        """Retrieval relevance score (if the retriever provided one) and lexical overlap of a document."""
+        return doc.metadata.get("relevance_score"), lexical_overlap(question, doc.page_content)
+
+    def decide(self, question: str, doc: Document) -> Optional[str]:
+        """
+        Grades a document from cheap signals only.
+
+        Args:
+            question (str): The user question.
+            doc (Document): The retrieved document.
+
+        Returns:
+            Optional[str]: "yes" or "no" when the outcome is predictable, None when the LLM must decide.
+        """
+        similarity, overlap = self.signals(question, doc)
+        if (similarity is not None and similarity >= self.accept_similarity) or overlap >= self.accept_lexical:
+            with self._lock:
+                self.accepted += 1
+            return "yes"
+        # 关键词完全不重叠并不能说明无关（同义改写），只用向量相似度做拒绝
+        if similarity is not None and similarity < self.reject_similarity:
+            with self._lock:
+                self.rejected += 1
+            return "no"
+        return None
+
+    def should_shadow(self) -> bool:
+        """Whether a document the cascade just decided alone should also be graded by the LLM for the log."""
+        return bool(self.log_path) and self.shadow_rate > 0 and self._random.random() < self.shadow_rate
+
+    def record_llm_verdict(self, question: str, doc: Document, grade: str, cascade_grade: Optional[str] = None) -> None:
+        """
+        Counts an LLM grader call and logs its verdict with the cheap signals.
+
+        Args:
+            question (str): The user question.
+            doc (Document): The graded document.
+            grade (str): The LLM verdict.
+            cascade_grade (Optional[str]): The cascade's own verdict when this was a shadow grading. Shadow rows
+                are logged with weight 1 / shadow_rate, as only that share of the cascade's decisions is sampled.
+        """
+        with self._lock:
+            if cascade_grade is None:
+                self.llm_calls += 1
+            else:
+                self.shadow_calls += 1
+            if not self.log_path:
+                return
+            similarity, overlap = self.signals(question, doc)
+            row = {"similarity": similarity, "lexical": overlap, "grade": grade}
+            if cascade_grade is not None:
+                row.update(cascade=cascade_grade, weight=1 / self.shadow_rate)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row) + "\n")
+
+    @property
+    def avoided_llm_calls(self) -> int:
+        return self.accepted + self.rejected
+
+    def stats(self) -> dict:
+        total = self.avoided_llm_calls + self.llm_calls
+        return {
+            "accepted_without_llm": self.accepted,
+            "rejected_without_llm": self.rejected,
+            "llm_calls": self.llm_calls,
+            "shadow_llm_calls": self.shadow_calls,
+            "avoided_ratio": round(self.avoided_llm_calls / total, 3) if total else 0.0,
+        }
+
+
+def _threshold_from_above(records: List[Tuple[float, bool, float]], precision: float) -> Optional[float]:
+    """Lowest score such that at least `precision` of the (weighted) records at or above it are relevant."""
+    records = sorted(records, key=lambda record: record[0], reverse=True)
+    best, relevant, total = None, 0.0, 0.0
+    for score, is_relevant, weight in records:
+        relevant += weight * is_relevant
+        total += weight
+        if relevant / total >= precision:
+            best = score
+    return best
+
+
+def _threshold_from_below(records: List[Tuple[float, bool, float]], precision: float) -> Optional[float]:
+    """Highest score such that at least `precision` of the (weighted) records below it are irrelevant."""
+    records = sorted(records, key=lambda record: record[0])
+    best, irrelevant, total = None, 0.0, 0.0
+    for count, (score, is_relevant, weight) in enumerate(records, start=1):
+        irrelevant += weight * (not is_relevant)
+        total += weight
+        if irrelevant / total >= precision and count < len(records):
+            best = records[count][0]
+    return best
+
+
+def calibrate(log_path: str, precision: float = 0.95) -> dict:
+    """
+    Derives cascade thresholds from logged LLM grader decisions: the ambiguous-band verdicts together with the
+    shadow gradings of the cascade's own accepts and rejects, each shadow row weighted by its sampling rate.
+
+    Args:
+        log_path (str): JSONL file written by GradingCascade.record_llm_verdict.
+        precision (float): Required agreement with the LLM on the documents the cascade decides alone.
+
+    Returns:
+        dict: Keyword arguments for GradingCascade; thresholds that cannot be calibrated are omitted.
+    """
+    with open(log_path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    similarity = [(row["similarity"], row["grade"] == "yes", row.get("weight", 1.0))
+                  for row in rows if row["similarity"] is not None]
+    lexical = [(row["lexical"], row["grade"] == "yes", row.get("weight", 1.0)) for row in rows]
+
+    thresholds = {
+        "accept_similarity": _threshold_from_above(similarity, precision),
+        "reject_similarity": _threshold_from_below(similarity, precision),
+        "accept_lexical": _threshold_from_above(lexical, precision),
+    }
+    return {name: round(value, 4) for name, value in thresholds.items() if value is not None}
+
+
+if __name__ == '__main__':
+    import sys
+
+    print(calibrate(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 0.95))
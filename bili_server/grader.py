@@ -102,6 +102,29 @@ class GraderUtils:
 
         return code_evaluator
 
+    def create_keyword_extractor(self):
+        """
+        Creates a keyword extractor that decomposes a user question into a few short search keywords.
+
+        Returns:
+            A callable function that takes a question and a maximum keyword count as input and returns a JSON object with a list of keywords.
+        """
+        keyword_prompt = PromptTemplate(
+            template="""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+            You are a search planner for a video search engine. Video search works poorly with long sentences, so split the user question into at most {max_keywords} short search keywords of two to four words each, one per distinct topic the question asks about. Keep product names and versions exactly as written and keep the language of the question.
+            Provide the keywords as a JSON with a single key 'keywords' holding a list of strings and no preamble or explanation.
+            <|eot_id|>
+            <|start_header_id|>user<|end_header_id|>
+            Here is the user question: {input}
+            <|eot_id|>
+            <|start_header_id|>assistant<|end_header_id|>""",
+            input_variables=["input", "max_keywords"],
+        )
+
+        keyword_extractor = keyword_prompt | self.model | JsonOutputParser()
+
+        return keyword_extractor
+
     def create_question_rewriter(self):
         """
         Creates a question rewriter chain that rewrites a given question to improve its clarity and relevance.
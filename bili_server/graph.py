@@ -9,8 +9,14 @@ class GraphState(TypedDict):
         question: question
         generation: LLM generation
         documents: list of documents
+        keywords: search keywords the question was decomposed into
+        analytics: metric tables computed locally from the retrieved videos
+        session_id: optional conversation ID whose retrieval memory is reused across turns
     """
 
     input: str
     generation: str
-    documents: str
\ No newline at end of file
+    documents: str
+    keywords: list
+    analytics: str
+    session_id: str
\ No newline at end of file
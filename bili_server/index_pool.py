@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Index Pool Module
+
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+from bili_server import ann_index
+from bili_server.cache import cached_embeddings
+from bili_server.dedup import record_fields
+from bili_server.vector_store import INDEX_FILE, SqliteDocstore, get_local_store, save_mmap_store
+
+
+def _shard_dirname(namespace: str) -> str:
+    """
+    Maps a namespace (topic or keyword) to a filesystem-safe directory name.
+
+    Args:
+        namespace (str): The namespace of the shard.
+
+    Returns:
+        str: A readable slug followed by a short hash, so distinct namespaces never collide.
+    """
+    slug = re.sub(r"[^\w\-]+", "_", namespace.strip().lower())[:48].strip("_") or "shard"
+    digest = hashlib.sha1(namespace.encode("utf-8")).hexdigest()[:10]
+    return f"{slug}-{digest}"
+
+
+def source_id(doc: Document) -> str:
+    """
+    Identifies the item a document describes, so a later version of it replaces the earlier one in a shard
+    instead of being stored next to it.
+
+    Args:
+        doc (Document): A document or a chunk of one.
+
+    Returns:
+        str: metadata["video_id"] when set, the commented video for harvested comments, the video URL of a
+            formatted video record, or a hash of the text for anything else.
+    """
+    if doc.metadata.get("video_id"):
+        return str(doc.metadata["video_id"])
+    if doc.metadata.get("oid"):
+        return f"{doc.metadata.get('source', 'comments')}:{doc.metadata['oid']}"
+    fields = record_fields(doc.page_content)
+    url = fields.get("video url") or fields.get("视频链接")
+    if url:
+        return url.strip()
+    return hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def _chunk_id(source: str, index: int) -> str:
+    """ID of the index-th chunk of an item in a shard."""
+    return hashlib.sha1(f"{source}#{index}".encode("utf-8")).hexdigest()
+
+
+def document_ids(docs: List[Document]) -> List[str]:
+    """
+    IDs under which add_documents stores a list of chunks: the item each chunk belongs to (see source_id)
+    and the position of the chunk within that item. Chunks of one item are expected in order.
+
+    Args:
+        docs (List[Document]): Chunks, as produced by splitting whole documents that carry a source_id.
+
+    Returns:
+        List[str]: One ID per chunk.
+    """
+    counts: Dict[str, int] = {}
+    ids = []
+    for doc in docs:
+        source = source_id(doc)
+        ids.append(_chunk_id(source, counts.get(source, 0)))
+        counts[source] = counts.get(source, 0) + 1
+    return ids
+
+
+def estimate_store_bytes(store: FAISS) -> int:
+    """
+    Estimates the resident size of a FAISS vector store.
+
+    Args:
+        store (FAISS): The vector store to measure.
+
+    Returns:
+        int: Approximate bytes held by the vectors and the docstore texts.
+    """
+    vector_bytes = ann_index.index_bytes(store.index)
+    docstore = getattr(store.docstore, "_dict", {})
+    text_bytes = sum(len(doc.page_content.encode("utf-8")) for doc in docstore.values())
+    return vector_bytes + text_bytes
+
+
+def scored_documents(hits: List[Tuple[Document, float]]) -> List[Document]:
+    """
+    Copies search hits into documents carrying their relevance score in metadata["relevance_score"],
+    so later stages such as the grading cascade can use it. The stored documents are left untouched.
+
+    Args:
+        hits (List[Tuple[Document, float]]): Documents with their FAISS L2 distance.
+
+    Returns:
+        List[Document]: The documents, with the same relevance scale LangChain uses for FAISS.
+    """
+    return [
+        Document(page_content=doc.page_content,
+                 metadata={**doc.metadata, "relevance_score": 1.0 - distance / math.sqrt(2)})
+        for doc, distance in hits
+    ]
+
+
+class IndexPool:
+    """
+    Keeps one FAISS shard per namespace (topic or keyword). Hot shards stay in memory under a
+    memory budget, the least recently used ones are written to disk and dropped, and queries fan
+    out to several shards in parallel before their results are merged into a single top-k.
+
+    Shards are persisted in the memory-mappable layout of vector_store, so a shard loaded back from
+    disk is mapped read-only and shared between worker processes until it is modified again.
+    """
+
+    def __init__(self, root_dir: str, embedding_model=None, memory_budget_mb: float = 512, max_workers: int = 4,
+                 index_type: Optional[str] = None):
+        """
+        Args:
+            root_dir (str): Directory where evicted shards are persisted, one sub-directory per namespace.
+            embedding_model (Embeddings, optional): Embedding model shared by all shards. Defaults to the pooled
+                embeddings of models, behind the shared embedding cache.
+            memory_budget_mb (float): Upper bound on the estimated size of the shards kept in memory.
+            max_workers (int): Number of shards searched concurrently.
+            index_type (Optional[str]): FAISS index type of the shards, see bili_server.ann_index. Shards start flat
+                and are rebuilt as this type once they are large enough to train it. Defaults to FAISS_INDEX_TYPE.
+        """
+        self.root_dir = root_dir
+        self.embedding_model = embedding_model or cached_embeddings()
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.index_type = index_type or ann_index.default_index_type()
+        # 分片是可写的：只接受删除后标签仍稳定的索引类型（flat 与 IVF，见 ann_index.delete_from_store）
+        if self.index_type not in ann_index.INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{self.index_type}', expected one of {ann_index.INDEX_TYPES}")
+        self._shards: "OrderedDict[str, FAISS]" = OrderedDict()
+        self._sizes = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        os.makedirs(root_dir, exist_ok=True)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Estimated size of the shards currently held in memory."""
+        return sum(self._sizes.values())
+
+    def namespaces(self) -> List[str]:
+        """Namespaces of the shards currently held in memory, least recently used first."""
+        with self._lock:
+            return list(self._shards.keys())
+
+    def _shard_path(self, namespace: str) -> str:
+        return os.path.join(self.root_dir, _shard_dirname(namespace))
+
+    def get(self, namespace: str) -> Optional[FAISS]:
+        """
+        Returns the shard of a namespace, loading it from disk if it was evicted.
+
+        Args:
+            namespace (str): The namespace of the shard.
+
+        Returns:
+            Optional[FAISS]: The shard, or None if the namespace has never been indexed.
+        """
+        with self._lock:
+            store = self._shards.get(namespace)
+            if store is not None:
+                self._shards.move_to_end(namespace)
+                return store
+
+            path = self._shard_path(namespace)
+            if not os.path.exists(os.path.join(path, INDEX_FILE)):
+                return None
+
+            store = get_local_store(path, embedding_model=self.embedding_model)
+            self._admit(namespace, store)
+            return store
+
+    def _writable(self, namespace: str) -> Optional[FAISS]:
+        """
+        Returns the shard of a namespace in a form that can be modified. A memory-mapped shard is
+        copied into memory on its first write.
+        """
+        store = self.get(namespace)
+        if store is not None and isinstance(store.docstore, SqliteDocstore):
+            store = get_local_store(self._shard_path(namespace), mmap=False, embedding_model=self.embedding_model)
+            self._admit(namespace, store)
+        return store
+
+    def add_documents(self, namespace: str, docs: List[Document]) -> int:
+        """
+        Embeds documents into the shard of a namespace, creating the shard if needed.
+        Chunks are keyed by the item they belong to and their position in it (see document_ids): an item whose
+        text is unchanged only has its metadata updated, and an item whose text changed replaces all of its
+        previous chunks.
+
+        Args:
+            namespace (str): The namespace of the shard.
+            docs (List[Document]): Already split documents to index.
+
+        Returns:
+            int: Number of documents actually added.
+        """
+        with self._lock:
+            store = self._writable(namespace)
+            known = getattr(store.docstore, "_dict", {}) if store is not None else {}
+
+            by_source: "OrderedDict[str, List[Tuple[str, Document]]]" = OrderedDict()
+            for doc_id, doc in zip(document_ids(docs), docs):
+                by_source.setdefault(source_id(doc), []).append((doc_id, doc))
+
+            new_docs, new_ids, stale_ids, touched = [], [], [], False
+            for source, chunks in by_source.items():
+                old_ids = []
+                while _chunk_id(source, len(old_ids)) in known:
+                    old_ids.append(_chunk_id(source, len(old_ids)))
+                if [known[doc_id].page_content for doc_id in old_ids] == [doc.page_content for _, doc in chunks]:
+                    for doc_id, doc in chunks:
+                        known[doc_id].metadata.update(doc.metadata)
+                    touched = touched or bool(chunks)
+                    continue
+                stale_ids.extend(old_ids)
+                new_ids.extend(doc_id for doc_id, _ in chunks)
+                new_docs.extend(doc for _, doc in chunks)
+
+            if touched:
+                self._dirty.add(namespace)
+            if not new_docs:
+                return 0
+
+            if stale_ids:
+                ann_index.delete_from_store(store, stale_ids)
+            if store is None:
+                store = ann_index.from_documents(new_docs, self.embedding_model, self.index_type, ids=new_ids)
+            else:
+                ann_index.add_to_store(store, new_docs, new_ids)
+                index = ann_index.grow_index(store.index, self.index_type)
+                if index is not store.index:
+                    store.index = index
+                    print(f"Rebuilt index shard {namespace} as {self.index_type} at {index.ntotal} vectors")
+
+            self._dirty.add(namespace)
+            self._admit(namespace, store)
+            return len(new_docs)
+
+    def update_metadata(self, namespace: str, updates: Dict[str, dict]) -> int:
+        """
+        Updates the metadata of stored documents in place, without re-embedding their text.
+
+        Args:
+            namespace (str): The namespace of the shard.
+            updates (Dict[str, dict]): Metadata fields to set, by document ID.
+
+        Returns:
+            int: Number of documents updated.
+        """
+        with self._lock:
+            store = self._writable(namespace)
+            docstore = getattr(store.docstore, "_dict", {}) if store is not None else {}
+            updated = 0
+            for doc_id, fields in updates.items():
+                doc = docstore.get(doc_id)
+                if doc is not None:
+                    doc.metadata.update(fields)
+                    updated += 1
+            if updated:
+                self._dirty.add(namespace)
+                self._sizes[namespace] = estimate_store_bytes(store)
+            return updated
+
+    def delete_documents(self, namespace: str, ids: List[str]) -> int:
+        """
+        Removes documents from the shard of a namespace.
+
+        Args:
+            namespace (str): The namespace of the shard.
+            ids (List[str]): Document IDs; IDs the shard does not hold are ignored.
+
+        Returns:
+            int: Number of documents removed.
+        """
+        with self._lock:
+            store = self._writable(namespace)
+            if store is None:
+                return 0
+            ids = [doc_id for doc_id in ids if doc_id in getattr(store.docstore, "_dict", {})]
+            if ids:
+                ann_index.delete_from_store(store, ids)
+                self._dirty.add(namespace)
+                self._sizes[namespace] = estimate_store_bytes(store)
+            return len(ids)
+
+    def _admit(self, namespace: str, store: FAISS) -> None:
+        """
+        Marks a shard as most recently used and evicts cold shards until the pool fits its budget.
+        The shard just admitted is never evicted, even when it alone exceeds the budget.
+        """
+        self._shards[namespace] = store
+        self._shards.move_to_end(namespace)
+        self._sizes[namespace] = estimate_store_bytes(store)
+
+        while self.resident_bytes > self.memory_budget and len(self._shards) > 1:
+            cold_namespace = next(iter(self._shards))
+            self.evict(cold_namespace)
+
+    def evict(self, namespace: str) -> None:
+        """
+        Writes a shard to disk if it changed since it was loaded, then drops it from memory.
+
+        Args:
+            namespace (str): The namespace of the shard.
+        """
+        with self._lock:
+            store = self._shards.pop(namespace, None)
+            self._sizes.pop(namespace, None)
+            if store is not None and namespace in self._dirty:
+                save_mmap_store(store, self._shard_path(namespace))
+            self._dirty.discard(namespace)
+            print(f"Evicted index shard: {namespace}")
+
+    def discard(self, namespace: str) -> bool:
+        """
+        Drops an unmodified shard from memory without saving it, so the next get maps the version another process
+        has written to disk since. Shards with unsaved changes are kept.
+
+        Returns:
+            bool: Whether the shard was dropped.
+        """
+        with self._lock:
+            if namespace in self._dirty or namespace not in self._shards:
+                return False
+            del self._shards[namespace]
+            self._sizes.pop(namespace, None)
+            return True
+
+    def flush(self) -> None:
+        """
+        Persists every modified in-memory shard without evicting it.
+        """
+        with self._lock:
+            for namespace in list(self._dirty):
+                save_mmap_store(self._shards[namespace], self._shard_path(namespace))
+            self._dirty.clear()
+
+    def search(self, query: str, namespaces: List[str], k: int = 10) -> List[Tuple[Document, float]]:
+        """
+        Searches several shards in parallel and merges their hits into one top-k list.
+
+        Args:
+            query (str): The query text, embedded once and reused for every shard.
+            namespaces (List[str]): The shards to search. Unknown namespaces are skipped.
+            k (int): Number of results to return.
+
+        Returns:
+            List[Tuple[Document, float]]: Documents with their L2 distance, closest first.
+        """
+        stores = [store for store in (self.get(namespace) for namespace in namespaces) if store is not None]
+        if not stores:
+            return []
+
+        query_vector = self.embedding_model.embed_query(query)
+        futures = [
+            self._executor.submit(store.similarity_search_with_score_by_vector, query_vector, k)
+            for store in stores
+        ]
+
+        hits = [hit for future in futures for hit in future.result()]
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
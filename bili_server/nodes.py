@@ -2,17 +2,23 @@
 # -*- coding: utf-8 -*-
 # YouTube Agent Graph Nodes Module
 
+from bili_server.analytics import analyze_videos
 from bili_server.generate_chain import create_generate_chain
+from bili_server.index_pool import scored_documents
 
 
 class GraphNodes:
-    def __init__(self, llm, retriever, retrieval_grader, hallucination_grader, code_evaluator, question_rewriter):
+    def __init__(self, llm, retriever, retrieval_grader, hallucination_grader, code_evaluator, question_rewriter,
+                 session_memory=None, grading_cascade=None, query_planner=None):
         self.llm = llm
         self.retriever = retriever
         self.retrieval_grader = retrieval_grader
         self.hallucination_grader = hallucination_grader
         self.code_evaluator = code_evaluator
         self.question_rewriter = question_rewriter
+        self.session_memory = session_memory
+        self.grading_cascade = grading_cascade
+        self.query_planner = query_planner
         self.generate_chain = create_generate_chain(llm)
 
     async def retrieve(self, state):
@@ -23,15 +29,68 @@ class GraphNodes:
             state (dict): The current graph state
 
         Returns:
-            state (dict): New key added to state, documents, that contains retrieved documents
+            state (dict): New keys added to state, documents and keywords, that contain retrieved documents
+                and the search keywords they were fetched for
         """
         print("---Node: Start Retrieval---")
         question = state["input"]
 
+        session = self._session(state)
+        if session is not None:
+            # Follow-up questions are answered from the conversation's working set when it covers them
+            documents = session.search(question, max_distance=self.session_memory.max_distance)
+            if documents:
+                print(f"Retrieved Docs from session memory: {documents}")
+                return {"documents": documents, "input": question, "keywords": []}
+
+        # Search engines handle short keywords far better than whole sentences
+        keywords = await self.query_planner.plan(question) if self.query_planner is not None else [question]
+        print(f"Planned search keywords: {keywords}")
+
+        if session is not None:
+            store = await self.retriever.build_vector_store(keywords=keywords, page=1, index_type="flat")
+            session.add_store(store, keywords)
+            self.session_memory.enforce_budget()
+            documents = scored_documents(session.store.similarity_search_with_score(question, k=10))
+            print(f"Retrieved Docs: {documents}")
+            return {"documents": documents, "input": question, "keywords": keywords}
+
         # Execute retrieval
-        documents = await self.retriever.get_retriever(keywords=[question], page=1)
+        documents = await self.retriever.get_retriever(keywords=keywords, page=1, query=question)
         print(f"Retrieved Docs: {documents}")
-        return {"documents": documents, "input": question}
+        return {"documents": documents, "input": question, "keywords": keywords}
+
+    def _session(self, state):
+        """
+        Returns the session memory of the conversation, or None when the request carries no session ID.
+        """
+        session_id = state.get("session_id")
+        if self.session_memory is None or not session_id:
+            return None
+        return self.session_memory.get(session_id)
+
+    def analyze(self, state):
+        """
+        Compute rankings, engagement ratios, growth and distributions of the retrieved videos locally,
+        so the LLM receives compact tables instead of aggregating numbers itself.
+
+        Args:
+            state (dict): The current graph state
+
+        Returns:
+            state (dict): New key added to state, analytics, that contains the rendered metric tables
+        """
+        print("---Node: Local Metrics Analysis---")
+        question = state["input"]
+
+        # Follow-ups served from session memory analyse every keyword fetched in the conversation
+        session = self._session(state)
+        keywords = list(dict.fromkeys([*(state.get("keywords") or [question]),
+                                       *(session.keywords if session is not None else [])]))
+        videos = self.retriever.get_metrics(keywords)
+        analytics = analyze_videos(videos) if videos else ""
+        print(f"Analytics: {analytics}")
+        return {"analytics": analytics}
 
     def generate(self, state):
         """
@@ -49,7 +108,8 @@ class GraphNodes:
         documents = state["documents"]
 
         # Generate based on RAG
-        generation = self.generate_chain.invoke({"context": documents, "input": question})
+        generation = self.generate_chain.invoke({"context": documents, "input": question,
+                                                 "analytics": state.get("analytics") or "No metrics available."})
         print(f"Generated response: {generation}")
         return {"documents": documents, "input": question, "generation": generation}
 
@@ -69,10 +129,25 @@ class GraphNodes:
 
 
         filtered_docs = []
+        session = self._session(state)
 
         for d in documents:
-            score = self.retrieval_grader.invoke({"input": question, "document": d.page_content})
-            grade = score["score"]
+            grade_key = session.grade_key(question, d) if session is not None else None
+            grade = self.grading_cascade.decide(question, d) if self.grading_cascade is not None else None
+            if grade is not None:
+                print(f"---Cascade verdict without LLM: {grade}---")
+                if self.grading_cascade.should_shadow():
+                    score = self.retrieval_grader.invoke({"input": question, "document": d.page_content})
+                    self.grading_cascade.record_llm_verdict(question, d, score["score"], cascade_grade=grade)
+            elif session is not None and grade_key in session.grades:
+                grade = session.grades[grade_key]
+            else:
+                score = self.retrieval_grader.invoke({"input": question, "document": d.page_content})
+                grade = score["score"]
+                if self.grading_cascade is not None:
+                    self.grading_cascade.record_llm_verdict(question, d, grade)
+                if session is not None:
+                    session.grades[grade_key] = grade
             if grade == "yes":
                 print("---Evaluation result: Retrieved document is relevant to question---")
                 filtered_docs.append(d)
@@ -80,6 +155,8 @@ class GraphNodes:
                 print("---Evaluation result: Retrieved document is not relevant to question---")
                 continue
 
+        if self.grading_cascade is not None:
+            print(f"Grading cascade stats: {self.grading_cascade.stats()}")
         return {"documents": filtered_docs, "input": question}
 
     def transform_query(self, state):
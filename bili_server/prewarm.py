@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Index Pre-warming Module
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from bili_server.analytics import normalize_bilibili_archive
+from bili_server.sources import BilibiliProvider
+from bilibili_tools import get_bilibi
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，每个进程都自行预热
+    fcntl = None
+
+# 索引池目录下的预热锁与预热状态文件，多个 worker 共用
+LOCK_FILE = "prewarm.lock"
+STATE_FILE = "prewarm.json"
+
+
+def _archive_text(item: dict) -> str:
+    """Document text of a Bilibili archive record, in the field layout of the search pipeline."""
+    record = normalize_bilibili_archive(item)
+    fields = [
+        ("类型", "video"),
+        ("作者", record["author"]),
+        ("分类", item.get("tname", "未知分类")),
+        ("视频链接", record["url"]),
+        ("标题", record["title"]),
+        ("描述", item.get("desc") or item.get("description") or "无描述"),
+        ("播放量", record["views"]),
+        ("弹幕数", record["danmaku"]),
+        ("收藏数", record["favorites"]),
+        ("评论数", record["comments"]),
+        ("发布日期", record["published_at"]),
+    ]
+    return "\n".join(f"{header}: {value}" for header, value in fields)
+
+
+class Prewarmer:
+    """
+    Periodically pulls Bilibili trending keywords and ranked videos and embeds them, with the top videos' comments,
+    into the persistent index pool before users ask. Each warmed shard is marked on the loader, which then answers
+    questions about those keywords from the index without a real-time fetch.
+
+    Shards: one per trending keyword (searched on Bilibili only, so warm-up never spends YouTube quota),
+    "trending:popular" for the popular list, "trending:rank" for the site ranking and "trending:zone:<tid>"
+    for each zone's top 10.
+
+    With several server workers sharing the index pool directory, only the worker holding the pre-warm file lock
+    fetches and embeds; the others pick up its freshness state and shards from disk.
+    """
+
+    def __init__(self, loader, interval: float = 900, max_keywords: int = 10, zones: Tuple[int, ...] = (),
+                 comment_videos: int = 10, comment_pages: int = 1):
+        """
+        Args:
+            loader (DocumentLoader): Loader with an index pool; also used to search the trending keywords.
+            interval (float): Seconds between two warm-up rounds.
+            max_keywords (int): Number of trending search keywords warmed per round.
+            zones (Tuple[int, ...]): Zone tids whose top 10 is warmed.
+            comment_videos (int): Number of top ranked videos whose comments are indexed.
+            comment_pages (int): Comment pages fetched per video.
+        """
+        if loader.index_pool is None:
+            raise ValueError("Pre-warming needs an index pool, set INDEX_POOL_DIR")
+        self.loader = loader
+        self.interval = interval
+        self.max_keywords = max_keywords
+        self.zones = zones
+        self.comment_videos = comment_videos
+        self.comment_pages = comment_pages
+        # 热搜关键词只在 B 站上检索
+        self.sources = [source for source in loader.sources if source.name == BilibiliProvider.name] or \
+            [BilibiliProvider()]
+        self.freshness: Dict[str, dict] = {}
+        self.rounds = 0
+        self.state_path = os.path.join(loader.index_pool.root_dir, STATE_FILE)
+        self._lock_file = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process does the pre-warming. Taken over by another worker when the leader exits."""
+        if fcntl is None or self._lock_file is not None:
+            return True
+        lock_file = open(os.path.join(self.loader.index_pool.root_dir, LOCK_FILE), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # 持有锁直到进程退出
+        self._lock_file = lock_file
+        return True
+
+    async def trending_keywords(self) -> List[str]:
+        return await get_bilibi.get_hot_keywords(self.max_keywords)
+
+    async def ranked_feeds(self) -> Dict[str, List[dict]]:
+        """Ranked video lists by shard namespace; feeds that fail are skipped."""
+        feeds = await get_bilibi.get_ranked_videos(self.zones)
+        return {f"trending:{name}": videos for name, videos in feeds.items()}
+
+    def _index(self, namespace: str, docs: List[Document]) -> int:
+        """Splits and embeds documents into a shard; blocking, run in a worker thread."""
+        return self.loader.index_pool.add_documents(namespace, self.loader.split_documents(docs))
+
+    def _mark(self, namespace: str, chunks: int, videos: int) -> None:
+        self.loader.mark_warm(namespace)
+        self.freshness[namespace] = {"warmed_at": time.time(), "chunks_added": chunks, "videos": videos}
+
+    def _save_state(self) -> None:
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"rounds": self.rounds, "namespaces": self.freshness}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def sync_state(self) -> List[str]:
+        """
+        Adopts the freshness state written by the pre-warming worker: namespaces it warmed since the last sync are
+        marked warm here too, and their shards are dropped from memory so the next search maps the new version.
+
+        Returns:
+            List[str]: Namespaces warmed since the last sync.
+        """
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return []
+
+        updated = []
+        for namespace, entry in state.get("namespaces", {}).items():
+            known = self.freshness.get(namespace)
+            if known is not None and known["warmed_at"] >= entry["warmed_at"]:
+                continue
+            self.freshness[namespace] = entry
+            self.loader.mark_warm(namespace, entry["warmed_at"])
+            self.loader.index_pool.discard(namespace)
+            updated.append(namespace)
+        self.rounds = state.get("rounds", self.rounds)
+        return updated
+
+    async def warm_once(self) -> dict:
+        """
+        Runs one warm-up round.
+
+        Returns:
+            dict: Namespaces warmed in this round with the number of new chunks each. Namespaces for which nothing
+                came back are left out and keep their previous state.
+        """
+        keywords, feeds = await asyncio.gather(self.trending_keywords(), self.ranked_feeds())
+        warmed = {}
+
+        if keywords:
+            docs = await self.loader.get_docs(keywords, page=1, sources=self.sources)
+            for keyword in keywords:
+                keyword_docs = [doc for doc in docs if doc.metadata.get("keyword") == keyword]
+                if not keyword_docs:
+                    continue
+                added = await asyncio.to_thread(self._index, keyword, keyword_docs)
+                self._mark(keyword, added, len(self.loader.get_metrics([keyword])))
+                warmed[keyword] = added
+
+        ranked = []
+        for namespace, videos in feeds.items():
+            if not videos:
+                continue
+            docs = [Document(page_content=_archive_text(video), metadata={"keyword": namespace, "source": "bilibili"})
+                    for video in videos]
+            added = await asyncio.to_thread(self._index, namespace, docs)
+            self.loader.record_metrics(namespace, [normalize_bilibili_archive(video) for video in videos])
+            self._mark(namespace, added, len(videos))
+            warmed[namespace] = added
+            ranked.extend(video for video in videos if video.get("aid"))
+
+        # 排名靠前的视频的评论也预先入库，与热门榜共用分片
+        if ranked and self.comment_videos:
+            oids = [video["aid"] for video in ranked][:self.comment_videos]
+            comments = await self.loader.index_comments(oids, "trending:popular", pages=self.comment_pages)
+            if "trending:popular" in warmed:
+                self.freshness["trending:popular"]["chunks_added"] += comments
+            warmed["trending:popular"] = warmed.get("trending:popular", 0) + comments
+
+        await asyncio.to_thread(self.loader.index_pool.flush)
+        self.rounds += 1
+        await asyncio.to_thread(self._save_state)
+        print(f"Pre-warm round {self.rounds}: {warmed}")
+        return warmed
+
+    async def run_forever(self) -> None:
+        while True:
+            leader = True
+            try:
+                leader = self.is_leader
+                if leader:
+                    await self.warm_once()
+                else:
+                    self.sync_state()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Pre-warm round failed: {e}")
+            # 非预热进程更频繁地同步状态，预热结果最多延迟一分钟生效
+            await asyncio.sleep(self.interval if leader else min(self.interval, 60))
+
+    def start(self) -> None:
+        """Starts the warm-up loop in the background. Must be called from a running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def freshness_report(self) -> dict:
+        """
+        Freshness of every warmed namespace: age of its latest warm-up and whether it is still served
+        from the index without a real-time fetch.
+        """
+        now = time.time()
+        return {
+            "rounds": self.rounds,
+            "interval_seconds": self.interval,
+            "namespaces": {
+                namespace: {**entry, "age_seconds": round(now - entry["warmed_at"], 1),
+                            "fresh": self.loader.is_warm(namespace)}
+                for namespace, entry in self.freshness.items()
+            },
+        }
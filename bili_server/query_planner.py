@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Query Planner Module
+
+import re
+from typing import List, Optional
+
+# 句子中用于切分多个检索意图的连接词
+_SPLIT_RE = re.compile(r"\s+(?:and|or|vs\.?|versus|compared? (?:to|with))\s+|[,;，；、。？！?!]|和|与|以及|对比|还有",
+                       re.IGNORECASE)
+_TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9.+#\-]*|[\u3400-\u4dbf\u4e00-\u9fff]+")
+
+# 只过滤虚词和提问用语，不含任何可能是检索主题的实词
+_STOPWORDS = {
+    "a", "an", "the", "this", "that", "these", "those", "some", "any", "each", "every", "all", "most",
+    "of", "to", "in", "on", "for", "with", "about", "from", "by", "at", "into", "along",
+    "i", "me", "my", "we", "us", "our", "you", "your", "it", "its", "they", "them", "their",
+    "is", "are", "am", "be", "was", "were", "been", "do", "does", "did", "can", "could", "would", "should", "will",
+    "what", "which", "who", "whom", "how", "where", "when", "why", "and", "or", "but", "than",
+    "please", "find", "give", "show", "tell", "want", "like", "help", "compare", "video", "videos",
+}
+_CJK_FILLERS = re.compile(r"请|帮我|帮忙|一下|我想|我要|我在|我正在|有没有|有哪些|哪些|什么|怎么|如何|相关的?|视频|的|了|吗|呢|吧|一些|最")
+
+
+def local_keywords(question: str, max_keywords: int = 3) -> List[str]:
+    """
+    Extracts focused search keywords from a natural-language question without an LLM call.
+
+    The question is split on conjunctions and punctuation into clauses, filler words are dropped from
+    each clause, and the remaining content words form one keyword per clause.
+
+    Args:
+        question (str): The user question.
+        max_keywords (int): Maximum number of keywords.
+
+    Returns:
+        List[str]: Keywords, most specific first; the original question if nothing usable is left.
+    """
+    keywords = []
+    for clause in _SPLIT_RE.split(question):
+        if not clause:
+            continue
+        tokens = []
+        for token in _TOKEN_RE.findall(clause):
+            token = token.rstrip(".")
+            if token.lower() in _STOPWORDS:
+                continue
+            token = _CJK_FILLERS.sub(" ", token).strip()
+            tokens.extend(part for part in token.split() if len(part) > 1 or part.isascii())
+        keyword = " ".join(tokens[:6]).strip()
+        if keyword and keyword.lower() not in (k.lower() for k in keywords):
+            keywords.append(keyword)
+
+    keywords.sort(key=len, reverse=True)
+    return keywords[:max_keywords] or [question]
+
+
+class QueryPlanner:
+    """
+    Turns a user question into a few focused search keywords, with one cheap LLM call when a keyword
+    extractor chain is given, and with local extraction otherwise or when that call fails.
+    """
+
+    def __init__(self, keyword_extractor=None, max_keywords: int = 3):
+        """
+        Args:
+            keyword_extractor (Runnable, optional): Chain created by GraderUtils.create_keyword_extractor.
+            max_keywords (int): Maximum number of keywords searched per question.
+        """
+        self.keyword_extractor = keyword_extractor
+        self.max_keywords = max_keywords
+
+    async def plan(self, question: str) -> List[str]:
+        """
+        Args:
+            question (str): The user question.
+
+        Returns:
+            List[str]: Distinct search keywords.
+        """
+        keywords: Optional[List[str]] = None
+        if self.keyword_extractor is not None:
+            try:
+                result = await self.keyword_extractor.ainvoke({"input": question, "max_keywords": self.max_keywords})
+                keywords = [str(keyword).strip() for keyword in result.get("keywords", []) if str(keyword).strip()]
+            except Exception as e:
+                print(f"Keyword extraction failed, falling back to local extraction: {e}")
+
+        if not keywords:
+            keywords = local_keywords(question, self.max_keywords)
+        return list(dict.fromkeys(keywords))[:self.max_keywords]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Session Memory Module
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+from bili_server.index_pool import estimate_store_bytes, scored_documents
+
+
+class Session:
+    """
+    Working set of one conversation: the index built from everything fetched so far, the keywords
+    already fetched and the grader verdicts already paid for.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.store: Optional[FAISS] = None
+        self.keywords: List[str] = []
+        self.grades: Dict[str, str] = {}
+        self.last_access = time.time()
+
+    @staticmethod
+    def grade_key(question: str, doc: Document) -> str:
+        return hashlib.sha1(f"{question}\x00{doc.page_content}".encode("utf-8")).hexdigest()
+
+    def add_store(self, store: FAISS, keywords: List[str]) -> None:
+        """
+        Merges a freshly built vector store into the session index.
+
+        Args:
+            store (FAISS): Store built from newly fetched documents.
+            keywords (List[str]): Keywords the store was fetched for.
+        """
+        if self.store is None:
+            self.store = store
+        else:
+            self.store.merge_from(store)
+        self.keywords.extend(keyword for keyword in keywords if keyword not in self.keywords)
+
+    def search(self, question: str, k: int = 10, max_distance: float = 0.45) -> List[Document]:
+        """
+        Retrieves from the session index, returning nothing when the best hit is too far for the
+        working set to plausibly cover the question.
+
+        Args:
+            question (str): The question.
+            k (int): Number of documents to return.
+            max_distance (float): Largest L2 distance of the best hit that still counts as covered.
+
+        Returns:
+            List[Document]: The documents, or an empty list when a fresh fetch is needed.
+        """
+        if self.store is None:
+            return []
+        hits = self.store.similarity_search_with_score(question, k=k)
+        if not hits or hits[0][1] > max_distance:
+            return []
+        return scored_documents(hits)
+
+    @property
+    def size_bytes(self) -> int:
+        return estimate_store_bytes(self.store) if self.store is not None else 0
+
+
+class SessionMemory:
+    """
+    Conversation-scoped retrieval memory keyed by session ID, so follow-up questions retrieve from the
+    cached working set and only go back to the sources when it does not cover them. Sessions idle for
+    longer than the TTL, and the least recently used ones beyond the memory budget, are dropped.
+    """
+
+    def __init__(self, memory_budget_mb: float = 256, ttl_seconds: float = 3600, max_distance: float = 0.45):
+        """
+        Args:
+            memory_budget_mb (float): Upper bound on the estimated size of all session indexes.
+            ttl_seconds (float): Idle time after which a session is dropped.
+            max_distance (float): See Session.search.
+        """
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Session:
+        """
+        Returns the session with the given ID, creating it if needed.
+
+        Args:
+            session_id (str): The conversation ID.
+
+        Returns:
+            Session: The session.
+        """
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id)
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            session.last_access = time.time()
+            return session
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def enforce_budget(self) -> None:
+        """
+        Drops the least recently used sessions until the session indexes fit the memory budget.
+        The most recently used session is always kept.
+        """
+        with self._lock:
+            total = sum(session.size_bytes for session in self._sessions.values())
+            while total > self.memory_budget and len(self._sessions) > 1:
+                _, evicted = self._sessions.popitem(last=False)
+                total -= evicted.size_bytes
+                print(f"Evicted session memory: {evicted.session_id}")
+
+    def _expire(self) -> None:
+        deadline = time.time() - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_access >= deadline:
+                break
+            self._sessions.pop(session_id)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
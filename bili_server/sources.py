@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Source Provider Module
+
+import datetime
+import hashlib
+import json
+from typing import Dict, List
+
+from bili_server.analytics import normalize_bilibili, normalize_youtube
+from bilibili_tools import get_bilibi
+from youtube_tools import get_youtube
+
+
+class SourceProvider:
+    """
+    A video platform the loader can search. fetch() returns one result per keyword in a common shape:
+    {"source", "keyword", "items": texts to embed (one per video), "videos": records in the metrics schema
+    of bili_server.analytics, "oids": Bilibili aids for comment harvesting (empty elsewhere)}.
+    """
+
+    name = ""
+
+    def __init__(self, timeout: float = 10.0):
+        """
+        Args:
+            timeout (float): Seconds the loader waits for this source before dropping it from a request.
+        """
+        self.timeout = timeout
+
+    async def fetch(self, keywords: List[str], page: int) -> List[Dict]:
+        raise NotImplementedError
+
+
+class YouTubeProvider(SourceProvider):
+    """YouTube Data API search, through the quota accountant."""
+
+    name = "youtube"
+
+    async def fetch(self, keywords: List[str], page: int) -> List[Dict]:
+        results = await get_youtube.youtube_detail_pipeline(keywords=keywords, page=page)
+        return [{
+            "source": self.name,
+            "keyword": result["keyword"],
+            "items": result.get("items", []),
+            "videos": [normalize_youtube(video) for video in result.get("videos", [])],
+            "oids": [],
+        } for result in results]
+
+
+class BilibiliProvider(SourceProvider):
+    """Bilibili comprehensive search."""
+
+    name = "bilibili"
+
+    async def fetch(self, keywords: List[str], page: int) -> List[Dict]:
+        results = await get_bilibi.bilibili_detail_pipiline(keywords=keywords, page=page)
+        return [{
+            "source": self.name,
+            "keyword": result["keyword"],
+            "items": json.loads(result["real_data"]),
+            "videos": [normalize_bilibili(video) for video in result.get("videos", [])],
+            "oids": result.get("oids", []),
+        } for result in results]
+
+
+class SyntheticProvider(SourceProvider):
+    """
+    Deterministic fake videos derived from the keyword, for load testing the full stack without network access
+    (see app/llm_standin.py). The same keyword always yields the same videos.
+    """
+
+    name = "synthetic"
+    videos_per_keyword = 20
+
+    @staticmethod
+    def _video(keyword: str, index: int) -> dict:
+        seed = int(hashlib.md5(f"{keyword}:{index}".encode("utf-8")).hexdigest(), 16)
+        published = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(hours=seed % 8760)
+        return {
+            "video_id": f"synthetic{seed % 10 ** 8:08d}",
+            "title": f"{keyword} review part {index + 1}",
+            "channel": f"channel {seed % 50}",
+            "description": f"A synthetic video about {keyword}, covering topic {seed % 7} in detail.",
+            "url": f"https://example.com/watch?v={seed % 10 ** 8:08d}",
+            "view_count": seed % 1000000,
+            "like_count": seed % 50000,
+            "comment_count": seed % 3000,
+            "published_at": published.isoformat(),
+        }
+
+    async def fetch(self, keywords: List[str], page: int) -> List[Dict]:
+        results = []
+        for keyword in keywords:
+            start = (page - 1) * self.videos_per_keyword
+            videos = [self._video(keyword, index) for index in range(start, start + self.videos_per_keyword)]
+            results.append({
+                "source": self.name,
+                "keyword": keyword,
+                "items": [f"Type: video\nAuthor: {video['channel']}\nVideo URL: {video['url']}\n"
+                          f"Title: {video['title']}\nDescription: {video['description']}\n"
+                          f"Views: {video['view_count']}\nLikes: {video['like_count']}\n"
+                          f"Comments: {video['comment_count']}\nPublished: {video['published_at']}\n"
+                          for video in videos],
+                "videos": [normalize_youtube(video) for video in videos],
+                "oids": [],
+            })
+        return results
+
+
+PROVIDERS = {provider.name: provider for provider in (YouTubeProvider, BilibiliProvider, SyntheticProvider)}
+
+
+def create_providers(names: List[str], timeouts: Dict[str, float] = None) -> List[SourceProvider]:
+    """
+    Creates source providers by name.
+
+    Args:
+        names (List[str]): Provider names, e.g. ["youtube", "bilibili"].
+        timeouts (Dict[str, float]): Per-source timeouts in seconds; sources not listed keep the default.
+
+    Returns:
+        List[SourceProvider]: The providers.
+
+    Raises:
+        ValueError: If a name is unknown.
+    """
+    timeouts = timeouts or {}
+    providers = []
+    for name in names:
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown source: {name}, expected one of {list(PROVIDERS)}")
+        providers.append(PROVIDERS[name](**({"timeout": timeouts[name]} if name in timeouts else {})))
+    return providers
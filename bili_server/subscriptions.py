@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent Subscription Hub Module
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+from bili_server.delta_refresh import SOURCES, DeltaRefresher
+from bilibili_tools.hotspot import HotspotEngine
+
+
+def _event(topic: str, type_: str, data) -> dict:
+    return {"topic": topic, "type": type_, "time": time.time(), "data": data}
+
+
+class Subscription:
+    """
+    Event queue of one client. When the client falls behind, the oldest events are dropped so a slow
+    consumer never blocks the collectors or the other subscribers.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.topics: Set[str] = set()
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def push(self, event: dict) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    async def get(self) -> dict:
+        return await self._queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        return await self.get()
+
+
+class Collector:
+    """
+    Background producer of the events of one topic. Runs every `interval` seconds while the topic has subscribers;
+    the latest state event is kept so new subscribers get it immediately.
+    """
+
+    def __init__(self, topic: str, interval: float):
+        self.topic = topic
+        self.interval = interval
+        self.latest: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def collect(self) -> List[dict]:
+        raise NotImplementedError
+
+    async def setup(self) -> None:
+        pass
+
+    async def teardown(self) -> None:
+        pass
+
+    def start(self, publish) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(publish))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.teardown()
+
+    async def _run(self, publish) -> None:
+        await self.setup()
+        while True:
+            try:
+                for event in await self.collect():
+                    publish(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Collector {self.topic} failed: {e}")
+                publish(_event(self.topic, "error", str(e)))
+            await asyncio.sleep(self.interval)
+
+
+class KeywordCollector(Collector):
+    """
+    Tracks a keyword on one source through the delta refresher: each round fetches only what is new and
+    publishes newly published videos and the metric changes of known ones.
+    """
+
+    def __init__(self, topic: str, refresher: DeltaRefresher, keyword: str, source: str, interval: float = 300):
+        super().__init__(topic, interval)
+        self.refresher = refresher
+        self.keyword = keyword
+        self.source = source
+
+    async def collect(self) -> List[dict]:
+        report = await self.refresher.refresh(self.keyword, self.source)
+        events = []
+        if report["new"]:
+            events.append(_event(self.topic, "new_videos", report["new"]))
+        if report["updated"]:
+            events.append(_event(self.topic, "metric_deltas", report["updated"]))
+        self.latest = _event(self.topic, "status", {key: report[key] for key in ("known_videos", "last_published")})
+        return events + [self.latest]
+
+
+class RoomCollector(Collector):
+    """
+    Watches a live room with the hotspot engine, pushes burst alerts as soon as they are detected and a
+    hotspot summary every `summary_interval` seconds.
+    """
+
+    def __init__(self, topic: str, engine: HotspotEngine, room_id: int, interval: float = 2,
+                 summary_interval: float = 10):
+        super().__init__(topic, interval)
+        self.engine = engine
+        self.room_id = room_id
+        self.summary_interval = summary_interval
+        self._last_burst = 0.0
+        self._last_summary = 0.0
+
+    async def setup(self) -> None:
+        self.engine.watch(self.room_id)
+
+    async def teardown(self) -> None:
+        await self.engine.unwatch(self.room_id)
+
+    async def collect(self) -> List[dict]:
+        snapshot = self.engine.get_hotspots(self.room_id)
+        events = [_event(self.topic, "burst", burst) for burst in snapshot["bursts"]
+                  if burst["time"] > self._last_burst]
+        if events:
+            self._last_burst = max(event["data"]["time"] for event in events)
+
+        now = time.time()
+        if now - self._last_summary >= self.summary_interval:
+            self._last_summary = now
+            self.latest = _event(self.topic, "hotspots", snapshot)
+            events.append(self.latest)
+        return events
+
+
+class SubscriptionHub:
+    """
+    Fans the events of shared background collectors out to any number of subscribers. A collector is started
+    by the first subscriber of its topic and stopped `linger_seconds` after the last one leaves, so N clients
+    watching the same keyword or room cost one data stream instead of N agent runs.
+
+    Topics are "keyword:<source>:<keyword>" and "room:<room_id>". Keywords are tracked on Bilibili by default:
+    every YouTube refresh costs at least one search.list call (100 of the 10,000 daily quota units), so YouTube
+    keywords are refreshed less often and only a few of them can be tracked at once.
+    """
+
+    def __init__(self, refresher: Optional[DeltaRefresher] = None, hotspot_engine: Optional[HotspotEngine] = None,
+                 keyword_interval: float = 300, linger_seconds: float = 60, max_queue: int = 100,
+                 youtube_keyword_interval: float = 3600, max_youtube_keywords: int = 2):
+        """
+        Args:
+            refresher (Optional[DeltaRefresher]): Backs keyword topics; keyword subscriptions fail without it.
+            hotspot_engine (Optional[HotspotEngine]): Backs room topics. Defaults to a new engine.
+            keyword_interval (float): Seconds between two refreshes of a tracked Bilibili keyword.
+            linger_seconds (float): How long a collector keeps running without subscribers.
+            max_queue (int): Events buffered per subscriber before the oldest are dropped.
+            youtube_keyword_interval (float): Seconds between two refreshes of a tracked YouTube keyword. The
+                default keeps two keywords around 5,000 quota units a day.
+            max_youtube_keywords (int): Number of YouTube keywords tracked at once; further subscriptions fail.
+        """
+        self.refresher = refresher
+        self.hotspot_engine = hotspot_engine or HotspotEngine()
+        self.keyword_interval = keyword_interval
+        self.youtube_keyword_interval = youtube_keyword_interval
+        self.max_youtube_keywords = max_youtube_keywords
+        self.linger_seconds = linger_seconds
+        self.max_queue = max_queue
+        self.collectors: Dict[str, Collector] = {}
+        self.subscribers: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self._stop_handles: Dict[str, asyncio.TimerHandle] = {}
+
+    @staticmethod
+    def topics(keywords: List[str] = (), rooms: List[int] = (), source: str = "bilibili") -> List[str]:
+        """
+        Topics of the given keywords on a source and of the given live rooms.
+
+        Raises:
+            ValueError: If keywords is not a list of strings, rooms not a list of room IDs or source not a string.
+        """
+        if not isinstance(keywords, (list, tuple)) or not all(isinstance(keyword, str) for keyword in keywords):
+            raise ValueError("keywords must be a list of strings")
+        if not isinstance(rooms, (list, tuple)) or \
+                not all(isinstance(room_id, int) or isinstance(room_id, str) and room_id.strip().isdigit()
+                        for room_id in rooms):
+            raise ValueError("rooms must be a list of room IDs")
+        if not isinstance(source, str):
+            raise ValueError("source must be a string")
+        return ([f"keyword:{source}:{keyword.strip()}" for keyword in keywords if keyword.strip()]
+                + [f"room:{int(room_id)}" for room_id in rooms])
+
+    def _create_collector(self, topic: str) -> Collector:
+        kind, _, rest = topic.partition(":")
+        if kind == "keyword":
+            source, _, keyword = rest.partition(":")
+            if source not in SOURCES or not keyword:
+                raise ValueError(f"Invalid keyword topic: {topic}")
+            if self.refresher is None:
+                raise ValueError("Keyword subscriptions need delta refresh, set INDEX_POOL_DIR")
+            interval = self.youtube_keyword_interval if source == "youtube" else self.keyword_interval
+            return KeywordCollector(topic, self.refresher, keyword, source, interval)
+        if kind == "room":
+            return RoomCollector(topic, self.hotspot_engine, int(rest))
+        raise ValueError(f"Unknown topic: {topic}")
+
+    def publish(self, event: dict) -> None:
+        """Delivers an event to every subscriber of its topic."""
+        self.published += 1
+        for subscription in self.subscribers.get(event["topic"], ()):
+            subscription.push(event)
+
+    def subscription(self) -> Subscription:
+        """Creates an empty subscription; add topics with subscribe()."""
+        return Subscription(self.max_queue)
+
+    async def subscribe(self, subscription: Subscription, topics: List[str]) -> None:
+        """
+        Adds topics to a subscription, starting their collectors if needed.
+
+        Raises:
+            ValueError: If a topic is invalid or not supported by this hub.
+        """
+        tracked = {topic for topic in list(self.collectors) + list(topics) if topic.startswith("keyword:youtube:")}
+        if len(tracked) > self.max_youtube_keywords:
+            raise ValueError(f"At most {self.max_youtube_keywords} YouTube keywords can be tracked at once, "
+                             f"subscribe on bilibili instead")
+        collectors = {topic: self.collectors.get(topic) or self._create_collector(topic) for topic in topics}
+        for topic, collector in collectors.items():
+            handle = self._stop_handles.pop(topic, None)
+            if handle is not None:
+                handle.cancel()
+            if topic not in self.collectors:
+                self.collectors[topic] = collector
+                collector.start(self.publish)
+            self.subscribers.setdefault(topic, set()).add(subscription)
+            subscription.topics.add(topic)
+            if collector.latest is not None:
+                subscription.push(collector.latest)
+
+    async def unsubscribe(self, subscription: Subscription, topics: Optional[List[str]] = None) -> None:
+        """
+        Removes topics (all by default) from a subscription. Collectors left without subscribers are
+        stopped after the linger period.
+        """
+        loop = asyncio.get_running_loop()
+        for topic in list(subscription.topics if topics is None else topics):
+            subscription.topics.discard(topic)
+            subscribers = self.subscribers.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers and topic not in self._stop_handles:
+                self._stop_handles[topic] = loop.call_later(
+                    self.linger_seconds, lambda topic=topic: asyncio.ensure_future(self._stop_idle(topic)))
+
+    async def _stop_idle(self, topic: str) -> None:
+        self._stop_handles.pop(topic, None)
+        if self.subscribers.get(topic):
+            return
+        self.subscribers.pop(topic, None)
+        collector = self.collectors.pop(topic, None)
+        if collector is not None:
+            await collector.stop()
+            print(f"Stopped idle collector: {topic}")
+
+    async def close(self) -> None:
+        """Stops every collector."""
+        for handle in self._stop_handles.values():
+            handle.cancel()
+        self._stop_handles.clear()
+        for collector in list(self.collectors.values()):
+            await collector.stop()
+        self.collectors.clear()
+
+    def stats(self) -> dict:
+        return {
+            "collectors": len(self.collectors),
+            "subscriptions": {topic: len(subscribers) for topic, subscribers in self.subscribers.items()},
+            "events_published": self.published,
+        }
@@ -4,39 +4,172 @@
 # Date: 2024-10-15
 
 
-from typing import List, Optional
-from langchain_openai import OpenAIEmbeddings
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import Iterator, List, Optional
+
+import faiss
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from bili_server.document_loader import DocumentLoader
+from bili_server import ann_index
+from bili_server.cache import cached_embeddings
 
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.sqlite"
 
-def get_local_store(store_path: str) -> FAISS:
+
+class SqliteDocstore(Docstore):
+    """
+    Read-only docstore backed by an on-disk SQLite file, so documents are paged in on demand
+    instead of unpickling the whole docstore into every worker.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections must not be shared between threads, so each thread opens its own.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def search(self, search: str):
+        row = self._conn.execute("SELECT content, metadata FROM docs WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def delete(self, ids: List) -> None:
+        raise NotImplementedError("SqliteDocstore is read-only")
+
+
+class SqliteIndexMapping(Mapping):
+    """
+    Read-only view of the FAISS position -> docstore ID mapping stored next to the documents.
+    """
+
+    def __init__(self, docstore: SqliteDocstore):
+        self.docstore = docstore
+
+    def __getitem__(self, position: int) -> str:
+        row = self.docstore._conn.execute("SELECT doc_id FROM ids WHERE position = ?", (int(position),)).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __iter__(self) -> Iterator[int]:
+        for (position,) in self.docstore._conn.execute("SELECT position FROM ids ORDER BY position"):
+            yield position
+
+    def __len__(self) -> int:
+        return self.docstore._conn.execute("SELECT COUNT(*) FROM ids").fetchone()[0]
+
+
+def save_mmap_store(store: FAISS, store_path: str) -> None:
+    """
+    Persists a FAISS vector store in the memory-mappable layout read by get_local_store:
+    the raw index file plus a SQLite docstore instead of a pickled dict.
+
+    Both files are written next to their target and renamed into place, so processes that have the
+    previous version mapped keep reading it and new readers never see a partially written file.
+
+    Args:
+        store (FAISS): The vector store to persist.
+        store_path (str): The directory to write to.
+    """
+    os.makedirs(store_path, exist_ok=True)
+    index_path = os.path.join(store_path, INDEX_FILE)
+    faiss.write_index(store.index, index_path + ".tmp")
+
+    db_path = os.path.join(store_path, DOCSTORE_FILE)
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    with conn:
+        conn.execute("CREATE TABLE docs (id TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)")
+        conn.execute("CREATE TABLE ids (position INTEGER PRIMARY KEY, doc_id TEXT NOT NULL)")
+        conn.executemany("INSERT INTO ids VALUES (?, ?)", store.index_to_docstore_id.items())
+        conn.executemany(
+            "INSERT INTO docs VALUES (?, ?, ?)",
+            (
+                (doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+                for doc_id, doc in ((doc_id, store.docstore.search(doc_id))
+                                    for doc_id in store.index_to_docstore_id.values())
+            ),
+        )
+    conn.close()
+    # 原子替换，避免正在读取的 worker 看到写了一半的文件；先换文档库，新索引里的位置总能查到文档
+    os.replace(tmp_path, db_path)
+    os.replace(index_path + ".tmp", index_path)
+
+
+def get_local_store(store_path: str, mmap: bool = True, embedding_model=None) -> FAISS:
     """
     Loads a locally stored FAISS vector store.
 
+    Stores written by save_mmap_store are memory-mapped read-only, so every uvicorn worker shares the
+    same pages through the OS page cache and documents are read from SQLite on demand. With mmap=False
+    the same layout is copied into memory and the returned store can be modified. Stores written by
+    FAISS.save_local are loaded fully into memory as before.
+
     Args:
         store_path (str): The path where the FAISS vector store is stored locally.
+        mmap (bool): Whether to memory-map the index when the layout allows it.
+        embedding_model (Embeddings, optional): Embedding model of the store. Defaults to the shared cached embeddings.
 
     Returns:
         FAISS: The loaded FAISS vector store.
     """
     # 加载Embedding模型
-    embedding_model = OpenAIEmbeddings()
+    embedding_model = embedding_model or cached_embeddings()
+
+    db_path = os.path.join(store_path, DOCSTORE_FILE)
+    if mmap and os.path.exists(db_path) and not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        # 旧版 faiss 的 IO_FLAG_MMAP 只映射 IVF 倒排表，flat 向量仍会整份读进内存
+        print(f"faiss {faiss.__version__} cannot memory-map flat indexes (needs >= 1.11), loading {store_path} into memory")
+        mmap = False
+
+    if os.path.exists(db_path):
+        docstore = SqliteDocstore(db_path)
+        if mmap:
+            # 只读映射索引文件，多个进程共享页缓存而不是各自持有一份副本
+            index = faiss.read_index(os.path.join(store_path, INDEX_FILE),
+                                     faiss.IO_FLAG_READ_ONLY | faiss.IO_FLAG_MMAP_IFC)
+            return FAISS(embedding_model, index, docstore, SqliteIndexMapping(docstore))
+
+        index = faiss.read_index(os.path.join(store_path, INDEX_FILE))
+        index_to_docstore_id = dict(docstore._conn.execute("SELECT position, doc_id FROM ids"))
+        docs = {
+            doc_id: Document(page_content=content, metadata=json.loads(metadata))
+            for doc_id, content, metadata in docstore._conn.execute("SELECT id, content, metadata FROM docs")
+        }
+        return FAISS(embedding_model, index, InMemoryDocstore(docs), index_to_docstore_id)
 
     # 从本地直接加载Faiss数据库
-    store = FAISS.load_local(store_path, embedding_model)
+    store = FAISS.load_local(store_path, embedding_model, allow_dangerous_deserialization=True)
 
     return store
 
 
-async def create_vector_store(docs, store_path: Optional[str] = None) -> FAISS:
+async def create_vector_store(docs, store_path: Optional[str] = None, mmap: bool = False) -> FAISS:
     """
     Creates a FAISS vector store from a list of documents.
 
     Args:
         docs (List[Document]): A list of Document objects containing the content to be stored.
         store_path (Optional[str]): The path to store the vector store locally. If None, the vector store will not be stored.
+        mmap (bool): Whether to store it in the memory-mappable layout instead of the pickled one.
 
     Returns:
         FAISS: The FAISS vector store containing the documents.
@@ -51,19 +184,24 @@ async def create_vector_store(docs, store_path: Optional[str] = None) -> FAISS:
     texts = text_splitter.split_documents(docs)
 
     # Embedding object
-    embedding_model = OpenAIEmbeddings()
+    embedding_model = cached_embeddings()
 
     # Create the FAISS vector store
-    store = FAISS.from_documents(texts, embedding_model)
+    store = ann_index.from_documents(texts, embedding_model)
 
     # Save the vector store locally if a path is provided
-    if store_path:
+    if store_path and mmap:
+        save_mmap_store(store, store_path)
+    elif store_path:
         store.save_local(store_path)
 
     return store
 
 
 async def get_retriever(keywords: List[str], page: int):
+    # document_loader -> index_pool 反过来依赖本模块的持久化函数，这里延迟导入避免循环引用
+    from bili_server.document_loader import DocumentLoader
+
     loader = DocumentLoader()
     docs = await loader.get_docs(keywords=keywords, page=page)
     vector_store = await create_vector_store(docs)
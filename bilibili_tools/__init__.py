@@ -1,2 +1,7 @@
-from . import get_bilibi
+import sys
+from pathlib import Path
+
+# 内置的 bilibili_api 以顶层包名导入，将本目录添加到 Python 路径中
+sys.path.insert(0, str(Path(__file__).parent))
 
+from . import get_bilibi
@@ -12,6 +12,7 @@ import httpx
 from .utils.utils import get_api, raise_for_statement
 from .utils.credential import Credential
 from .utils.network import Api, HEADERS
+from .utils.paginator import PagePaginator
 
 API_USER = get_api("user")
 API = get_api("channel-series")
@@ -129,6 +130,30 @@ class ChannelSeries:
         else:
             return await self.owner.get_channel_videos_series(self.id_, sort, pn, ps)
 
+    def iter_videos(
+        self, sort: ChannelOrder = ChannelOrder.DEFAULT, ps: int = 100, **kwargs
+    ) -> PagePaginator:
+        """
+        逐个获取合集视频，自动翻页
+
+        Args:
+            sort(ChannelOrder): 排序方式
+
+            ps(int)           : 每一页显示的视频数量
+
+            **kwargs: limit, max_pages, stop 等，见 `Paginator`
+
+        Returns:
+            PagePaginator: 产出 `archives` 中每个视频的异步迭代器
+        """
+        return PagePaginator(
+            lambda pn: self.get_videos(sort, pn, ps),
+            items=lambda page: page.get("archives"),
+            ps=ps,
+            total=lambda page: (page.get("page") or {}).get("total"),
+            **kwargs,
+        )
+
 
 async def create_channel_series(
     name: str,
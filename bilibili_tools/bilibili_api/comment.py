@@ -18,6 +18,7 @@ from typing import Union, Optional
 from .utils.utils import get_api
 from .utils.credential import Credential
 from .utils.network import Api
+from .utils.paginator import CursorPaginator
 from .exceptions.ArgsException import ArgsException
 
 API = get_api("common")
@@ -467,3 +468,33 @@ async def get_comments_lazy(
         "web_location": "1315875",
     }
     return await Api(**api, credential=credential).update_params(**params).result
+
+
+def iter_comments_lazy(
+    oid: int,
+    type_: CommentResourceType,
+    order: OrderType = OrderType.TIME,
+    credential: Union[Credential, None] = None,
+    **kwargs,
+) -> CursorPaginator:
+    """
+    逐条获取资源评论，自动按游标翻页。
+
+    Args:
+        oid        (int)                 : 资源 ID。
+
+        type_      (CommentsResourceType): 资源类枚举。
+
+        order      (OrderType, optional) : 排序方式枚举. Defaults to OrderType.TIME.
+
+        credential (Credential, optional): 凭据。Defaults to None.
+
+        **kwargs: offset, limit, max_pages, stop 等，见 `CursorPaginator`
+
+    Returns:
+        CursorPaginator: 产出 `replies` 中每条评论的异步迭代器
+    """
+    return CursorPaginator(
+        lambda offset: get_comments_lazy(oid, type_, offset, order, credential=credential),
+        **kwargs,
+    )
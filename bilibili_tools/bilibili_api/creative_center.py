@@ -14,6 +14,7 @@ from .video_zone import VideoZoneTypes
 from .utils.utils import get_api
 from .utils.credential import Credential
 from .utils.network import Api
+from .utils.paginator import PagePaginator
 
 API = get_api("creative_center")
 
@@ -855,6 +856,47 @@ async def get_danmakus(
     return await Api(**api, credential=credential).update_params(**params).result
 
 
+def iter_danmakus(
+    credential: Credential,
+    oid: int,
+    ps: int = 50,
+    limit: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    stop=None,
+    prefetch: bool = True,
+    rate: Optional[float] = None,
+    **kwargs,
+) -> PagePaginator:
+    """
+    逐条搜索弹幕，自动翻页
+
+    Args:
+        credential (Credential): Credential 凭据
+
+        oid (int): 稿件oid
+
+        ps (int): 每页项数。
+
+        limit, max_pages, stop, prefetch, rate: 见 `Paginator`
+
+        **kwargs: 筛选条件，同 `get_danmakus`
+
+    Returns:
+        PagePaginator: 产出 `result` 中每条弹幕的异步迭代器
+    """
+    return PagePaginator(
+        lambda pn: get_danmakus(credential, oid, pn=pn, ps=ps, **kwargs),
+        items=lambda page: page.get("result"),
+        ps=ps,
+        total=lambda page: (page.get("page") or {}).get("total"),
+        limit=limit,
+        max_pages=max_pages,
+        stop=stop,
+        prefetch=prefetch,
+        rate=rate,
+    )
+
+
 async def del_danmaku(
     credential: Credential, oid: int, dmids: Union[int, List[int]]
 ) -> dict:
@@ -12,6 +12,7 @@ from .video import Video
 from .utils.utils import join, get_api, raise_for_statement
 from .utils.credential import Credential
 from .utils.network import Api
+from .utils.paginator import PagePaginator
 from .exceptions.ArgsException import ArgsException
 
 API = get_api("favorite-list")
@@ -272,6 +273,34 @@ async def get_video_favorite_list_content(
     return await Api(**api, credential=credential).update_params(**params).result
 
 
+def iter_video_favorite_list_content(
+    media_id: int,
+    keyword: Union[str, None] = None,
+    order: FavoriteListContentOrder = FavoriteListContentOrder.MTIME,
+    tid: int = 0,
+    mode: SearchFavoriteListMode = SearchFavoriteListMode.ONLY,
+    credential: Union[Credential, None] = None,
+    **kwargs,
+) -> PagePaginator:
+    """
+    逐条获取视频收藏夹内容，自动翻页。参数同 `get_video_favorite_list_content`。
+
+    Args:
+        **kwargs: limit, max_pages, stop 等，见 `Paginator`
+
+    Returns:
+        PagePaginator: 产出 `medias` 中每个视频的异步迭代器
+    """
+    return PagePaginator(
+        lambda pn: get_video_favorite_list_content(
+            media_id, pn, keyword, order, tid, mode, credential=credential
+        ),
+        items=lambda page: page.get("medias"),
+        has_more=lambda page: page.get("has_more", False),
+        **kwargs,
+    )
+
+
 async def get_topic_favorite_list(
     page: int = 1, credential: Union[None, Credential] = None
 ) -> dict:
@@ -60,6 +60,171 @@ wbi_retry_times: int = 3
 WBI请求重试次数上限设置, 默认为3次
 """
 
+cache_backend = None
+"""
+共享缓存后端，默认为 None（缓存仅保存在当前进程内）
+
+需提供 `get(key)`、`set(key, value, ttl=None)`、`delete(key)` 三个方法，
+设置后 WBI 混合密钥和 buvid3 等缓存会写入该后端，供多个进程或多台机器共享。
+异步请求中优先调用后端的 `aget`、`aset`，没有时在线程中调用同步方法，不阻塞事件循环。
+
+e.x.:
+``` python
+from bilibili_api import settings
+from bili_server.cache import get_cache
+settings.cache_backend = get_cache("bilibili_api")
+```
+"""
+
+wbi_key_ttl: float = 3600.0
+"""
+WBI 混合密钥的有效期（秒）
+"""
+
+buvid_ttl: float = 86400.0
+"""
+buvid3 / buvid4 的有效期（秒）
+"""
+
+key_cache_path: str = ""
+"""
+WBI 混合密钥、buvid3、bili_ticket 等鉴权材料的本地缓存文件路径，默认为空（不写文件）
+
+设置后同一台机器上的多个进程共享这些材料，刷新时加文件锁，避免每个进程启动时都重新获取。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.key_cache_path = "/tmp/bilibili_api_keys.json"
+```
+"""
+
+key_refresh_ahead: float = 300.0
+"""
+鉴权材料距过期不足该秒数时在后台提前刷新，请求继续使用当前材料
+"""
+
+response_cache: bool = False
+"""
+是否启用 GET 接口响应缓存，默认为 False
+
+开启后，声明了缓存有效期的 GET 接口（`data/api/*.json` 中的 `cache_ttl` 字段，
+或 `response_cache_ttls` 中的覆盖值）的结果会按 (url, 方法, 参数, 凭据) 缓存，
+有效期内的相同请求不再访问网络。设置了 `cache_backend` 时缓存同时写入共享后端。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.response_cache = True
+```
+"""
+
+response_cache_size: int = 1024
+"""
+进程内响应缓存的最大条目数，超出后淘汰最久未使用的条目
+"""
+
+response_cache_ttls: dict = {}
+"""
+按接口 url 覆盖响应缓存有效期（秒），0 表示该接口不缓存
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.response_cache_ttls["https://api.bilibili.com/x/web-interface/view"] = 60
+```
+"""
+
+singleflight: bool = False
+"""
+是否合并并发的相同 GET 请求，默认为 False
+
+开启后，同一时刻 url、参数和凭据都相同的多个异步 GET 请求只发出一次，
+所有调用方共享同一个结果；请求出错时所有调用方都收到该异常。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.singleflight = True
+```
+"""
+
+rate_limit: bool = False
+"""
+是否启用请求限速，默认为 False
+
+开启后每个请求先从所属域名（以及所属接口组）的令牌桶取得令牌再发出。
+遇到风控（-412、-352 等返回码，或 HTTP 412 / 429）时对应令牌桶自动降速并暂停一段时间，
+之后逐步恢复到配置的速率。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.rate_limit = True
+settings.rate_limit_hosts["api.bilibili.com"] = (4.0, 8)
+```
+"""
+
+rate_limit_default: tuple = (5.0, 10)
+"""
+未单独配置的域名使用的限速：(每秒请求数, 突发容量)
+"""
+
+rate_limit_hosts: dict = {}
+"""
+按域名配置限速：{域名: (每秒请求数, 突发容量)}
+"""
+
+rate_limit_groups: dict = {
+    "https://api.bilibili.com/x/web-interface/wbi/search": (1.0, 3),
+    "https://api.bilibili.com/x/v2/reply": (2.0, 4),
+    "https://api.bilibili.com/x/v2/dm": (3.0, 6),
+}
+"""
+按接口组（url 前缀）额外限速：{url 前缀: (每秒请求数, 突发容量)}，与域名限速同时生效
+"""
+
+rate_limit_backoff: float = 0.5
+"""
+遇到风控时速率乘以的系数
+"""
+
+rate_limit_min_rate: float = 0.2
+"""
+降速的下限（每秒请求数）
+"""
+
+rate_limit_recovery: float = 0.1
+"""
+每个恢复周期内无风控时恢复的速率，占配置速率的比例
+"""
+
+rate_limit_recovery_interval: float = 10.0
+"""
+恢复周期（秒）
+"""
+
+rate_limit_cooldown: float = 5.0
+"""
+遇到风控后暂停请求的时间（秒），连续风控时逐次翻倍，上限为 `rate_limit_max_cooldown`
+"""
+
+rate_limit_max_cooldown: float = 120.0
+"""
+风控暂停时间的上限（秒）
+"""
+
+batch_concurrency: int = 8
+"""
+`Api.batch` / `Api.batch_iter` 未指定 concurrency 时同时在途的请求数上限
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.batch_concurrency = 4
+```
+"""
+
 logger = logging.getLogger("request")
 if not logger.handlers:
     logger.setLevel(logging.INFO)
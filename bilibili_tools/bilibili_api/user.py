@@ -15,6 +15,7 @@ from .utils.utils import get_api, join, raise_for_statement
 from .utils.credential import Credential
 from .exceptions import ResponseCodeException
 from .utils.network import get_session, Api, HEADERS
+from .utils.paginator import PagePaginator, OffsetPaginator
 from .channel_series import ChannelOrder, ChannelSeries, ChannelSeriesType
 
 API = get_api("user")
@@ -485,6 +486,39 @@ class User:
             await Api(**api, credential=self.credential).update_params(**params).result
         )
 
+    def iter_videos(
+        self,
+        tid: int = 0,
+        ps: int = 30,
+        keyword: str = "",
+        order: VideoOrder = VideoOrder.PUBDATE,
+        **kwargs,
+    ) -> PagePaginator:
+        """
+        逐条获取用户投稿视频，自动翻页。
+
+        Args:
+            tid     (int, optional)       : 分区 ID. Defaults to 0（全部）.
+
+            ps      (int, optional)       : 每一页的视频数. Defaults to 30.
+
+            keyword (str, optional)       : 搜索关键词. Defaults to "".
+
+            order   (VideoOrder, optional): 排序方式. Defaults to VideoOrder.PUBDATE
+
+            **kwargs: limit, max_pages, stop 等，见 `Paginator`
+
+        Returns:
+            PagePaginator: 产出 `list.vlist` 中每个视频的异步迭代器
+        """
+        return PagePaginator(
+            lambda pn: self.get_videos(tid, pn, ps, keyword, order),
+            items=lambda page: (page.get("list") or {}).get("vlist"),
+            ps=ps,
+            total=lambda page: (page.get("page") or {}).get("count"),
+            **kwargs,
+        )
+
     async def get_media_list(
         self,
         oid: Union[int, None] = None,
@@ -668,6 +702,24 @@ class User:
         )
         return data
 
+    def iter_dynamics_new(self, **kwargs) -> OffsetPaginator:
+        """
+        逐条获取用户动态，自动按 offset 翻页。
+
+        Args:
+            **kwargs: limit, max_pages, stop 等，见 `Paginator`
+
+        Returns:
+            OffsetPaginator: 产出 `items` 中每条动态的异步迭代器
+        """
+        return OffsetPaginator(
+            self.get_dynamics_new,
+            items=lambda page: page.get("items"),
+            next_offset=lambda page: page.get("offset"),
+            has_more=lambda page: page.get("has_more", False),
+            **kwargs,
+        )
+
     async def get_subscribed_bangumi(
         self,
         type_: BangumiType = BangumiType.BANGUMI,
@@ -785,6 +837,28 @@ class User:
             await Api(**api, credential=self.credential).update_params(**params).result
         )
 
+    def iter_followers(self, ps: int = 100, desc: bool = True, **kwargs) -> PagePaginator:
+        """
+        逐条获取用户粉丝，自动翻页（与 `get_followers` 相同，不是自己只能访问前 5 页）
+
+        Args:
+            ps   (int, optional) : 每页的数据量. Defaults to 100.
+
+            desc (bool, optional): 倒序排序. Defaults to True.
+
+            **kwargs: limit, max_pages, stop 等，见 `Paginator`
+
+        Returns:
+            PagePaginator: 产出 `list` 中每个粉丝的异步迭代器
+        """
+        return PagePaginator(
+            lambda pn: self.get_followers(pn, ps, desc),
+            items=lambda page: page.get("list"),
+            ps=ps,
+            total=lambda page: page.get("total"),
+            **kwargs,
+        )
+
     async def get_self_same_followers(self, pn: int = 1, ps: int = 50) -> dict:
         """
         获取用户与自己共同关注的 up 主
@@ -4,23 +4,33 @@ bilibili_api.bili_server.network
 与网络请求相关的模块。能对会话进行管理（复用 TCP 连接）。
 """
 
+import os
 import re
+import copy
 import json
 import time
 import atexit
 import asyncio
+import threading
 import hashlib
 import hmac
 from functools import reduce
-from urllib.parse import urlencode
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlencode, urlparse
 from dataclasses import field, dataclass
-from typing import Any, Dict, Union, Coroutine, Type
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Tuple, Union, Coroutine, Type
 from inspect import iscoroutinefunction as isAsync
 from urllib.parse import quote
 
 import httpx
 import aiohttp
 
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，本地缓存文件不加锁
+    fcntl = None
+
 from .sync import sync
 from .. import settings
 from .utils import get_api
@@ -32,8 +42,6 @@ __httpx_session_pool: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
 __aiohttp_session_pool: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
 __httpx_sync_session: httpx.Client = None
 last_proxy = ""
-wbi_mixin_key = ""
-buvid3 = ""
 
 # 获取密钥时的申必数组
 OE = [
@@ -110,6 +118,726 @@ HEADERS = {
 API = get_api("credential")
 
 
+def _cache_get(key: str) -> Any:
+    """
+    从 settings.cache_backend 读取共享缓存，未配置或读取失败时返回 None
+    """
+    if settings.cache_backend is None:
+        return None
+    try:
+        return settings.cache_backend.get(key)
+    except Exception as e:
+        settings.logger.warning("读取共享缓存失败: %s", e)
+        return None
+
+
+def _cache_set(key: str, value: Any, ttl: Union[float, None] = None) -> None:
+    """
+    写入共享缓存，未配置时不做任何事
+    """
+    if settings.cache_backend is None:
+        return
+    try:
+        settings.cache_backend.set(key, value, ttl=ttl)
+    except Exception as e:
+        settings.logger.warning("写入共享缓存失败: %s", e)
+
+
+async def _cache_get_async(key: str) -> Any:
+    """
+    `_cache_get` 的异步版本：后端提供 `aget` 时直接调用，否则在线程中读取，不阻塞事件循环
+    """
+    if settings.cache_backend is None:
+        return None
+    try:
+        if hasattr(settings.cache_backend, "aget"):
+            return await settings.cache_backend.aget(key)
+        return await asyncio.to_thread(settings.cache_backend.get, key)
+    except Exception as e:
+        settings.logger.warning("读取共享缓存失败: %s", e)
+        return None
+
+
+async def _cache_set_async(key: str, value: Any, ttl: Union[float, None] = None) -> None:
+    """
+    `_cache_set` 的异步版本
+    """
+    if settings.cache_backend is None:
+        return
+    try:
+        if hasattr(settings.cache_backend, "aset"):
+            await settings.cache_backend.aset(key, value, ttl=ttl)
+        else:
+            await asyncio.to_thread(settings.cache_backend.set, key, value, ttl=ttl)
+    except Exception as e:
+        settings.logger.warning("写入共享缓存失败: %s", e)
+
+
+def _cache_delete(key: str) -> None:
+    """
+    删除共享缓存。在事件循环中调用时放到线程中执行，不等待完成
+    """
+    if settings.cache_backend is None:
+        return
+
+    def delete():
+        try:
+            settings.cache_backend.delete(key)
+        except Exception as e:
+            settings.logger.warning("删除共享缓存失败: %s", e)
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        delete()
+    else:
+        loop.run_in_executor(None, delete)
+
+
+class KeyManager:
+    """
+    WBI 混合密钥、buvid3、bili_ticket 等鉴权材料的管理器。
+
+    - 同一事件循环内同一材料同时只刷新一次，其余协程等待刷新结果；
+    - 距过期不足 `settings.key_refresh_ahead` 秒时在后台提前刷新，请求继续使用当前材料；
+    - 材料写入 `settings.key_cache_path`（多进程共享，刷新时加文件锁）与 `settings.cache_backend`，
+      其他进程已刷新过的材料直接读取，不再重复请求。
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, dict] = {}
+        self._locks: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Lock] = {}
+        self._thread_locks: Dict[str, threading.Lock] = {}
+        self._background: Dict[str, asyncio.Task] = {}
+        self.fetches = Counter()
+        self.invalidations = Counter()
+
+    @staticmethod
+    def _fresh(entry: Union[dict, None], margin: float = 0.0) -> bool:
+        return isinstance(entry, dict) and entry.get("expires_at", 0) - margin > time.time()
+
+    def _read_disk(self) -> dict:
+        if not settings.key_cache_path:
+            return {}
+        try:
+            with open(settings.key_cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            settings.logger.warning("读取鉴权材料缓存文件失败: %s", e)
+            return {}
+
+    def _write_disk(self, name: str, entry: Union[dict, None]) -> None:
+        if not settings.key_cache_path:
+            return
+        data = self._read_disk()
+        if entry is None:
+            data.pop(name, None)
+        else:
+            data[name] = entry
+        temp_path = f"{settings.key_cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, settings.key_cache_path)
+        except OSError as e:
+            settings.logger.warning("写入鉴权材料缓存文件失败: %s", e)
+
+    def _load_local(self, name: str) -> Union[dict, None]:
+        """
+        依次从内存、本地文件读取未过期的材料
+        """
+        entry = self._entries.get(name)
+        if self._fresh(entry):
+            return entry
+        entry = self._read_disk().get(name)
+        if self._fresh(entry):
+            self._entries[name] = entry
+            return entry
+        return None
+
+    def _load_shared(self, name: str, entry: Union[dict, None]) -> Union[dict, None]:
+        if self._fresh(entry):
+            self._entries[name] = entry
+            return entry
+        return None
+
+    def _load(self, name: str) -> Union[dict, None]:
+        """
+        依次从内存、本地文件、共享缓存读取未过期的材料
+        """
+        entry = self._load_local(name)
+        if entry is None:
+            entry = self._load_shared(name, _cache_get(f"key_material:{name}"))
+        return entry
+
+    async def _load_async(self, name: str) -> Union[dict, None]:
+        """
+        `_load` 的异步版本，读取共享缓存时不阻塞事件循环
+        """
+        entry = self._load_local(name)
+        if entry is None:
+            entry = self._load_shared(name, await _cache_get_async(f"key_material:{name}"))
+        return entry
+
+    def _store_local(self, name: str, value: Any, ttl: float) -> dict:
+        now = time.time()
+        entry = {"value": value, "expires_at": now + ttl, "fetched_at": now}
+        self._entries[name] = entry
+        self._write_disk(name, entry)
+        return entry
+
+    def _store(self, name: str, value: Any, ttl: float) -> dict:
+        entry = self._store_local(name, value, ttl)
+        _cache_set(f"key_material:{name}", entry, ttl)
+        return entry
+
+    async def _store_async(self, name: str, value: Any, ttl: float) -> dict:
+        entry = self._store_local(name, value, ttl)
+        await _cache_set_async(f"key_material:{name}", entry, ttl)
+        return entry
+
+    def _open_lock_file(self, name: str):
+        # 每种材料一个锁文件：刷新 wbi_mixin_key 时会嵌套获取 buvid3，共用一个锁会死锁
+        if not settings.key_cache_path or fcntl is None:
+            return None
+        try:
+            return open(f"{settings.key_cache_path}.{name}.lock", "a")
+        except OSError as e:
+            settings.logger.warning("打开鉴权材料锁文件失败: %s", e)
+            return None
+
+    @contextmanager
+    def _file_lock_sync(self, name: str):
+        lock_file = self._open_lock_file(name)
+        try:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+    def _lock(self, name: str) -> asyncio.Lock:
+        key = (asyncio.get_running_loop(), name)
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    async def _refresh(self, name: str, fetch: Callable, margin: float) -> dict:
+        async with self._lock(name):
+            # 等锁期间其他协程可能已经刷新
+            entry = await self._load_async(name)
+            if self._fresh(entry, margin):
+                return entry
+            lock_file = self._open_lock_file(name)
+            try:
+                if lock_file is not None:
+                    await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+                # 等文件锁期间其他进程可能已经刷新
+                entry = await self._load_async(name)
+                if self._fresh(entry, margin):
+                    return entry
+                value, ttl = await fetch()
+                self.fetches[name] += 1
+                return await self._store_async(name, value, ttl)
+            finally:
+                if lock_file is not None:
+                    lock_file.close()
+
+    def _refresh_in_background(self, name: str, fetch: Callable) -> None:
+        task = self._background.get(name)
+        if task is not None and not task.done():
+            return
+
+        async def run():
+            try:
+                await self._refresh(name, fetch, settings.key_refresh_ahead)
+            except Exception as e:
+                settings.logger.warning("后台刷新 %s 失败: %s", name, e)
+
+        self._background[name] = asyncio.get_running_loop().create_task(run())
+
+    async def get(self, name: str, fetch: Callable) -> Any:
+        """
+        获取材料，缺失或过期时刷新
+
+        Args:
+            name (str): 材料名称
+
+            fetch (Callable[[], Coroutine]): 获取新材料的函数，返回 (值, 有效期秒数)
+
+        Returns:
+            Any: 材料的值
+        """
+        entry = await self._load_async(name)
+        if entry is None:
+            entry = await self._refresh(name, fetch, 0.0)
+        elif not self._fresh(entry, settings.key_refresh_ahead):
+            self._refresh_in_background(name, fetch)
+        return entry["value"]
+
+    def get_sync(self, name: str, fetch: Callable) -> Any:
+        """
+        同步获取材料，缺失或过期时刷新
+
+        Args:
+            name (str): 材料名称
+
+            fetch (Callable[[], Tuple[Any, float]]): 获取新材料的函数，返回 (值, 有效期秒数)
+
+        Returns:
+            Any: 材料的值
+        """
+        entry = self._load(name)
+        if entry is None:
+            with self._thread_locks.setdefault(name, threading.Lock()), self._file_lock_sync(name):
+                entry = self._load(name)
+                if entry is None:
+                    value, ttl = fetch()
+                    self.fetches[name] += 1
+                    entry = self._store(name, value, ttl)
+        return entry["value"]
+
+    def invalidate(self, name: str, used: Any = None) -> None:
+        """
+        作废材料（本进程、本地文件与共享缓存）
+
+        Args:
+            name (str): 材料名称
+
+            used (Any, optional): 出错请求使用的值。当前值已与之不同（已被其他请求作废或刷新）时不作废. Defaults to None.
+        """
+        entry = self._entries.get(name)
+        if used is not None and (entry is None or entry["value"] != used):
+            return
+        self.invalidations[name] += 1
+        self._entries.pop(name, None)
+        self._write_disk(name, None)
+        _cache_delete(f"key_material:{name}")
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            name: {
+                "expires_in": round(entry["expires_at"] - now, 1),
+                "fetches": self.fetches[name],
+                "invalidations": self.invalidations[name],
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+key_manager = KeyManager()
+
+
+def get_key_manager_stats() -> dict:
+    """
+    获取各鉴权材料的剩余有效期、获取次数与作废次数
+
+    Returns:
+        dict: {材料名称: 统计信息}
+    """
+    return key_manager.stats()
+
+
+def _invalidate_wbi_key(args: tuple, error: Exception) -> None:
+    """
+    -403 时作废出错请求所用的 wbi_mixin_key
+
+    合并请求的等待方没有执行 `_prepare_request`，所用的密钥随异常的 `wbi_key` 属性带回。
+    请求没有使用 wbi 密钥时不作废，避免非 wbi 接口的 -403 把刚刷新的密钥作废。
+    """
+    used = getattr(error, "wbi_key", None) or (getattr(args[0], "_wbi_key", None) if args else None)
+    if used is None:
+        return
+    key_manager.invalidate("wbi_mixin_key", used)
+
+
+class ResponseCache:
+    """
+    进程内的 GET 接口响应缓存，按最近最少使用淘汰，条目数上限为 `settings.response_cache_size`。
+
+    设置了 `settings.cache_backend` 时，本进程未命中的条目会再到共享后端查找，写入时也同时写入共享后端。
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        读取缓存
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Tuple[bool, Any]: (是否命中, 结果的副本)
+        """
+        hit, value = self._get_local(key)
+        if hit:
+            return hit, value
+        return self._get_shared(key, _cache_get(f"response:{key}"))
+
+    async def aget(self, key: str) -> Tuple[bool, Any]:
+        """
+        `get` 的异步版本，读取共享后端时不阻塞事件循环
+        """
+        hit, value = self._get_local(key)
+        if hit:
+            return hit, value
+        return self._get_shared(key, await _cache_get_async(f"response:{key}"))
+
+    def _get_local(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(entry[1])
+            del self._entries[key]
+        return False, None
+
+    def _get_shared(self, key: str, value: Any) -> Tuple[bool, Any]:
+        if value is not None:
+            self.shared_hits += 1
+            expires_at, value = value
+            self._store(key, expires_at, value)
+            return True, copy.deepcopy(value)
+        self.misses += 1
+        return False, None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        写入缓存，结果为 None 时不缓存
+
+        Args:
+            key (str): 缓存键
+
+            value (Any): 接口结果
+
+            ttl (float): 有效期（秒）
+        """
+        entry = self._set_local(key, value, ttl)
+        if entry is not None:
+            _cache_set(f"response:{key}", entry, ttl)
+
+    async def aset(self, key: str, value: Any, ttl: float) -> None:
+        """
+        `set` 的异步版本，写入共享后端时不阻塞事件循环
+        """
+        entry = self._set_local(key, value, ttl)
+        if entry is not None:
+            await _cache_set_async(f"response:{key}", entry, ttl)
+
+    def _set_local(self, key: str, value: Any, ttl: float) -> Union[Tuple[float, Any], None]:
+        if value is None:
+            return None
+        expires_at = time.time() + ttl
+        value = copy.deepcopy(value)
+        self._store(key, expires_at, value)
+        return expires_at, value
+
+    def _store(self, key: str, expires_at: float, value: Any) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > max(settings.response_cache_size, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def get_response_cache_stats() -> dict:
+    """
+    获取响应缓存的命中统计
+
+    Returns:
+        dict: 条目数、命中数（本进程 / 共享后端）、未命中数、淘汰数与命中率
+    """
+    return response_cache.stats()
+
+
+def clear_response_cache() -> None:
+    """
+    清空本进程的响应缓存
+    """
+    response_cache.clear()
+
+
+class SingleFlight:
+    """
+    合并并发的相同请求：同一事件循环内同一请求键同时只执行一次，其余调用方等待并共享结果。
+
+    请求在独立的任务中执行，发起方被取消（如 `asyncio.wait_for` 超时）不影响其余等待方；
+    所有调用方都取消后才取消该任务。首个调用方拿到原始结果，其余调用方拿到副本；
+    请求出错时所有调用方都收到同一个异常。
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Tuple[asyncio.AbstractEventLoop, str], dict] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def _done(self, call_key: Tuple[asyncio.AbstractEventLoop, str], call: dict, task: asyncio.Task) -> None:
+        if self._calls.get(call_key) is call:
+            del self._calls[call_key]
+        if not task.cancelled():
+            # 没有等待方时避免 "exception was never retrieved" 警告
+            task.exception()
+
+    async def do(self, key: str, func) -> Any:
+        """
+        执行或加入一次请求
+
+        Args:
+            key (str): 请求键
+
+            func (Callable[[], Coroutine]): 发出请求的函数
+
+        Returns:
+            Any: 请求结果
+        """
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+        call = self._calls.get(call_key)
+        leader = call is None
+        if leader:
+            call = {"task": loop.create_task(func()), "waiters": 0}
+            self._calls[call_key] = call
+            call["task"].add_done_callback(lambda task: self._done(call_key, call, task))
+            self.executed += 1
+        else:
+            self.shared += 1
+
+        task = call["task"]
+        call["waiters"] += 1
+        try:
+            # shield: 单个调用方被取消时不取消共享的请求
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            call["waiters"] -= 1
+            if call["waiters"] == 0 and not task.done():
+                # 之后的相同请求重新发起，不加入正在取消的任务
+                if self._calls.get(call_key) is call:
+                    del self._calls[call_key]
+                task.cancel()
+            raise
+        call["waiters"] -= 1
+        return result if leader else copy.deepcopy(result)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "executed": self.executed, "shared": self.shared}
+
+
+singleflight = SingleFlight()
+
+
+def get_singleflight_stats() -> dict:
+    """
+    获取合并请求的统计
+
+    Returns:
+        dict: 进行中的请求数、实际发出的请求数与共享结果的调用数
+    """
+    return singleflight.stats()
+
+
+# 风控相关的返回码与 HTTP 状态码
+RISK_CONTROL_CODES = {-412, -352, -509, -799}
+RISK_CONTROL_STATUSES = {412, 429}
+
+
+class TokenBucket:
+    """
+    令牌桶，遇到风控时按乘性降速并暂停，之后按加性逐步恢复（AIMD）。
+
+    同一个桶可同时被协程（`acquire`）和线程（`acquire_sync`）使用。
+    """
+
+    def __init__(self, name: str, rate: float, burst: int) -> None:
+        """
+        Args:
+            name (str): 名称（域名或接口组前缀）
+
+            rate (float): 每秒请求数
+
+            burst (int): 突发容量
+        """
+        self.name = name
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_change = self.updated
+        self.strikes = 0
+        self.penalties = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        尝试取出一个令牌
+
+        Returns:
+            float: 需要等待的秒数，0 表示已取得令牌
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            # 距上次变化满一个恢复周期且无风控时，速率恢复一步
+            if self.rate < self.base_rate and now - self.last_change >= settings.rate_limit_recovery_interval:
+                self.rate = min(self.base_rate, self.rate + self.base_rate * settings.rate_limit_recovery)
+                self.last_change = now
+                if self.rate == self.base_rate:
+                    self.strikes = 0
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        while True:
+            delay = self._reserve()
+            if delay <= 0:
+                return
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self) -> None:
+        while True:
+            delay = self._reserve()
+            if delay <= 0:
+                return
+            self.waited += delay
+            time.sleep(delay)
+
+    def penalize(self) -> None:
+        """
+        遇到风控：降速、清空令牌并暂停，连续风控时暂停时间翻倍
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.penalties += 1
+            self.strikes += 1
+            self.rate = max(settings.rate_limit_min_rate, self.rate * settings.rate_limit_backoff)
+            self.tokens = 0.0
+            self.updated = now
+            self.last_change = now
+            cooldown = min(settings.rate_limit_max_cooldown, settings.rate_limit_cooldown * 2 ** (self.strikes - 1))
+            self.blocked_until = max(self.blocked_until, now + cooldown)
+        settings.logger.warning("%s 触发风控，降速至 %.2f 次/秒，暂停 %.1f 秒", self.name, self.rate, cooldown)
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 3),
+            "base_rate": self.base_rate,
+            "burst": self.burst,
+            "penalties": self.penalties,
+            "blocked_seconds": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+            "waited_seconds": round(self.waited, 1),
+        }
+
+
+class RateLimiter:
+    """
+    请求限速器：每个域名一个令牌桶，命中 `settings.rate_limit_groups` 的接口再经过所属接口组的令牌桶。
+
+    令牌桶在首次使用时按当前 settings 创建，修改配置后调用 `reset_rate_limiter` 生效。
+    """
+
+    def __init__(self) -> None:
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, name: str, limit: tuple) -> TokenBucket:
+        with self._lock:
+            if name not in self.buckets:
+                self.buckets[name] = TokenBucket(name, *limit)
+            return self.buckets[name]
+
+    def buckets_for(self, url: str) -> List[TokenBucket]:
+        host = urlparse(url).netloc
+        buckets = [self._bucket(host, settings.rate_limit_hosts.get(host, settings.rate_limit_default))]
+        for prefix, limit in settings.rate_limit_groups.items():
+            if url.startswith(prefix):
+                buckets.append(self._bucket(prefix, limit))
+        return buckets
+
+    async def acquire(self, url: str) -> None:
+        for bucket in self.buckets_for(url):
+            await bucket.acquire()
+
+    def acquire_sync(self, url: str) -> None:
+        for bucket in self.buckets_for(url):
+            bucket.acquire_sync()
+
+    def penalize(self, url: str) -> None:
+        for bucket in self.buckets_for(url):
+            bucket.penalize()
+
+    def stats(self) -> dict:
+        return {name: bucket.stats() for name, bucket in self.buckets.items()}
+
+
+rate_limiter = RateLimiter()
+
+
+def _is_risk_control(e: Exception) -> bool:
+    """
+    判断异常是否为风控响应
+    """
+    if isinstance(e, ResponseCodeException):
+        return e.code in RISK_CONTROL_CODES
+    if isinstance(e, NetworkException):
+        return e.status in RISK_CONTROL_STATUSES
+    return False
+
+
+def get_rate_limiter_stats() -> dict:
+    """
+    获取各令牌桶的当前速率、风控次数与累计等待时间
+
+    Returns:
+        dict: {域名或接口组: 统计信息}
+    """
+    return rate_limiter.stats()
+
+
+def reset_rate_limiter() -> None:
+    """
+    丢弃现有令牌桶，下次请求时按当前 settings 重新创建
+    """
+    global rate_limiter
+    rate_limiter = RateLimiter()
+
+
 def retry_sync(times: int = 3):
     """
     重试装饰器
@@ -138,8 +866,7 @@ def retry_sync(times: int = 3):
                 except ResponseCodeException as e:
                     # -403 时尝试重新获取 wbi_mixin_key 可能过期了
                     if e.code == -403:
-                        global wbi_mixin_key
-                        wbi_mixin_key = ""
+                        _invalidate_wbi_key(args, e)
                         continue
                     # 不是 -403 错误直接报错
                     raise
@@ -178,8 +905,7 @@ def retry(times: int = 3):
                 except ResponseCodeException as e:
                     # -403 时尝试重新获取 wbi_mixin_key 可能过期了
                     if e.code == -403:
-                        global wbi_mixin_key
-                        wbi_mixin_key = ""
+                        _invalidate_wbi_key(args, e)
                         continue
                     # 不是 -403 错误直接报错
                     raise
@@ -223,6 +949,8 @@ class Api:
         params (dict, optional): 请求参数. Defaults to {}.
 
         credential (Credential, optional): 凭据. Defaults to Credential().
+
+        cache_ttl (float, optional): 开启 `settings.response_cache` 时 GET 结果的缓存有效期（秒），0 为不缓存. Defaults to 0.
     """
 
     url: str
@@ -238,6 +966,7 @@ class Api:
     files: dict = field(default_factory=dict)
     headers: dict = field(default_factory=dict)
     credential: Credential = field(default_factory=Credential)
+    cache_ttl: float = 0
 
     def __post_init__(self) -> None:
         self.method = self.method.upper()
@@ -342,6 +1071,28 @@ class Api:
                 new_data[key] = value
         self.params, self.data = new_params, new_data
 
+    def _response_cache_ttl(self) -> float:
+        return settings.response_cache_ttls.get(self.url, self.cache_ttl)
+
+    def _request_key(self, kwargs: dict, **flags) -> Union[str, None]:
+        """
+        计算请求键，用于响应缓存与合并相同请求；非 GET 或带额外请求配置时返回 None
+
+        请求键由 url、方法、排序后的参数（不含 wbi 签名字段）、凭据身份和返回格式组成。
+        """
+        if self.method != "GET" or kwargs:
+            return None
+        params = sorted(
+            (key, str(value)) for key, value in self.params.items() if key not in ("w_rid", "wts")
+        )
+        identity = (
+            hashlib.sha1(self.credential.sessdata.encode("utf-8")).hexdigest()
+            if self.credential.sessdata
+            else ""
+        )
+        raw = json.dumps([self.method, self.url, params, identity, flags], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
     def _prepare_request_sync(self, **kwargs) -> dict:
         """
         准备请求的配置参数
@@ -368,10 +1119,10 @@ class Api:
             self.params["callback"] = "callback"
 
         if self.wbi:
-            global wbi_mixin_key
-            if wbi_mixin_key == "":
-                wbi_mixin_key = get_mixin_key_sync()
-            enc_wbi(self.params, wbi_mixin_key)
+            self._wbi_key = key_manager.get_sync(
+                "wbi_mixin_key", lambda: (get_mixin_key_sync(), settings.wbi_key_ttl)
+            )
+            enc_wbi(self.params, self._wbi_key)
 
         # 自动添加 csrf
         if (
@@ -385,10 +1136,8 @@ class Api:
         cookies = self.credential.get_cookies()
 
         if self.credential.buvid3 is None:
-            global buvid3
-            if buvid3 == "" and self.url != API["info"]["spi"]["url"]:
-                buvid3 = get_spi_buvid_sync()["b_3"]
-            cookies["buvid3"] = buvid3
+            if self.url != API["info"]["spi"]["url"]:
+                cookies["buvid3"] = get_spi_buvid_sync()["b_3"]
         else:
             cookies["buvid3"] = self.credential.buvid3
         # cookies["Domain"] = ".bilibili.com"
@@ -437,10 +1186,8 @@ class Api:
             self.params["callback"] = "callback"
 
         if self.wbi:
-            global wbi_mixin_key
-            if wbi_mixin_key == "":
-                wbi_mixin_key = await get_mixin_key(credential=self.credential)
-            enc_wbi(self.params, wbi_mixin_key)
+            self._wbi_key = await get_wbi_mixin_key(self.credential)
+            enc_wbi(self.params, self._wbi_key)
 
         # 自动添加 csrf
         if (
@@ -514,6 +1261,29 @@ class Api:
             接口未返回数据时，返回 None，否则返回该接口提供的 data 或 result 字段的数据。
         """
         self._prepare_params_data()
+        cache_key = None
+        if settings.response_cache and self._response_cache_ttl():
+            cache_key = self._request_key(kwargs, raw=raw)
+        if cache_key is not None:
+            hit, cached = response_cache.get(cache_key)
+            if hit:
+                return cached
+        if settings.rate_limit:
+            rate_limiter.acquire_sync(self.url)
+        try:
+            real_data = self._request_sync(raw=raw, **kwargs)
+        except (NetworkException, ResponseCodeException) as e:
+            if settings.rate_limit and _is_risk_control(e):
+                rate_limiter.penalize(self.url)
+            raise
+        if cache_key is not None:
+            response_cache.set(cache_key, real_data, self._response_cache_ttl())
+        return real_data
+
+    def _request_sync(self, raw: bool = False, **kwargs) -> Union[int, str, dict]:
+        """
+        实际发送同步请求并处理响应，不经过响应缓存与限速
+        """
         config = self._prepare_request_sync(**kwargs)
         session = get_httpx_sync_session()
         session.cookies = config.pop("cookies")
@@ -522,10 +1292,7 @@ class Api:
             resp.raise_for_status()
         except httpx.HTTPStatusError as e:
             raise NetworkException(resp.status_code, str(resp.status_code))
-        real_data = self._process_response(
-            resp, self._get_resp_text_sync(resp), raw=raw
-        )
-        return real_data
+        return self._process_response(resp, self._get_resp_text_sync(resp), raw=raw)
 
     @retry(times=settings.wbi_retry_times)
     async def request(self, raw: bool = False, byte: bool = False, **kwargs) -> Union[int, str, dict]:
@@ -536,6 +1303,39 @@ class Api:
             接口未返回数据时，返回 None，否则返回该接口提供的 data 或 result 字段的数据。
         """
         self._prepare_params_data()
+        key = self._request_key(kwargs, raw=raw, byte=byte)
+        cache_key = key if settings.response_cache and self._response_cache_ttl() else None
+        if cache_key is not None:
+            hit, cached = await response_cache.aget(cache_key)
+            if hit:
+                return cached
+        if settings.singleflight and key is not None:
+            real_data = await singleflight.do(key, lambda: self._request(raw=raw, byte=byte, **kwargs))
+        else:
+            real_data = await self._request(raw=raw, byte=byte, **kwargs)
+        if cache_key is not None:
+            await response_cache.aset(cache_key, real_data, self._response_cache_ttl())
+        return real_data
+
+    async def _request(self, raw: bool = False, byte: bool = False, **kwargs) -> Union[int, str, dict]:
+        """
+        经过限速发送请求，遇到风控时通知限速器降速，出错时在异常上记录所用的 wbi 密钥
+        """
+        if settings.rate_limit:
+            await rate_limiter.acquire(self.url)
+        try:
+            return await self._send(raw=raw, byte=byte, **kwargs)
+        except (NetworkException, ResponseCodeException) as e:
+            if settings.rate_limit and _is_risk_control(e):
+                rate_limiter.penalize(self.url)
+            # 合并请求时等待方共享该异常，带上实际使用的 wbi 密钥
+            e.wbi_key = getattr(self, "_wbi_key", None)
+            raise
+
+    async def _send(self, raw: bool = False, byte: bool = False, **kwargs) -> Union[int, str, dict]:
+        """
+        实际发送请求并处理响应，不经过响应缓存与限速
+        """
         config = await self._prepare_request(**kwargs)
         session: Union[httpx.AsyncClient, aiohttp.ClientSession]
         # 判断http_client的类型
@@ -620,6 +1420,111 @@ class Api:
             real_data = resp_data.get("result")
         return real_data
 
+    @staticmethod
+    async def _run_batch_item(item: Any, kwargs: dict) -> Any:
+        if isinstance(item, Api):
+            return await item.request(**kwargs)
+        if callable(item):
+            item = item()
+        return await item
+
+    @staticmethod
+    async def batch_iter(
+        apis: Iterable[Any],
+        concurrency: Union[int, None] = None,
+        rate: Union[float, None] = None,
+        **kwargs,
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        并发执行一组请求，按完成顺序逐个产出结果
+
+        单个请求出错不影响其余请求，异常作为该项的结果产出。
+        每个请求仍经过全局限速（`settings.rate_limit`）、响应缓存与合并相同请求。
+
+        Args:
+            apis (Iterable[Api | Awaitable | Callable[[], Awaitable]]): 要执行的请求。
+                Api 对象调用 `request(**kwargs)`，其余为协程或返回协程的函数
+
+            concurrency (int, optional): 同时在途的请求数上限. Defaults to `settings.batch_concurrency`.
+
+            rate (float, optional): 本批请求的额外限速（每秒请求数）. Defaults to None.
+
+            **kwargs: 传给每个 `Api.request` 的参数，如 `byte=True`
+
+        Yields:
+            Tuple[int, Any]: (在输入中的下标, 结果或异常)
+        """
+        items = list(apis)
+        if not items:
+            return
+        concurrency = max(1, min(concurrency or settings.batch_concurrency, len(items)))
+        bucket = TokenBucket("batch", rate, 1) if rate else None
+        pending = iter(enumerate(items))
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def worker() -> None:
+            # 各 worker 共用同一个迭代器取下一项，先完成的先取
+            for index, item in pending:
+                try:
+                    if bucket is not None:
+                        await bucket.acquire()
+                    result = await Api._run_batch_item(item, kwargs)
+                except Exception as e:
+                    result = e
+                except BaseException as e:
+                    if asyncio.iscoroutine(item):
+                        item.close()
+                    finished.put_nowait((index, e))
+                    raise
+                finished.put_nowait((index, result))
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for _ in range(len(items)):
+                index, result = await finished.get()
+                if isinstance(result, BaseException) and not isinstance(result, Exception):
+                    raise result
+                yield index, result
+        finally:
+            for task in workers:
+                task.cancel()
+            # 提前结束时关闭尚未开始的协程，避免 "never awaited" 警告
+            for _, item in pending:
+                if asyncio.iscoroutine(item):
+                    item.close()
+
+    @staticmethod
+    async def batch(
+        apis: Iterable[Any],
+        concurrency: Union[int, None] = None,
+        rate: Union[float, None] = None,
+        return_exceptions: bool = True,
+        **kwargs,
+    ) -> List[Any]:
+        """
+        并发执行一组请求，按输入顺序返回结果
+
+        参数含义同 `Api.batch_iter`。
+
+        Args:
+            return_exceptions (bool, optional): 为 True 时出错的项以异常对象作为结果，
+                为 False 时遇到第一个异常即取消其余请求并抛出. Defaults to True.
+
+        Returns:
+            List[Any]: 与输入一一对应的结果
+        """
+        items = list(apis)
+        results: List[Any] = [None] * len(items)
+        iterator = Api.batch_iter(items, concurrency=concurrency, rate=rate, **kwargs)
+        try:
+            async for index, result in iterator:
+                if isinstance(result, Exception) and not return_exceptions:
+                    raise result
+                results[index] = result
+        finally:
+            await iterator.aclose()
+        return results
+
     @classmethod
     def from_file(cls, path: str, credential: Union[Credential, None] = None):
         """
@@ -656,22 +1561,28 @@ async def check_valid(credential: Credential) -> bool:
 
 async def get_spi_buvid() -> dict:
     """
-    获取 buvid3 / buvid4
+    获取 buvid3 / buvid4，有效期内复用已获取的值
 
     Returns:
         dict: 账号相关信息
     """
-    return await Api(**API["info"]["spi"]).result
+
+    async def fetch():
+        return await Api(**API["info"]["spi"]).request(), settings.buvid_ttl
+
+    return await key_manager.get("spi", fetch)
 
 
 def get_spi_buvid_sync() -> dict:
     """
-    同步获取 buvid3 / buvid4
+    同步获取 buvid3 / buvid4，有效期内复用已获取的值
 
     Returns:
         dict: 账号相关信息
     """
-    return Api(**API["info"]["spi"]).result_sync
+    return key_manager.get_sync(
+        "spi", lambda: (Api(**API["info"]["spi"]).request_sync(), settings.buvid_ttl)
+    )
 
 
 async def active_buvid(buvid3: str, buvid4: str) -> dict:
@@ -773,6 +1684,23 @@ async def get_mixin_key(credential: Credential = Credential()) -> str:
     return le[:32]
 
 
+async def get_wbi_mixin_key(credential: Union[Credential, None] = None) -> str:
+    """
+    获取当前的混合密钥，有效期内复用，多个协程同时缺失时只请求一次
+
+    Args:
+        credential (Credential, Optional): 凭据类. Defaults to None
+
+    Returns:
+        str: 混合密钥
+    """
+
+    async def fetch():
+        return await get_mixin_key(credential=credential or Credential()), settings.wbi_key_ttl
+
+    return await key_manager.get("wbi_mixin_key", fetch)
+
+
 def enc_wbi(params: dict, mixin_key: str):
     """
     更新请求参数
@@ -817,24 +1745,28 @@ def hmac_sha256(key: str, message: str) -> str:
 
 async def get_bili_ticket() -> str:
     """
-    获取 bili_ticket，但目前没用到，暂时不启用
+    获取 bili_ticket，有效期内复用，但目前没用到，暂时不启用
 
     https://github.com/SocialSisterYi/bilibili-API-collect/issues/903
 
     Returns:
         str: bili_ticket
     """
-    o = hmac_sha256("XgwSnGZ1p", f"ts{int(time.time())}")
-    url = "https://api.bilibili.com/bapis/bilibili.api.ticket.v1.Ticket/GenWebTicket"
-    params = {
-        "key_id": "ec02",
-        "hexsign": o,
-        "context[ts]": f"{int(time.time())}",
-        "csrf": "",
-    }
-    return (
-        await Api(method="POST", url=url, no_csrf=True).update_params(**params).result
-    )["ticket"]
+
+    async def fetch():
+        o = hmac_sha256("XgwSnGZ1p", f"ts{int(time.time())}")
+        url = "https://api.bilibili.com/bapis/bilibili.api.ticket.v1.Ticket/GenWebTicket"
+        params = {
+            "key_id": "ec02",
+            "hexsign": o,
+            "context[ts]": f"{int(time.time())}",
+            "csrf": "",
+        }
+        data = await Api(method="POST", url=url, no_csrf=True).update_params(**params).result
+        # 接口返回的 ttl 为票据有效期（秒），默认 3 天
+        return data["ticket"], float(data.get("ttl", 259200))
+
+    return await key_manager.get("bili_ticket", fetch)
 
 
 def get_httpx_sync_session() -> httpx.Client:
@@ -942,23 +1874,30 @@ def to_form_urlencoded(data: dict) -> str:
     return "&".join(temp)
 
 
-async def generate_buvid3() -> None:
-    global buvid3
+async def generate_buvid3() -> str:
+    """
+    获取并激活新的 buvid3
+
+    Returns:
+        str: buvid3
+    """
     resp = await get_spi_buvid()
-    buvid3 = resp["b_3"]
-    await active_buvid(buvid3, resp["b_4"])
+    await active_buvid(resp["b_3"], resp["b_4"])
+    return resp["b_3"]
 
 
 async def get_buvid3() -> str:
     """
-    获取已激活的生成的 buvid3
+    获取已激活的生成的 buvid3，有效期内复用，多个协程同时缺失时只生成一次
 
     Returns:
         str: buvid3
     """
-    if buvid3 == "":
-        await generate_buvid3()
-    return buvid3
+
+    async def fetch():
+        return await generate_buvid3(), settings.buvid_ttl
+
+    return await key_manager.get("buvid3", fetch)
 
 
 @atexit.register
@@ -0,0 +1,275 @@
+"""
+bilibili_api.utils.paginator
+
+分页接口的异步迭代器。收到一页后立即请求下一页，调用方处理当前页时下一页的网络请求同时进行。
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Union
+
+from .network import TokenBucket
+
+
+class Paginator:
+    """
+    分页迭代器基类
+
+    `async for item in paginator` 逐条产出数据，`paginator.pages()` 逐页产出接口返回的内容。
+    请求经过 `Api.request`，仍受全局限速（`settings.rate_limit`）、响应缓存与合并相同请求的影响。
+
+    子类实现 `_first_state` 与 `_next_state`，分页状态可以是页码、偏移量或游标。
+
+    e.x.:
+    ``` python
+    async for video in User(uid).iter_videos(limit=100):
+        print(video["title"])
+    ```
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Any], Awaitable[dict]],
+        items: Callable[[dict], Union[List[Any], None]],
+        limit: Union[int, None] = None,
+        max_pages: Union[int, None] = None,
+        stop: Union[Callable[[Any], bool], None] = None,
+        prefetch: bool = True,
+        rate: Union[float, None] = None,
+    ) -> None:
+        """
+        Args:
+            fetch (Callable[[Any], Awaitable[dict]]): 按分页状态请求一页
+
+            items (Callable[[dict], list]): 从一页的返回内容中取出数据列表
+
+            limit (int, optional): 最多产出的条数. Defaults to None（不限）.
+
+            max_pages (int, optional): 最多请求的页数. Defaults to None（不限）.
+
+            stop (Callable[[Any], bool], optional): 对某条数据返回 True 时停止迭代，该条不产出. Defaults to None.
+
+            prefetch (bool, optional): 是否预取下一页. Defaults to True.
+
+            rate (float, optional): 本迭代器的额外限速（每秒页数）. Defaults to None.
+        """
+        self.fetch = fetch
+        self.get_items = items
+        self.limit = limit
+        self.max_pages = max_pages
+        self.stop = stop
+        self.prefetch = prefetch
+        self.bucket = TokenBucket("paginator", rate, 1) if rate else None
+        self.pages_fetched = 0
+
+    def _first_state(self) -> Any:
+        raise NotImplementedError
+
+    def _next_state(self, page: dict, state: Any) -> Any:
+        """
+        根据当前页计算下一页的状态
+
+        Returns:
+            Any: 下一页的状态，None 表示没有下一页
+        """
+        raise NotImplementedError
+
+    def _items_of(self, page: Union[dict, None]) -> List[Any]:
+        return (self.get_items(page) if page else None) or []
+
+    async def _fetch(self, state: Any) -> dict:
+        if self.bucket is not None:
+            await self.bucket.acquire()
+        self.pages_fetched += 1
+        return await self.fetch(state)
+
+    async def pages(self) -> AsyncIterator[dict]:
+        """
+        逐页产出接口返回的内容
+
+        Yields:
+            dict: 一页的返回内容
+        """
+        state = self._first_state()
+        pending: Union[asyncio.Future, None] = None
+        fetched = 0
+        try:
+            while state is not None and (self.max_pages is None or fetched < self.max_pages):
+                page = await (pending if pending is not None else self._fetch(state))
+                pending = None
+                fetched += 1
+                state = self._next_state(page, state)
+                if (
+                    self.prefetch
+                    and state is not None
+                    and (self.max_pages is None or fetched < self.max_pages)
+                ):
+                    pending = asyncio.ensure_future(self._fetch(state))
+                yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
+                if pending.done() and not pending.cancelled():
+                    # 预取的页已经出错但不再需要，取出异常避免 "never retrieved" 警告
+                    pending.exception()
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        count = 0
+        if self.limit is not None and self.limit <= 0:
+            return
+        pages = self.pages()
+        try:
+            async for page in pages:
+                for item in self._items_of(page):
+                    if self.stop is not None and self.stop(item):
+                        return
+                    yield item
+                    count += 1
+                    if self.limit is not None and count >= self.limit:
+                        return
+        finally:
+            await pages.aclose()
+
+    async def to_list(self) -> List[Any]:
+        """
+        取出全部数据
+
+        Returns:
+            List[Any]: 数据列表
+        """
+        return [item async for item in self]
+
+
+class PagePaginator(Paginator):
+    """
+    页码分页（pn / ps）
+
+    当前页为空、不足 ps 条、已达到总数或 `has_more` 返回 False 时停止。
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], Awaitable[dict]],
+        items: Callable[[dict], Union[List[Any], None]],
+        pn: int = 1,
+        ps: Union[int, None] = None,
+        total: Union[Callable[[dict], Union[int, None]], None] = None,
+        has_more: Union[Callable[[dict], bool], None] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            fetch (Callable[[int], Awaitable[dict]]): 按页码请求一页
+
+            items (Callable[[dict], list]): 从一页的返回内容中取出数据列表
+
+            pn (int, optional): 起始页码. Defaults to 1.
+
+            ps (int, optional): 每页条数，用于判断最后一页. Defaults to None.
+
+            total (Callable[[dict], int], optional): 从返回内容中取出总条数. Defaults to None.
+
+            has_more (Callable[[dict], bool], optional): 从返回内容中判断是否还有下一页. Defaults to None.
+
+            **kwargs: 见 `Paginator`
+        """
+        super().__init__(fetch, items, **kwargs)
+        self.pn = pn
+        self.ps = ps
+        self.total = total
+        self.has_more = has_more
+
+    def _first_state(self) -> int:
+        return self.pn
+
+    def _next_state(self, page: dict, state: int) -> Union[int, None]:
+        items = self._items_of(page)
+        if not items or (self.ps and len(items) < self.ps):
+            return None
+        if self.has_more is not None and not self.has_more(page):
+            return None
+        total = self.total(page) if self.total is not None and page else None
+        if total is not None and state * (self.ps or len(items)) >= total:
+            return None
+        return state + 1
+
+
+class OffsetPaginator(Paginator):
+    """
+    偏移量分页：每页返回下一页的偏移量，类似单向链表
+
+    `has_more` 返回 False、偏移量为空或与当前相同时停止。
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Any], Awaitable[dict]],
+        items: Callable[[dict], Union[List[Any], None]],
+        next_offset: Callable[[dict], Any],
+        has_more: Union[Callable[[dict], bool], None] = None,
+        offset: Any = "",
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            fetch (Callable[[Any], Awaitable[dict]]): 按偏移量请求一页
+
+            items (Callable[[dict], list]): 从一页的返回内容中取出数据列表
+
+            next_offset (Callable[[dict], Any]): 从返回内容中取出下一页的偏移量
+
+            has_more (Callable[[dict], bool], optional): 从返回内容中判断是否还有下一页. Defaults to None.
+
+            offset (Any, optional): 起始偏移量. Defaults to "".
+
+            **kwargs: 见 `Paginator`
+        """
+        super().__init__(fetch, items, **kwargs)
+        self.next_offset = next_offset
+        self.has_more = has_more
+        self.offset = offset
+
+    def _first_state(self) -> Any:
+        return self.offset
+
+    def _next_state(self, page: dict, state: Any) -> Any:
+        if not page or (self.has_more is not None and not self.has_more(page)):
+            return None
+        offset = self.next_offset(page)
+        if offset in (None, "", 0) or offset == state:
+            return None
+        return offset
+
+
+class CursorPaginator(OffsetPaginator):
+    """
+    游标分页（`pagination_str`）：下一页的偏移量在 `cursor.pagination_reply.next_offset`，
+    `cursor.is_end` 为 True 时结束
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[dict]],
+        items: Callable[[dict], Union[List[Any], None]] = lambda page: page.get("replies"),
+        offset: str = "",
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            fetch (Callable[[str], Awaitable[dict]]): 按偏移量请求一页
+
+            items (Callable[[dict], list], optional): 从一页的返回内容中取出数据列表. Defaults to `replies` 字段.
+
+            offset (str, optional): 起始偏移量. Defaults to "".
+
+            **kwargs: 见 `Paginator`
+        """
+        super().__init__(
+            fetch,
+            items,
+            next_offset=lambda page: (
+                (page.get("cursor") or {}).get("pagination_reply") or {}
+            ).get("next_offset"),
+            has_more=lambda page: not (page.get("cursor") or {}).get("is_end"),
+            offset=offset,
+            **kwargs,
+        )
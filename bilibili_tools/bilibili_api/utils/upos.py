@@ -4,11 +4,9 @@ bilibili_api.bili_server.upos
 import os
 import json
 import httpx
-import asyncio
-from asyncio.tasks import create_task
 
 from .utils import get_api
-from .network import get_session
+from .network import Api, get_session
 from ..exceptions.NetworkException import NetworkException
 from ..exceptions.ResponseCodeException import ResponseCodeException
 from ..exceptions.ApiException import ApiException
@@ -76,36 +74,22 @@ class UposFileUploader:
         chunk_offset_list = list(range(0, page_size, self.preupload["chunk_size"]))
         # 分块总数
         total_chunk_count = len(chunk_offset_list)
-        # 并发上传分块
-        chunk_number = 0
         # 上传队列
-        chunks_pending = []
-
-        for offset in chunk_offset_list:
-            chunks_pending.insert(
-                0,
-                self._upload_chunk(offset, chunk_number, total_chunk_count),
-            )
-            chunk_number += 1
+        chunks_pending = [
+            self._upload_chunk(offset, chunk_number, total_chunk_count)
+            for chunk_number, offset in enumerate(chunk_offset_list)
+        ]
 
+        # 并发上传分块，同时最多 threads 个，一块完成即开始下一块；失败的分块下一轮重传
         while chunks_pending:
-            tasks = []
-
-            while len(tasks) < self.preupload["threads"] and len(chunks_pending) > 0:
-                tasks.append(create_task(chunks_pending.pop()))
-
-            result = await asyncio.gather(*tasks)
-
-            for r in result:
-                if not r["ok"]:
-                    chunks_pending.insert(
-                        0,
-                        self._upload_chunk(
-                            r["offset"],
-                            r["chunk_number"],
-                            total_chunk_count,
-                        ),
-                    )
+            result = await Api.batch(
+                chunks_pending, concurrency=self.preupload["threads"], return_exceptions=False
+            )
+            chunks_pending = [
+                self._upload_chunk(r["offset"], r["chunk_number"], total_chunk_count)
+                for r in result
+                if not r["ok"]
+            ]
 
         data = await self._complete_file(total_chunk_count)
 
@@ -877,16 +877,16 @@ class Video:
 
         danmakus = []
 
+        requests = []
         for seg in range(from_seg, to_seg + 1):
             if date is None:
                 # 仅当获取当前弹幕时需要该参数
                 params["segment_index"] = seg + 1
-            try:
-                data = await Api(**api, credential=self.credential).update_params(**params).request(byte=True)
-            except Exception as e:
-                raise e
-                raise NetworkException(-1, str(e))
+            requests.append(Api(**api, credential=self.credential).update_params(**params))
+        # 各段并发获取，按段顺序解析
+        segments = await Api.batch(requests, return_exceptions=False, byte=True)
 
+        for data in segments:
             if data == b"\x10\x01":
                 # 视频弹幕被关闭
                 raise DanmakuClosedException()
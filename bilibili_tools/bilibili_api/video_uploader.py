@@ -8,7 +8,6 @@ import json
 import time
 import base64
 import re
-import asyncio
 import httpx
 from enum import Enum
 from typing import List, Union, Optional
@@ -1017,41 +1016,26 @@ class VideoUploader(AsyncEvent):
         chunk_offset_list = list(range(0, page_size, preupload["chunk_size"]))
         # 分块总数
         total_chunk_count = len(chunk_offset_list)
-        # 并发上传分块
-        chunk_number = 0
-        # 上传队列
-        chunks_pending = []
         # 缓存 upload_id，这玩意只能从上传的分块预检结果获得
         upload_id = preupload["upload_id"]
-        for offset in chunk_offset_list:
-            chunks_pending.insert(
-                0,
-                self._upload_chunk(
-                    page, offset, chunk_number, total_chunk_count, preupload
-                ),
-            )
-            chunk_number += 1
+        # 上传队列
+        chunks_pending = [
+            self._upload_chunk(page, offset, chunk_number, total_chunk_count, preupload)
+            for chunk_number, offset in enumerate(chunk_offset_list)
+        ]
 
+        # 并发上传分块，同时最多 threads 个，一块完成即开始下一块；失败的分块下一轮重传
         while chunks_pending:
-            tasks = []
-
-            while len(tasks) < preupload["threads"] and len(chunks_pending) > 0:
-                tasks.append(create_task(chunks_pending.pop()))
-
-            result = await asyncio.gather(*tasks)
-
-            for r in result:
-                if not r["ok"]:
-                    chunks_pending.insert(
-                        0,
-                        self._upload_chunk(
-                            page,
-                            r["offset"],
-                            r["chunk_number"],
-                            total_chunk_count,
-                            preupload,
-                        ),
-                    )
+            result = await Api.batch(
+                chunks_pending, concurrency=preupload["threads"], return_exceptions=False
+            )
+            chunks_pending = [
+                self._upload_chunk(
+                    page, r["offset"], r["chunk_number"], total_chunk_count, preupload
+                )
+                for r in result
+                if not r["ok"]
+            ]
 
         data = await self._complete_page(page, total_chunk_count, preupload, upload_id)
 
@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# BiliBili Live Hotspot Engine Module
+
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from bilibili_api import Credential
+from bilibili_api.live import LiveDanmaku
+
+# 拉丁字母/数字连续串，如 "666"、"gg"、"awsl"
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# 连续的中日韩字符
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]+")
+
+
+def tokenize(message: str) -> List[str]:
+    """
+    Splits a danmaku message into hotspot terms without a segmenter.
+
+    Short messages are counted as a whole, because danmaku is dominated by repeated phrases.
+    Latin words and short CJK runs are counted as terms; long CJK runs fall back to bigrams.
+
+    Args:
+        message (str): The raw danmaku text.
+
+    Returns:
+        List[str]: Distinct terms of the message.
+    """
+    text = message.strip().lower()
+    if not text:
+        return []
+
+    terms = set()
+    if len(text) <= 12:
+        terms.add(text)
+    terms.update(word for word in _WORD_RE.findall(text) if len(word) >= 2)
+    for run in _CJK_RE.findall(text):
+        if 2 <= len(run) <= 6:
+            terms.add(run)
+        elif len(run) > 6:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return list(terms)
+
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch. Estimates never undercount and overcount by at most
+    about total / width with high probability, whatever the number of distinct terms.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def _slots(self, key: str):
+        for row in range(self.depth):
+            yield row, hash((row, key)) % self.width
+
+    def add(self, key: str, count: int = 1) -> None:
+        self.total += count
+        for row, slot in self._slots(key):
+            self.rows[row][slot] += count
+
+    def estimate(self, key: str) -> int:
+        return min(self.rows[row][slot] for row, slot in self._slots(key))
+
+    def clear(self) -> None:
+        self.total = 0
+        for row in self.rows:
+            for i in range(self.width):
+                row[i] = 0
+
+
+class SlidingWindowSketch:
+    """
+    Sliding-window counts made of a ring of Count-Min sketches, one per time bucket.
+    The oldest bucket is cleared and reused when time moves past it, so memory is constant.
+    """
+
+    def __init__(self, window_seconds: float = 60, num_buckets: int = 12, width: int = 2048, depth: int = 4):
+        self.bucket_seconds = window_seconds / num_buckets
+        self.buckets = [CountMinSketch(width, depth) for _ in range(num_buckets)]
+        self.current_epoch = 0
+
+    def advance(self, now: float) -> bool:
+        """
+        Rotates buckets up to the given time.
+
+        Returns:
+            bool: Whether at least one bucket was rotated out.
+        """
+        epoch = int(now // self.bucket_seconds)
+        if epoch == self.current_epoch:
+            return False
+
+        stale = min(epoch - self.current_epoch, len(self.buckets))
+        for step in range(1, stale + 1):
+            self.buckets[(self.current_epoch + step) % len(self.buckets)].clear()
+        self.current_epoch = epoch
+        return True
+
+    @property
+    def current(self) -> CountMinSketch:
+        return self.buckets[self.current_epoch % len(self.buckets)]
+
+    def add(self, key: str, count: int = 1) -> None:
+        self.current.add(key, count)
+
+    def estimate(self, key: str) -> int:
+        return sum(bucket.estimate(key) for bucket in self.buckets)
+
+    def estimate_recent(self, key: str) -> int:
+        return self.current.estimate(key)
+
+    @property
+    def total(self) -> int:
+        return sum(bucket.total for bucket in self.buckets)
+
+
+class RoomHotspots:
+    """
+    Streaming hotspot state of one live room: windowed term and gift counts, the top-K heavy
+    hitters and recent burst alerts. Memory does not grow with message volume.
+    """
+
+    def __init__(self, room_id: int, window_seconds: float = 60, num_buckets: int = 12, top_k: int = 20,
+                 burst_ratio: float = 3.0, burst_min_count: int = 10):
+        """
+        Args:
+            room_id (int): The live room ID.
+            window_seconds (float): Length of the sliding window.
+            num_buckets (int): Number of buckets the window is split into; one bucket is the burst horizon.
+            top_k (int): Number of heavy hitters tracked.
+            burst_ratio (float): A term bursts when its rate in the latest bucket exceeds this multiple of its window rate.
+            burst_min_count (int): Minimum count in the latest bucket before a term can burst.
+        """
+        self.room_id = room_id
+        self.top_k = top_k
+        self.burst_ratio = burst_ratio
+        self.burst_min_count = burst_min_count
+        self.terms = SlidingWindowSketch(window_seconds, num_buckets)
+        self.gifts = SlidingWindowSketch(window_seconds, num_buckets, width=256)
+        self.messages = SlidingWindowSketch(window_seconds, num_buckets, width=1, depth=1)
+        # 候选热词只保留 top_k 的常数倍，淘汰估计值最小的
+        self.candidates: Dict[str, int] = {}
+        self.gift_candidates: Dict[str, int] = {}
+        self.bursts: deque = deque(maxlen=50)
+        self._bursting = set()
+        self.started_at: Optional[float] = None
+
+    def _advance(self, now: float) -> None:
+        if self.started_at is None:
+            self.started_at = now
+        if self.terms.advance(now):
+            self._bursting.clear()
+            self._refresh(self.candidates, self.terms)
+        # 先轮转礼物窗口再刷新候选，否则过期桶里的礼物数会被重新计入
+        if self.gifts.advance(now):
+            self._refresh(self.gift_candidates, self.gifts)
+        self.messages.advance(now)
+
+    def _refresh(self, candidates: Dict[str, int], sketch: SlidingWindowSketch) -> None:
+        for key in list(candidates):
+            count = sketch.estimate(key)
+            if count:
+                candidates[key] = count
+            else:
+                del candidates[key]
+
+    def _offer(self, candidates: Dict[str, int], key: str, count: int) -> None:
+        candidates[key] = count
+        if len(candidates) > self.top_k * 4:
+            weakest = min(candidates, key=candidates.get)
+            del candidates[weakest]
+
+    def add_danmaku(self, message: str, now: Optional[float] = None) -> None:
+        """
+        Counts one danmaku message.
+
+        Args:
+            message (str): The danmaku text.
+            now (Optional[float]): Event time in seconds. Defaults to time.time().
+        """
+        now = time.time() if now is None else now
+        self._advance(now)
+        self.messages.add("*")
+
+        # 已观测的桶数，窗口未填满前按实际时长折算平均速率
+        observed_buckets = min(len(self.terms.buckets), (now - self.started_at) / self.terms.bucket_seconds)
+        for term in tokenize(message):
+            self.terms.add(term)
+            count = self.terms.estimate(term)
+            self._offer(self.candidates, term, count)
+
+            recent = self.terms.estimate_recent(term)
+            if recent < self.burst_min_count or term in self._bursting or observed_buckets < 2:
+                continue
+            # 最近一个桶的速率对比整个窗口的平均速率
+            if recent * observed_buckets >= self.burst_ratio * count:
+                self._bursting.add(term)
+                self.bursts.append({"term": term, "count": recent, "window_count": count, "time": now})
+
+    def add_gift(self, gift_name: str, num: int = 1, now: Optional[float] = None) -> None:
+        """
+        Counts a gift event.
+
+        Args:
+            gift_name (str): The gift name.
+            num (int): Number of gifts sent.
+            now (Optional[float]): Event time in seconds. Defaults to time.time().
+        """
+        now = time.time() if now is None else now
+        self._advance(now)
+        self.gifts.add(gift_name, num)
+        self._offer(self.gift_candidates, gift_name, self.gifts.estimate(gift_name))
+
+    def snapshot(self, n: int = 10, now: Optional[float] = None) -> dict:
+        """
+        Current hotspots of the room.
+
+        Args:
+            n (int): Number of terms and gifts to return.
+            now (Optional[float]): Query time in seconds. Defaults to time.time().
+
+        Returns:
+            dict: Top terms, top gifts, message rate and recent bursts.
+        """
+        now = time.time() if now is None else now
+        self._advance(now)
+        window_seconds = self.terms.bucket_seconds * len(self.terms.buckets)
+        elapsed = min(window_seconds, max(now - self.started_at, self.terms.bucket_seconds))
+        return {
+            "room_id": self.room_id,
+            "window_seconds": window_seconds,
+            "messages_per_second": round(self.messages.total / elapsed, 2),
+            "top_terms": _top(self.candidates, n),
+            "top_gifts": _top(self.gift_candidates, n),
+            "bursts": [burst for burst in self.bursts if now - burst["time"] <= window_seconds],
+        }
+
+
+def _top(candidates: Dict[str, int], n: int) -> List[Tuple[str, int]]:
+    return sorted(candidates.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class HotspotEngine:
+    """
+    Subscribes to the DANMU_MSG and SEND_GIFT events of live rooms and keeps their hotspots,
+    so the agent can read what is trending in a room without an LLM call.
+    """
+
+    def __init__(self, credential: Optional[Credential] = None, **room_options):
+        """
+        Args:
+            credential (Optional[Credential]): Credential used to connect to live rooms.
+            **room_options: Options forwarded to RoomHotspots (window_seconds, top_k, burst_ratio...).
+        """
+        self.credential = credential
+        self.room_options = room_options
+        self.rooms: Dict[int, RoomHotspots] = {}
+        self._connections: Dict[int, LiveDanmaku] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def room(self, room_id: int) -> RoomHotspots:
+        if room_id not in self.rooms:
+            self.rooms[room_id] = RoomHotspots(room_id, **self.room_options)
+        return self.rooms[room_id]
+
+    def watch(self, room_id: int) -> None:
+        """
+        Starts consuming a live room in the background. Must be called from a running event loop.
+
+        Args:
+            room_id (int): The live room display ID.
+        """
+        if room_id in self._tasks:
+            return
+
+        hotspots = self.room(room_id)
+        danmaku = LiveDanmaku(room_id, credential=self.credential)
+
+        @danmaku.on("DANMU_MSG")
+        async def on_danmaku(event):
+            # info[1] 为弹幕文本
+            hotspots.add_danmaku(event["data"]["info"][1])
+
+        @danmaku.on("SEND_GIFT")
+        async def on_gift(event):
+            gift = event["data"]["data"]
+            hotspots.add_gift(gift["giftName"], gift.get("num", 1))
+
+        self._connections[room_id] = danmaku
+        self._tasks[room_id] = asyncio.create_task(danmaku.connect())
+
+    async def unwatch(self, room_id: int) -> None:
+        """
+        Disconnects from a live room and drops its state.
+
+        Args:
+            room_id (int): The live room display ID.
+        """
+        danmaku = self._connections.pop(room_id, None)
+        task = self._tasks.pop(room_id, None)
+        if danmaku is not None and danmaku.get_status() == LiveDanmaku.STATUS_ESTABLISHED:
+            await danmaku.disconnect()
+        if task is not None:
+            task.cancel()
+        self.rooms.pop(room_id, None)
+
+    def get_hotspots(self, room_id: int, n: int = 10) -> dict:
+        """
+        Current hotspots of a room, or an empty snapshot if it is not watched.
+
+        Args:
+            room_id (int): The live room display ID.
+            n (int): Number of terms and gifts to return.
+
+        Returns:
+            dict: See RoomHotspots.snapshot.
+        """
+        hotspots = self.rooms.get(room_id)
+        if hotspots is None:
+            # 未订阅的直播间不创建状态，否则任意查询都会让 rooms 无限增长
+            return {
+                "room_id": room_id,
+                "window_seconds": self.room_options.get("window_seconds", 60),
+                "messages_per_second": 0.0,
+                "top_terms": [],
+                "top_gifts": [],
+                "bursts": [],
+            }
+        return hotspots.snapshot(n)
+
+    def format_hotspots(self, room_id: int, n: int = 10) -> str:
+        """
+        Compact text rendering of a room's hotspots, suitable for a prompt context.
+        """
+        snapshot = self.get_hotspots(room_id, n)
+        lines = [
+            f"直播间: {room_id}",
+            f"弹幕速率: {snapshot['messages_per_second']} 条/秒 (近 {int(snapshot['window_seconds'])} 秒)",
+            "热词: " + ", ".join(f"{term}({count})" for term, count in snapshot["top_terms"]),
+            "礼物: " + ", ".join(f"{gift}({count})" for gift, count in snapshot["top_gifts"]),
+        ]
+        if snapshot["bursts"]:
+            lines.append("突发: " + ", ".join(f"{burst['term']}({burst['count']})" for burst in snapshot["bursts"]))
+        return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    import sys
+
+    async def main(room_id: int):
+        engine = HotspotEngine()
+        engine.watch(room_id)
+        while True:
+            await asyncio.sleep(10)
+            print(engine.format_hotspots(room_id))
+            print("-------------------------")
+
+    asyncio.run(main(int(sys.argv[1])))
@@ -14,16 +14,17 @@ load_dotenv(find_dotenv())
 
 # pip install --upgrade httpx httpx-sse PyJWT
 
-chat = ChatZhipuAI(
-    api_key=os.getenv("GLM_API_KEY"),
-    model="glm-4",
-)
+if __name__ == '__main__':
+    chat = ChatZhipuAI(
+        api_key=os.getenv("GLM_API_KEY"),
+        model="glm-4",
+    )
 
-messages = [
-    AIMessage(content="Hi."),
-    SystemMessage(content="Your role is a poet."),
-    HumanMessage(content="Write a short poem about AI in four lines."),
-]
+    messages = [
+        AIMessage(content="Hi."),
+        SystemMessage(content="Your role is a poet."),
+        HumanMessage(content="Write a short poem about AI in four lines."),
+    ]
 
-response = chat.invoke(messages)
-print(response.content)
\ No newline at end of file
+    response = chat.invoke(messages)
+    print(response.content)
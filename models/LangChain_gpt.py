@@ -11,19 +11,20 @@ load_dotenv(find_dotenv())
 
 # LangChain Docs:https://python.langchain.com/docs/integrations/chat/openai/
 
-llm = ChatOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    model="gpt-4o",
-)
+if __name__ == '__main__':
+    llm = ChatOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        model="gpt-4o",
+    )
 
-messages = [
-    (
-        "system", "You are a helpful assistant that translates English to Chinese. Translate the user sentence.",
-    ),
-    (
-        "human", "I love programming."
-    ),
-]
+    messages = [
+        (
+            "system", "You are a helpful assistant that translates English to Chinese. Translate the user sentence.",
+        ),
+        (
+            "human", "I love programming."
+        ),
+    ]
 
-ai_msg = llm.invoke(messages)
-print(ai_msg.content)
+    ai_msg = llm.invoke(messages)
+    print(ai_msg.content)
@@ -2,3 +2,9 @@
 # -*- coding: utf-8 -*-
 # Author: MuyuCheney
 # Date: 2024-10-16
+
+from models.backend import (PROVIDERS, LLMBackend, RetryPolicy, backend_stats, create_chat_model, create_embeddings,
+                            get_backend)
+
+__all__ = ["PROVIDERS", "LLMBackend", "RetryPolicy", "backend_stats", "create_chat_model", "create_embeddings",
+           "get_backend"]
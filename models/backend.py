@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube Agent LLM Backend Module
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+# OpenAI-compatible endpoints by provider: default base URL and the environment variables read for the API key
+# and base URL. GLM is served through Zhipu's OpenAI-compatible API, local through any OpenAI-compatible server
+# (vLLM, Ollama, the stand-in server of app/).
+PROVIDERS = {
+    "openai": {"base_url": None, "api_key_env": "OPENAI_API_KEY", "base_url_env": "BASE_URL"},
+    "glm": {"base_url": "https://open.bigmodel.cn/api/paas/v4/", "api_key_env": "GLM_API_KEY",
+            "base_url_env": "GLM_BASE_URL"},
+    "local": {"base_url": "http://localhost:8001/v1", "api_key_env": "LOCAL_LLM_API_KEY",
+              "base_url_env": "LOCAL_LLM_BASE_URL"},
+}
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: the n-th retry waits a random time in [0, min(max_delay, base_delay * 2^n)],
+    or the server's Retry-After when it asks for longer. Concurrent callers failing together therefore do not
+    retry in lockstep.
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_delay))
+            except ValueError:
+                pass
+        return delay
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that frees the concurrency slot of its request once it is closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _ReleasingAsyncStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _once(release):
+    released = False
+
+    def wrapper():
+        nonlocal released
+        if not released:
+            released = True
+            release()
+    return wrapper
+
+
+class _Transport(httpx.BaseTransport):
+    """Pooled transport that waits for a concurrency slot and retries transient failures."""
+
+    def __init__(self, backend: "LLMBackend", transport: httpx.BaseTransport):
+        self.backend = backend
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self.backend.retry
+        for attempt in range(policy.max_retries + 1):
+            self.backend._sync_slots.acquire()
+            release = _once(self.backend._release(self.backend._sync_slots.release))
+            self.backend._acquired()
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError:
+                release()
+                if attempt == policy.max_retries:
+                    self.backend.stats["failures"] += 1
+                    raise
+                response = None
+            except BaseException:
+                release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == policy.max_retries:
+                    return httpx.Response(response.status_code, headers=response.headers,
+                                          stream=_ReleasingStream(response.stream, release),
+                                          extensions=response.extensions)
+                response.close()
+                release()
+            self.backend.stats["retries"] += 1
+            time.sleep(policy.delay(attempt, response))
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class _AsyncTransport(httpx.AsyncBaseTransport):
+    def __init__(self, backend: "LLMBackend", transport: httpx.AsyncBaseTransport):
+        self.backend = backend
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self.backend.retry
+        slots = self.backend._async_slots()
+        for attempt in range(policy.max_retries + 1):
+            await slots.acquire()
+            release = _once(self.backend._release(slots.release))
+            self.backend._acquired()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                release()
+                if attempt == policy.max_retries:
+                    self.backend.stats["failures"] += 1
+                    raise
+                response = None
+            except BaseException:
+                release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == policy.max_retries:
+                    return httpx.Response(response.status_code, headers=response.headers,
+                                          stream=_ReleasingAsyncStream(response.stream, release),
+                                          extensions=response.extensions)
+                await response.aclose()
+                release()
+            self.backend.stats["retries"] += 1
+            await asyncio.sleep(policy.delay(attempt, response))
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class LLMBackend:
+    """
+    Connection pool, concurrency limit and retry policy shared by every chat and embedding client of one endpoint.
+
+    All clients created from a backend send their requests through the same httpx clients, so connections are
+    reused across components, at most `max_concurrency` requests are in flight against the provider at once
+    (requests beyond that wait for a slot instead of being rejected), and transient failures (connection errors,
+    429 and 5xx) are retried here with jittered backoff; the OpenAI SDK's own retries are disabled.
+    The async and sync paths each have their own limit.
+    """
+
+    def __init__(self, provider: str = "openai", api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout: float = 60.0, max_connections: int = 20, max_concurrency: int = 8,
+                 retry: Optional[RetryPolicy] = None):
+        """
+        Args:
+            provider (str): Key of PROVIDERS, selects the default base URL and API key variables.
+            api_key (Optional[str]): API key. Defaults to the provider's environment variable.
+            base_url (Optional[str]): Endpoint. Defaults to the provider's environment variable, then its default.
+            timeout (float): Request timeout in seconds.
+            max_connections (int): Size of the HTTP connection pool.
+            max_concurrency (int): Maximum number of requests in flight.
+            retry (Optional[RetryPolicy]): Retry policy. Defaults to 3 retries.
+
+        Raises:
+            ValueError: If the provider is unknown.
+        """
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {provider}, expected one of {list(PROVIDERS)}")
+        preset = PROVIDERS[provider]
+        self.provider = provider
+        self.api_key = api_key or os.getenv(preset["api_key_env"]) or ("EMPTY" if provider == "local" else None)
+        self.base_url = base_url or os.getenv(preset["base_url_env"]) or preset["base_url"]
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.retry = retry or RetryPolicy()
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "in_flight": 0, "peak_in_flight": 0}
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        self._loop_slots: Tuple[Optional[asyncio.AbstractEventLoop], Optional[asyncio.Semaphore]] = (None, None)
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+
+    def _async_slots(self) -> asyncio.Semaphore:
+        # asyncio 信号量绑定事件循环，换了循环（如 Streamlit 每次重跑）就重建
+        loop = asyncio.get_running_loop()
+        if self._loop_slots[0] is not loop:
+            self._loop_slots = (loop, asyncio.Semaphore(self.max_concurrency))
+        return self._loop_slots[1]
+
+    def _acquired(self) -> None:
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+    def _release(self, release):
+        def wrapper():
+            self.stats["in_flight"] -= 1
+            release()
+        return wrapper
+
+    @property
+    def http_client(self) -> httpx.Client:
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                transport=_Transport(self, httpx.HTTPTransport(limits=self.limits)), timeout=self.timeout)
+        return self._http_client
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        if self._http_async_client is None:
+            self._http_async_client = httpx.AsyncClient(
+                transport=_AsyncTransport(self, httpx.AsyncHTTPTransport(limits=self.limits)), timeout=self.timeout)
+        return self._http_async_client
+
+    def _client_params(self) -> dict:
+        params = {"api_key": self.api_key, "http_client": self.http_client,
+                  "http_async_client": self.http_async_client, "max_retries": 0, "timeout": self.timeout}
+        if self.base_url:
+            params["base_url"] = self.base_url
+        return params
+
+    def chat(self, model: str, temperature: float = 0, **kwargs) -> ChatOpenAI:
+        """
+        Creates a chat model on this backend.
+
+        Args:
+            model (str): Model name.
+            temperature (float): Sampling temperature.
+            **kwargs: Other ChatOpenAI parameters.
+
+        Returns:
+            ChatOpenAI: The chat model.
+        """
+        return ChatOpenAI(model=model, temperature=temperature, **{**self._client_params(), **kwargs})
+
+    def embeddings(self, model: Optional[str] = None, **kwargs) -> OpenAIEmbeddings:
+        """
+        Creates an embedding model on this backend.
+
+        Args:
+            model (Optional[str]): Model name. Defaults to the OpenAIEmbeddings default.
+            **kwargs: Other OpenAIEmbeddings parameters.
+
+        Returns:
+            OpenAIEmbeddings: The embedding model.
+        """
+        params = self._client_params()
+        if model:
+            params["model"] = model
+        if self.provider != "openai":
+            # 非 OpenAI 服务不接受 tiktoken 切分后的 token id，直接发送原文
+            params["check_embedding_ctx_length"] = False
+        return OpenAIEmbeddings(**{**params, **kwargs})
+
+    def snapshot(self) -> dict:
+        return {"provider": self.provider, "base_url": self.base_url, "max_concurrency": self.max_concurrency,
+                **self.stats}
+
+    async def aclose(self) -> None:
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+
+
+_backends: Dict[Tuple[str, Optional[str], Optional[str]], LLMBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(provider: Optional[str] = None, api_key: Optional[str] = None,
+                base_url: Optional[str] = None) -> LLMBackend:
+    """
+    Returns the process-wide backend of an endpoint, creating it on first use. Pool size, concurrency, timeout and
+    retries are read from LLM_MAX_CONNECTIONS, LLM_MAX_CONCURRENCY, LLM_TIMEOUT_SECONDS and LLM_MAX_RETRIES.
+
+    Args:
+        provider (Optional[str]): Key of PROVIDERS. Defaults to LLM_PROVIDER, then "openai".
+        api_key (Optional[str]): API key. Defaults to the provider's environment variable.
+        base_url (Optional[str]): Endpoint. Defaults to the provider's environment variable, then its default.
+
+    Returns:
+        LLMBackend: The shared backend.
+    """
+    provider = provider or os.getenv("LLM_PROVIDER", "openai")
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider}, expected one of {list(PROVIDERS)}")
+    # 按解析后的端点去重：显式传入与从环境变量读取的同一端点共用一个连接池
+    preset = PROVIDERS[provider]
+    api_key = api_key or os.getenv(preset["api_key_env"])
+    base_url = base_url or os.getenv(preset["base_url_env"]) or preset["base_url"]
+    key = (provider, api_key, base_url)
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = LLMBackend(
+                provider, api_key=api_key, base_url=base_url,
+                timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "60")),
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+                retry=RetryPolicy(max_retries=int(os.getenv("LLM_MAX_RETRIES", "3"))),
+            )
+        return _backends[key]
+
+
+def create_chat_model(model: str, provider: Optional[str] = None, api_key: Optional[str] = None,
+                      base_url: Optional[str] = None, temperature: float = 0, **kwargs) -> ChatOpenAI:
+    """
+    Creates a chat model on the shared backend of its endpoint.
+
+    Args:
+        model (str): Model name.
+        provider (Optional[str]): "openai", "glm" or "local". Defaults to LLM_PROVIDER, then "openai".
+        api_key (Optional[str]): API key. Defaults to the provider's environment variable.
+        base_url (Optional[str]): Endpoint. Defaults to the provider's environment variable, then its default.
+        temperature (float): Sampling temperature.
+        **kwargs: Other ChatOpenAI parameters.
+
+    Returns:
+        ChatOpenAI: The chat model.
+    """
+    return get_backend(provider, api_key, base_url).chat(model, temperature=temperature, **kwargs)
+
+
+def create_embeddings(model: Optional[str] = None, provider: Optional[str] = None, api_key: Optional[str] = None,
+                      base_url: Optional[str] = None, **kwargs) -> OpenAIEmbeddings:
+    """
+    Creates an embedding model on the shared backend of its endpoint.
+
+    Args:
+        model (Optional[str]): Model name. Defaults to EMBEDDING_MODEL, then the OpenAIEmbeddings default.
+        provider (Optional[str]): "openai", "glm" or "local". Defaults to EMBEDDING_PROVIDER, then "openai".
+        api_key (Optional[str]): API key. Defaults to the provider's environment variable.
+        base_url (Optional[str]): Endpoint. Defaults to the provider's environment variable, then its default.
+        **kwargs: Other OpenAIEmbeddings parameters.
+
+    Returns:
+        OpenAIEmbeddings: The embedding model.
+    """
+    provider = provider or os.getenv("EMBEDDING_PROVIDER", "openai")
+    return get_backend(provider, api_key, base_url).embeddings(model or os.getenv("EMBEDDING_MODEL"), **kwargs)
+
+
+def backend_stats() -> list:
+    """Request, retry and concurrency counters of every backend created in this process."""
+    return [backend.snapshot() for backend in _backends.values()]
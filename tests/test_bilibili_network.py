@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+# 导入 bilibili_tools 时会把内置的 bilibili_api 加入 Python 路径
+pytest.importorskip("bilibili_tools")
+from bilibili_api import settings
+from bilibili_api.utils.network import ResponseCache, SingleFlight, TokenBucket
+from bilibili_api.utils.paginator import OffsetPaginator, PagePaginator
+
+
+class DictBackend:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.entries[key] = value
+
+    def delete(self, key):
+        self.entries.pop(key, None)
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"items": [1, 2]}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(runs) == 1
+    assert all(result == {"items": [1, 2]} for result in results)
+    assert results[1] is not results[0]
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "shared": 4}
+
+
+def test_single_flight_survives_a_cancelled_leader_and_shares_errors():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        errors = await asyncio.gather(flight.do("bad", fail), flight.do("bad", fail), return_exceptions=True)
+        return await follower, leader.cancelled(), errors
+
+    result, cancelled, errors = asyncio.run(main())
+    assert result == "done" and cancelled
+    assert [type(error) for error in errors] == [ValueError, ValueError]
+
+
+def test_response_cache_copies_expires_and_evicts(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_size", 2)
+    monkeypatch.setattr(settings, "cache_backend", None)
+    cache = ResponseCache()
+
+    value = {"list": [1]}
+    cache.set("a", value, ttl=60)
+    value["list"].append(2)
+    hit, cached = cache.get("a")
+    assert hit and cached == {"list": [1]}
+    cached["list"].append(3)
+    assert cache.get("a")[1] == {"list": [1]}
+
+    cache.set("none", None, ttl=60)
+    assert cache.get("none") == (False, None)
+
+    cache.set("expired", 1, ttl=-1)
+    assert cache.get("expired") == (False, None)
+
+    cache.set("b", 2, ttl=60)
+    cache.set("c", 3, ttl=60)
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_response_cache_falls_back_to_the_shared_backend(monkeypatch):
+    monkeypatch.setattr(settings, "cache_backend", DictBackend())
+    writer, reader = ResponseCache(), ResponseCache()
+
+    asyncio.run(writer.aset("view", {"title": "t"}, ttl=60))
+    assert asyncio.run(reader.aget("view")) == (True, {"title": "t"})
+    assert reader.get("view") == (True, {"title": "t"})
+    assert reader.stats()["shared_hits"] == 1 and reader.stats()["hits"] == 1
+
+
+def test_token_bucket_spends_burst_then_waits():
+    bucket = TokenBucket("test", rate=20, burst=2)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire_sync()
+    assert time.monotonic() - started >= 0.08
+    assert bucket.waited > 0
+
+
+def test_token_bucket_backs_off_on_risk_control(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_cooldown", 0.05)
+    bucket = TokenBucket("test", rate=10, burst=5)
+    bucket.penalize()
+    assert bucket.rate == 10 * settings.rate_limit_backoff
+    assert bucket._reserve() > 0
+
+    bucket.penalize()
+    assert bucket.strikes == 2 and bucket.stats()["penalties"] == 2
+
+
+def test_page_paginator_stops_on_a_short_page_and_prefetches():
+    requested = []
+
+    async def fetch(pn):
+        requested.append(pn)
+        return {"list": list(range((pn - 1) * 3, min(pn * 3, 7)))}
+
+    paginator = PagePaginator(fetch, items=lambda page: page["list"], ps=3)
+    assert asyncio.run(paginator.to_list()) == list(range(7))
+    assert requested == [1, 2, 3]
+
+    limited = PagePaginator(fetch, items=lambda page: page["list"], ps=3, limit=4, prefetch=False)
+    requested.clear()
+    assert asyncio.run(limited.to_list()) == [0, 1, 2, 3]
+    assert requested == [1, 2]
+
+
+def test_offset_paginator_follows_offsets_and_stop():
+    pages = {"": {"items": [1, 2], "next": "b"}, "b": {"items": [3, 4], "next": "c"}, "c": {"items": [5], "next": ""}}
+
+    async def fetch(offset):
+        return pages[offset]
+
+    def paginator(**kwargs):
+        return OffsetPaginator(fetch, items=lambda page: page["items"], next_offset=lambda page: page["next"], **kwargs)
+
+    assert asyncio.run(paginator().to_list()) == [1, 2, 3, 4, 5]
+    assert asyncio.run(paginator(stop=lambda item: item == 4).to_list()) == [1, 2, 3]
+    assert asyncio.run(paginator(max_pages=2).to_list()) == [1, 2, 3, 4]
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from bili_server.dedup import collapse_documents, content_text
+
+
+def youtube_record(title, description, channel="channel", url="https://www.youtube.com/watch?v=abc", views=1000):
+    return (f"Type: video\nAuthor: {channel}\nVideo URL: {url}\nTitle: {title}\nDescription: {description}\n"
+            f"Views: {views}\nLikes: 10\nComments: 2\nPublished: 2024-05-01T00:00:00Z\n")
+
+
+def bilibili_record(title, description, author="up主", url="http://www.bilibili.com/video/av1"):
+    fields = [("类型", "video"), ("作者", author), ("分类", "知识"), ("视频链接", url), ("标题", title),
+              ("描述", description), ("播放量", 100), ("弹幕数", 1), ("收藏数", 2), ("标签", ""), ("评论数", 3),
+              ("评论", ""), ("发布日期", "2024-05-01 00:00:00")]
+    return "\n".join(f"{label}: {value}" for label, value in fields)
+
+
+def test_content_text_keeps_only_title_and_description():
+    text = content_text(youtube_record("LangGraph agents", "Build an agent", url="https://example.com/x"))
+    assert text == "LangGraph agents\nBuild an agent"
+
+
+def test_series_parts_are_not_collapsed():
+    docs = [Document(page_content=youtube_record(
+        f"Python tutorial for beginners part {i}",
+        "Learn Python programming in this beginner friendly series.",
+        url=f"https://www.youtube.com/watch?v=part{i}")) for i in range(1, 26)]
+    assert len(collapse_documents(docs)) == 25
+
+
+def test_unrelated_videos_survive():
+    titles = [
+        ("Rust web frameworks compared", "Axum, Actix and Rocket benchmarked"),
+        ("How to bake sourdough bread", "A beginner guide to starters and hydration"),
+        ("iPhone 16 review", "Camera, battery and display tested for a month"),
+        ("FAISS vector search explained", "Inverted lists, product quantization and HNSW"),
+        ("Marathon training plan", "Sixteen weeks from 10k to 42k"),
+        ("LangGraph agents tutorial", "Stateful multi-step agents with LangChain"),
+        ("Tokyo travel vlog", "Street food, temples and the night life"),
+        ("Chess opening traps", "Win fast with these five gambits"),
+    ]
+    docs = [Document(page_content=youtube_record(title, description, channel=f"channel {i}", views=i * 1000))
+            for i, (title, description) in enumerate(titles)]
+    assert len(collapse_documents(docs)) == len(titles)
+
+
+def test_reuploads_are_collapsed():
+    docs = [
+        Document(page_content=bilibili_record("【官方教程】ChatGLM3-6B 部署和微调", "部署、微调与 Agent 全流程",
+                                              author="A", url="http://www.bilibili.com/video/av1")),
+        Document(page_content=bilibili_record("【官方教程】ChatGLM3-6B 部署和微调！", "部署、微调与 Agent 全流程",
+                                              author="B", url="http://www.bilibili.com/video/av2")),
+    ]
+    collapsed = collapse_documents(docs)
+    assert len(collapsed) == 1
+    assert collapsed[0].metadata["duplicates"] == 2
+    assert collapsed[0].page_content in {doc.page_content for doc in docs}
@@ -0,0 +1,110 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from bili_server import ann_index
+from bili_server.index_pool import IndexPool, document_ids
+
+
+def item(i, text=None):
+    return Document(page_content=text or f"video {i} about topic {i % 7}", metadata={"video_id": f"v{i}"})
+
+
+def top_hit(pool, namespace, text):
+    hits = pool.search(text, [namespace], k=1)
+    return hits[0][0].page_content if hits else None
+
+
+@pytest.fixture
+def pool(tmp_path):
+    return IndexPool(str(tmp_path), embedding_model=DeterministicFakeEmbedding(size=16), index_type="flat")
+
+
+def test_unchanged_items_are_not_re_added(pool):
+    assert pool.add_documents("ai", [item(i) for i in range(10)]) == 10
+    assert pool.add_documents("ai", [item(i) for i in range(10)]) == 0
+    assert pool.get("ai").index.ntotal == 10
+
+
+def test_changed_item_replaces_its_chunks(pool):
+    pool.add_documents("ai", [item(i) for i in range(10)])
+    assert pool.add_documents("ai", [item(3, "video 3, re-titled")]) == 1
+
+    store = pool.get("ai")
+    assert store.index.ntotal == 10
+    assert top_hit(pool, "ai", "video 3, re-titled") == "video 3, re-titled"
+    assert top_hit(pool, "ai", item(4).page_content) == item(4).page_content
+
+
+def test_update_and_delete(pool):
+    docs = [item(i) for i in range(10)]
+    ids = document_ids(docs)
+    pool.add_documents("ai", docs)
+
+    assert pool.update_metadata("ai", {ids[0]: {"views": 5}, "missing": {"views": 1}}) == 1
+    assert pool.get("ai").docstore.search(ids[0]).metadata["views"] == 5
+
+    assert pool.delete_documents("ai", ids[:3] + ["missing"]) == 3
+    assert pool.get("ai").index.ntotal == 7
+    for doc in docs[3:]:
+        assert top_hit(pool, "ai", doc.page_content) == doc.page_content
+
+
+def test_evicted_shard_is_mapped_back_and_writable(pool, tmp_path):
+    docs = [item(i) for i in range(10)]
+    pool.add_documents("ai", docs)
+    pool.evict("ai")
+    assert pool.namespaces() == []
+
+    assert top_hit(pool, "ai", docs[2].page_content) == docs[2].page_content
+    assert pool.delete_documents("ai", document_ids(docs[:1])) == 1
+    pool.flush()
+
+    reloaded = IndexPool(str(tmp_path), embedding_model=pool.embedding_model, index_type="flat")
+    assert reloaded.get("ai").index.ntotal == 9
+    assert top_hit(reloaded, "ai", docs[5].page_content) == docs[5].page_content
+
+
+def test_ivf_shard_keeps_labels_across_deletes(tmp_path):
+    size = 25_000
+    pool = IndexPool(str(tmp_path), embedding_model=DeterministicFakeEmbedding(size=16), index_type="ivf_flat")
+    docs = [item(i, f"document number {i}") for i in range(size)]
+    pool.add_documents("big", docs)
+    assert not isinstance(pool.get("big").index, ann_index.faiss.IndexFlat)
+
+    ids = document_ids(docs)
+    assert pool.delete_documents("big", ids[100:110]) == 10
+    assert pool.add_documents("big", [item(5, "document number 5, edited"), item(size, "a new document")]) == 2
+
+    assert top_hit(pool, "big", "document number 5, edited") == "document number 5, edited"
+    assert top_hit(pool, "big", "a new document") == "a new document"
+    for i in (0, 99, 110, 4_321, size - 1):
+        assert top_hit(pool, "big", docs[i].page_content) == docs[i].page_content
+
+    pool.evict("big")
+    assert top_hit(pool, "big", docs[20_000].page_content) == docs[20_000].page_content
+
+
+def test_flat_shard_grows_into_ivf_and_stays_consistent(tmp_path):
+    pool = IndexPool(str(tmp_path), embedding_model=DeterministicFakeEmbedding(size=16), index_type="ivf_flat")
+    docs = [item(i, f"document number {i}") for i in range(25_000)]
+    pool.add_documents("big", docs[:20_000])
+    assert isinstance(pool.get("big").index, ann_index.faiss.IndexFlat)
+
+    pool.delete_documents("big", document_ids(docs[:5]))
+    pool.add_documents("big", docs[20_000:])
+    assert not isinstance(pool.get("big").index, ann_index.faiss.IndexFlat)
+
+    pool.delete_documents("big", document_ids(docs[20_000:20_005]))
+    assert pool.get("big").index.ntotal == 24_990
+    for i in (5, 19_999, 20_005, 24_999):
+        assert top_hit(pool, "big", docs[i].page_content) == docs[i].page_content
+
+
+def test_unknown_index_type_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        IndexPool(str(tmp_path), embedding_model=DeterministicFakeEmbedding(size=16), index_type="hnsw")
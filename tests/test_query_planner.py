@@ -0,0 +1,21 @@
+from bili_server.query_planner import local_keywords
+
+
+def test_content_words_are_kept():
+    assert local_keywords("What are the most popular deep learning videos") == ["popular deep learning"]
+    assert local_keywords("best machine learning courses for beginners") == ["best machine learning courses beginners"]
+    assert local_keywords("GPT-5 release date rumors") == ["GPT-5 release date rumors"]
+
+
+def test_clauses_become_separate_keywords():
+    assert local_keywords("Compare PyTorch vs TensorFlow for research") == ["TensorFlow research", "PyTorch"]
+    assert local_keywords("How do I get started with Rust and Go?") == ["get started Rust", "Go"]
+
+
+def test_chinese_fillers_are_dropped():
+    assert local_keywords("有没有大模型视频") == ["大模型"]
+    assert local_keywords("请帮我找一些机器学习入门的视频") == ["机器学习入门"]
+
+
+def test_question_is_returned_when_nothing_is_left():
+    assert local_keywords("what are the videos") == ["what are the videos"]
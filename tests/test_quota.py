@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+pytest.importorskip("langchain_openai")
+
+from bili_server.cache import MemoryCache
+from youtube_tools import get_youtube
+from youtube_tools.quota import Priority, QuotaAccountant, QuotaExhausted
+
+
+def accountant(tmp_path, daily_limit=1000, background_reserve=0.2):
+    return QuotaAccountant(str(tmp_path / "quota.json"), daily_limit=daily_limit,
+                           background_reserve=background_reserve, search_cache=MemoryCache())
+
+
+def test_calls_are_charged_and_persisted(tmp_path):
+    quota = accountant(tmp_path)
+    assert asyncio.run(quota.call("search.list", lambda: {"items": []})) == {"items": []}
+    asyncio.run(quota.call("videos.list", lambda: {}))
+
+    assert quota.snapshot()["spent_by_endpoint"] == {"search.list": 100, "videos.list": 1}
+    with open(tmp_path / "quota.json", encoding="utf-8") as f:
+        assert json.load(f)["spent"] == {"search.list": 100, "videos.list": 1}
+    assert accountant(tmp_path).spent == 101
+
+
+def test_workers_sharing_the_state_file_add_up(tmp_path):
+    first, second = accountant(tmp_path), accountant(tmp_path)
+    asyncio.run(first.call("search.list", dict))
+    asyncio.run(second.call("search.list", dict))
+    asyncio.run(first.call("videos.list", dict))
+
+    assert first.spent == 201
+    assert accountant(tmp_path).spent == 201
+
+
+def test_concurrent_calls_never_overspend(tmp_path):
+    quota = accountant(tmp_path, daily_limit=250, background_reserve=0)
+
+    async def search_all():
+        return await asyncio.gather(*(quota.call("search.list", dict) for _ in range(5)), return_exceptions=True)
+
+    results = asyncio.run(search_all())
+    assert sum(not isinstance(result, QuotaExhausted) for result in results) == 2
+    assert quota.spent == 200
+
+
+def test_background_requests_leave_the_reserve(tmp_path):
+    quota = accountant(tmp_path, daily_limit=1000, background_reserve=0.2)
+    for _ in range(8):
+        asyncio.run(quota.call("search.list", dict, Priority.BACKGROUND))
+    with pytest.raises(QuotaExhausted):
+        asyncio.run(quota.call("search.list", dict, Priority.BACKGROUND))
+    asyncio.run(quota.call("search.list", dict, Priority.INTERACTIVE))
+    assert quota.remaining == 100
+
+
+def test_reservation_covers_both_requests_or_neither(tmp_path):
+    quota = accountant(tmp_path, daily_limit=100, background_reserve=0)
+    with pytest.raises(QuotaExhausted):
+        asyncio.run(quota.reserve(["search.list", "videos.list"]))
+    assert quota.spent == 0
+
+    (tmp_path / "other").mkdir()
+    quota = accountant(tmp_path / "other", daily_limit=101, background_reserve=0)
+    asyncio.run(quota.reserve(["search.list", "videos.list"]))
+    asyncio.run(quota.call("search.list", dict, prepaid=True))
+    asyncio.run(quota.refund("videos.list"))
+    assert quota.snapshot()["spent_by_endpoint"] == {"search.list": 100, "videos.list": 0}
+
+
+class FakeYouTube:
+    def __init__(self):
+        self.requests = []
+
+    def search(self):
+        return self
+
+    def videos(self):
+        return self
+
+    def list(self, **params):
+        self.requests.append(params)
+        return self
+
+    def execute(self):
+        if "q" in self.requests[-1]:
+            snippet = {"title": "t", "channelTitle": "c", "publishedAt": "2024-05-01T00:00:00Z",
+                       "thumbnails": {"default": {"url": "https://i.ytimg.com/t.jpg"}}}
+            return {"items": [{"id": {"videoId": "abc"}, "snippet": snippet}]}
+        return {"items": [{"id": "abc", "statistics": {"viewCount": "5"}}]}
+
+
+def test_search_page_is_not_paid_without_budget_for_its_statistics(tmp_path, monkeypatch):
+    quota = accountant(tmp_path, daily_limit=100, background_reserve=0)
+    monkeypatch.setattr(get_youtube, "get_quota", lambda: quota)
+    youtube = FakeYouTube()
+    with pytest.raises(QuotaExhausted):
+        asyncio.run(get_youtube._search_page(youtube, {"q": "ai"}, Priority.INTERACTIVE))
+    assert youtube.requests == [] and quota.spent == 0
+
+    quota.daily_limit = 101
+    videos, _ = asyncio.run(get_youtube._search_page(youtube, {"q": "ai"}, Priority.INTERACTIVE))
+    assert videos[0]["video_id"] == "abc" and quota.spent == 101
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from bili_server import ann_index
+from bili_server.vector_store import SqliteDocstore, get_local_store, save_mmap_store
+
+
+@pytest.fixture
+def embedding():
+    return DeterministicFakeEmbedding(size=16)
+
+
+def docs(count):
+    return [Document(page_content=f"video {i}", metadata={"video_id": f"v{i}", "views": i}) for i in range(count)]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_saved_store_loads_back(tmp_path, embedding, mmap):
+    store = ann_index.from_documents(docs(20), embedding, "flat", ids=[f"id{i}" for i in range(20)])
+    save_mmap_store(store, str(tmp_path))
+
+    loaded = get_local_store(str(tmp_path), mmap=mmap, embedding_model=embedding)
+    assert isinstance(loaded.docstore, SqliteDocstore) == mmap
+    assert loaded.index.ntotal == 20
+    hit = loaded.similarity_search("video 7", k=1)[0]
+    assert hit.page_content == "video 7" and hit.metadata == {"video_id": "v7", "views": 7}
+
+
+def test_ivf_store_keeps_its_labels_on_disk(tmp_path, embedding):
+    documents = [Document(page_content=f"document number {i}") for i in range(25_000)]
+    store = ann_index.from_documents(documents, embedding, "ivf_flat", ids=[f"id{i}" for i in range(25_000)])
+    ann_index.delete_from_store(store, ["id0", "id1", "id2"])
+    save_mmap_store(store, str(tmp_path))
+
+    loaded = get_local_store(str(tmp_path), embedding_model=embedding)
+    assert loaded.index.ntotal == 24_997
+    for i in (3, 12_345, 24_999):
+        assert loaded.similarity_search(f"document number {i}", k=1)[0].page_content == f"document number {i}"
+
+
+def test_resaving_replaces_the_previous_version(tmp_path, embedding):
+    save_mmap_store(ann_index.from_documents(docs(5), embedding, "flat"), str(tmp_path))
+    save_mmap_store(ann_index.from_documents(docs(8), embedding, "flat"), str(tmp_path))
+    assert get_local_store(str(tmp_path), embedding_model=embedding).index.ntotal == 8
+    assert sorted(path.name for path in tmp_path.iterdir() if path.name.endswith(".tmp")) == []
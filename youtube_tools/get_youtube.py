@@ -4,10 +4,12 @@
 
 import asyncio
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from youtube_tools.quota import Priority, QuotaExhausted, get_quota
+
 def get_youtube_api():
     """Creates a YouTube API client."""
     api_key = os.getenv('YOUTUBE_API_KEY')
@@ -15,82 +17,182 @@ def get_youtube_api():
         raise ValueError("YOUTUBE_API_KEY not found in environment variables")
     return build('youtube', 'v3', developerKey=api_key)
 
-async def search_videos(keyword: str, max_results: int = 25) -> List[Dict]:
+async def _search_page(youtube, search_params: Dict, priority: Priority) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Runs one search.list call (100 quota units) and fetches the statistics of the results (1 unit). Both are
+    reserved up front, so a search is never paid for without the budget to fetch its statistics.
+
+    Returns:
+        Tuple[List[Dict], Optional[str]]: The videos, and the token of the next result page if there is one.
+    """
+    quota = get_quota()
+    await quota.reserve(["search.list", "videos.list"], priority)
+    search_request = youtube.search().list(**search_params)
+    try:
+        search_response = await quota.call("search.list", search_request.execute, priority, prepaid=True)
+    except BaseException:
+        await asyncio.shield(quota.refund("videos.list"))
+        raise
+
+    videos = []
+    video_ids = []
+
+    # Collect video IDs
+    for item in search_response.get('items', []):
+        if 'videoId' in item['id']:
+            video_ids.append(item['id']['videoId'])
+
+    # Batch fetch detailed statistics for videos
+    stats_dict = {}
+    if not video_ids:
+        await quota.refund("videos.list")
+    else:
+        # 1 quota unit, reserved with the search
+        stats_request = youtube.videos().list(
+            part='statistics,contentDetails',
+            id=','.join(video_ids)
+        )
+        stats_response = await quota.call("videos.list", stats_request.execute, priority, prepaid=True)
+
+        # Create a dictionary for statistics
+        for item in stats_response.get('items', []):
+            stats_dict[item['id']] = item['statistics']
+
+    # Assemble video information
+    for item in search_response.get('items', []):
+        if 'videoId' not in item['id']:
+            continue
+
+        video_id = item['id']['videoId']
+        video_stats = stats_dict.get(video_id, {})
+
+        video_info = {
+            'video_id': video_id,
+            'title': item['snippet']['title'],
+            'channel': item['snippet']['channelTitle'],
+            'description': item['snippet'].get('description', ''),
+            'published_at': item['snippet']['publishedAt'],
+            'thumbnail': item['snippet']['thumbnails']['default']['url'],
+            'view_count': video_stats.get('viewCount', '0'),
+            'like_count': video_stats.get('likeCount', '0'),
+            'comment_count': video_stats.get('commentCount', '0'),
+            'url': f'https://www.youtube.com/watch?v={video_id}'
+        }
+        videos.append(video_info)
+
+    return videos, search_response.get('nextPageToken')
+
+
+def _search_params(keyword: str, max_results: int) -> Dict:
+    return dict(
+        q=keyword,
+        part='id,snippet',
+        maxResults=max_results,
+        type='video',
+        order='relevance',  # Options: relevance, date, rating, viewCount
+        regionCode='US',  # Can be changed to other regions
+        relevanceLanguage='en'  # Can be changed to 'zh' for Chinese results
+    )
+
+
+async def search_videos(keyword: str, max_results: int = 25,
+                        priority: Priority = Priority.INTERACTIVE) -> List[Dict]:
     """
     Searches for YouTube videos.
 
+    Calls go through the quota accountant: once only the interactive reserve of the daily quota is left,
+    cached results are served for keywords searched before, and background requests are refused.
+
     Args:
         keyword: The search keyword.
         max_results: The maximum number of results to return, default is 25.
+        priority: Scheduling priority; background refreshes yield to interactive requests.
 
     Returns:
         List[Dict]: A list of video information dictionaries.
     """
+    quota = get_quota()
+    cached = await quota.cached_results(keyword)
+    if cached is not None and quota.near_limit():
+        print(f"YouTube quota nearly exhausted ({quota.remaining} units left), serving cached results for: {keyword}")
+        return cached
+
     try:
         youtube = get_youtube_api()
-
-        # Call YouTube Search API
-        search_response = youtube.search().list(
-            q=keyword,
-            part='id,snippet',
-            maxResults=max_results,
-            type='video',
-            order='relevance',  # Options: relevance, date, rating, viewCount
-            regionCode='US',  # Can be changed to other regions
-            relevanceLanguage='en'  # Can be changed to 'zh' for Chinese results
-        ).execute()
-
-        videos = []
-        video_ids = []
-
-        # Collect video IDs
-        for item in search_response.get('items', []):
-            if 'videoId' in item['id']:
-                video_ids.append(item['id']['videoId'])
-
-        # Batch fetch detailed statistics for videos
-        stats_dict = {}
-        if video_ids:
-            stats_response = youtube.videos().list(
-                part='statistics,contentDetails',
-                id=','.join(video_ids)
-            ).execute()
-
-            # Create a dictionary for statistics
-            for item in stats_response.get('items', []):
-                stats_dict[item['id']] = item['statistics']
-
-        # Assemble video information
-        for item in search_response.get('items', []):
-            if 'videoId' not in item['id']:
-                continue
-
-            video_id = item['id']['videoId']
-            video_stats = stats_dict.get(video_id, {})
-
-            video_info = {
-                'video_id': video_id,
-                'title': item['snippet']['title'],
-                'channel': item['snippet']['channelTitle'],
-                'description': item['snippet'].get('description', ''),
-                'published_at': item['snippet']['publishedAt'],
-                'thumbnail': item['snippet']['thumbnails']['default']['url'],
-                'view_count': video_stats.get('viewCount', '0'),
-                'like_count': video_stats.get('likeCount', '0'),
-                'comment_count': video_stats.get('commentCount', '0'),
-                'url': f'https://www.youtube.com/watch?v={video_id}'
-            }
-            videos.append(video_info)
-
+        videos, _ = await _search_page(youtube, _search_params(keyword, max_results), priority)
+        await quota.cache_results(keyword, videos)
         return videos
 
+    except QuotaExhausted as e:
+        print(f"YouTube quota exhausted, serving {'cached' if cached else 'no'} results: {e}")
+        return cached or []
     except HttpError as e:
         print(f"YouTube API Error: {e}")
-        return []
+        return cached or []
     except Exception as e:
         print(f"Error searching videos: {e}")
         return []
 
+
+async def search_videos_since(keyword: str, published_after: Optional[str], max_pages: int = 3, page_size: int = 50,
+                              priority: Priority = Priority.BACKGROUND) -> Tuple[List[Dict], bool]:
+    """
+    Searches the videos of a keyword published after a timestamp, newest first, following nextPageToken until
+    the results are exhausted or max_pages pages (100 quota units each) were fetched. Cached search results are
+    neither used nor replaced.
+
+    Args:
+        keyword: The search keyword.
+        published_after: RFC 3339 timestamp; None returns the newest videos without a lower bound.
+        max_pages: Maximum number of result pages.
+        page_size: Results per page, at most 50.
+        priority: Scheduling priority.
+
+    Returns:
+        Tuple[List[Dict], bool]: The videos, and whether every video published since then was returned. The
+            result is incomplete when more pages remain or a call failed.
+    """
+    videos = []
+    try:
+        youtube = get_youtube_api()
+        search_params = dict(_search_params(keyword, page_size), order='date')
+        if published_after:
+            search_params['publishedAfter'] = published_after
+        for _ in range(max_pages):
+            page, next_token = await _search_page(youtube, search_params, priority)
+            videos.extend(page)
+            if not next_token or not page:
+                return videos, True
+            search_params['pageToken'] = next_token
+    except (QuotaExhausted, HttpError) as e:
+        print(f"Failed to search new YouTube videos for {keyword}: {e}")
+    return videos, False
+
+async def get_video_statistics(video_ids: List[str],
+                               priority: Priority = Priority.INTERACTIVE) -> Dict[str, Dict]:
+    """
+    Fetches the current statistics of known videos, 50 IDs per request (1 quota unit each).
+
+    Args:
+        video_ids: YouTube video IDs.
+        priority: Scheduling priority.
+
+    Returns:
+        Dict[str, Dict]: Statistics by video ID; videos that are gone or could not be fetched are missing.
+    """
+    quota = get_quota()
+    statistics = {}
+    try:
+        youtube = get_youtube_api()
+        for start in range(0, len(video_ids), 50):
+            stats_request = youtube.videos().list(part='statistics', id=','.join(video_ids[start:start + 50]))
+            stats_response = await quota.call("videos.list", stats_request.execute, priority)
+            for item in stats_response.get('items', []):
+                statistics[item['id']] = item['statistics']
+    except (QuotaExhausted, HttpError) as e:
+        print(f"Failed to refresh YouTube statistics: {e}")
+    return statistics
+
 async def youtube_detail_pipeline(keywords: List[str], page: int = 1) -> List[Dict]:
     """
     Processes a list of keywords and returns formatted data.
@@ -105,10 +207,11 @@ async def youtube_detail_pipeline(keywords: List[str], page: int = 1) -> List[Di
     """
     all_results = []
 
-    for keyword in keywords:
-        print(f"Searching YouTube keyword: {keyword}")
-        videos = await search_videos(keyword, max_results=25)
+    # Keywords are searched concurrently; the quota accountant bounds the number of calls in flight
+    print(f"Searching YouTube keywords: {keywords}")
+    searches = await asyncio.gather(*(search_videos(keyword, max_results=25) for keyword in keywords))
 
+    for keyword, videos in zip(keywords, searches):
         # Format data to match existing structure
         formatted_data = []
         for video in videos:
@@ -130,7 +233,9 @@ async def youtube_detail_pipeline(keywords: List[str], page: int = 1) -> List[Di
 
         all_results.append({
             "keyword": keyword,
-            "real_data": str(formatted_data)
+            "real_data": str(formatted_data),
+            "items": formatted_data,
+            "videos": videos
         })
 
     print(f"all_results: {all_results}")
@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# YouTube API Quota Accounting Module
+
+import asyncio
+import datetime
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, TypeVar
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from bili_server.cache import CacheBackend, get_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl，配额文件不加锁
+    fcntl = None
+
+T = TypeVar("T")
+
+# YouTube Data API v3 单次调用消耗的配额单位
+ENDPOINT_COSTS = {
+    "search.list": 100,
+    "videos.list": 1,
+}
+
+# 配额在太平洋时间零点重置
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+
+class Priority(IntEnum):
+    """Request priority; lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class QuotaExhausted(Exception):
+    """Raised when a request would exceed the budget available to its priority."""
+
+
+class _PrioritySemaphore:
+    """
+    Semaphore whose waiters are woken by priority, then in arrival order.
+    """
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters = []
+        self._counter = itertools.count()
+
+    async def acquire(self, priority: int) -> None:
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._counter), future]
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已经被唤醒但调用方被取消，把名额还回去
+                self.release()
+            elif entry in self._waiters:
+                # release() 可能已经弹出并跳过了这个被取消的等待者
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+
+class QuotaAccountant:
+    """
+    Tracks YouTube quota units spent per endpoint for the current quota day, persists them across restarts,
+    and schedules API calls so interactive requests are served before background refreshes. Background
+    requests stop when only the reserved share of the budget is left; past that point cached search
+    results are served instead of spending units. Search results are kept in the shared cache backend,
+    so a keyword searched by one worker is served to all of them.
+    """
+
+    def __init__(self, state_path: str, daily_limit: int = 10000, background_reserve: float = 0.2,
+                 max_concurrency: int = 4, search_cache: Optional[CacheBackend] = None):
+        """
+        Args:
+            state_path (str): JSON file holding the spent units, shared by all workers.
+            daily_limit (int): Daily quota of the project.
+            background_reserve (float): Share of the daily quota kept for interactive requests only.
+            max_concurrency (int): Maximum number of YouTube API calls in flight.
+            search_cache (Optional[CacheBackend]): Cache of search results. Defaults to the shared cache.
+        """
+        self.state_path = state_path
+        self.daily_limit = daily_limit
+        self.reserve_units = int(daily_limit * background_reserve)
+        self._semaphore = _PrioritySemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._day = ""
+        self._spent: Dict[str, int] = {}
+        # 本进程花费但尚未合并进状态文件的配额
+        self._unsaved: Dict[str, int] = {}
+        self._cache = search_cache or get_cache("youtube_search", serializer="json")
+        self._load()
+
+    @staticmethod
+    def _quota_day() -> str:
+        return datetime.datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def _read_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Failed to load YouTube quota state: {e}")
+            return {}
+
+    def _load(self) -> None:
+        state = self._read_state()
+        self._day = state.get("day", "")
+        self._spent = state.get("spent", {})
+        self._roll_day()
+
+    def _save(self) -> None:
+        """
+        Adds the units spent since the last save to the totals in the state file, under a file lock, so workers
+        sharing the file do not overwrite each other's counts. The merged totals become this process's view.
+        Blocking: called through asyncio.to_thread from coroutines. The in-memory lock is only held to swap the
+        counters, never while waiting for the file lock.
+        """
+        with self._lock:
+            day, unsaved, self._unsaved = self._day, self._unsaved, {}
+        if not unsaved:
+            return
+
+        lock_file = open(self.state_path + ".lock", "a") if fcntl is not None else None
+        try:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            state = self._read_state()
+            spent = state.get("spent", {}) if state.get("day") == day else {}
+            for endpoint, units in unsaved.items():
+                spent[endpoint] = spent.get(endpoint, 0) + units
+
+            tmp_path = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"day": day, "spent": spent}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except Exception:
+            # 写入失败，未保存的花费留待下次合并
+            with self._lock:
+                if self._day == day:
+                    for endpoint, units in unsaved.items():
+                        self._unsaved[endpoint] = self._unsaved.get(endpoint, 0) + units
+            raise
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+        with self._lock:
+            if self._day == day:
+                # 保存期间本进程新花费的配额尚未写入文件，叠加到合并后的总数上
+                for endpoint, units in self._unsaved.items():
+                    spent[endpoint] = spent.get(endpoint, 0) + units
+                self._spent = spent
+
+    def _roll_day(self) -> None:
+        today = self._quota_day()
+        if self._day != today:
+            self._day = today
+            self._spent = {}
+            self._unsaved = {}
+
+    def _charge(self, endpoint: str, units: int) -> None:
+        self._spent[endpoint] = self._spent.get(endpoint, 0) + units
+        self._unsaved[endpoint] = self._unsaved.get(endpoint, 0) + units
+
+    @property
+    def spent(self) -> int:
+        with self._lock:
+            self._roll_day()
+            return sum(self._spent.values())
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.daily_limit - self.spent)
+
+    def near_limit(self) -> bool:
+        """Whether only the interactive reserve of the budget is left."""
+        return self.remaining <= self.reserve_units
+
+    def allows(self, cost: int, priority: Priority) -> bool:
+        """
+        Whether a request of the given cost fits the budget available to its priority.
+        """
+        available = self.remaining
+        if priority == Priority.BACKGROUND:
+            available -= self.reserve_units
+        return cost <= available
+
+    def _try_charge(self, costs: Dict[str, int], priority: Priority) -> bool:
+        """Charges all costs in memory if they fit the budget together, atomically with the check."""
+        with self._lock:
+            self._roll_day()
+            available = self.daily_limit - sum(self._spent.values())
+            if priority == Priority.BACKGROUND:
+                available -= self.reserve_units
+            if sum(costs.values()) > available:
+                return False
+            for endpoint, units in costs.items():
+                self._charge(endpoint, units)
+            return True
+
+    def record(self, endpoint: str, units: int) -> None:
+        """
+        Records units spent on an endpoint and persists the new total. Blocking; coroutines use call().
+        """
+        with self._lock:
+            self._roll_day()
+            self._charge(endpoint, units)
+        self._save()
+
+    def mark_exhausted(self) -> None:
+        """
+        Marks the whole daily budget as spent, e.g. after the API answered quotaExceeded.
+        """
+        with self._lock:
+            self._roll_day()
+            missing = self.daily_limit - sum(self._spent.values())
+            if missing > 0:
+                self._charge("unaccounted", missing)
+        self._save()
+
+    async def reserve(self, endpoints: List[str], priority: Priority = Priority.INTERACTIVE) -> None:
+        """
+        Charges several requests that only make sense together up front, e.g. a search.list and the videos.list
+        fetching the statistics of its results, so the second cannot be refused after the first was paid for.
+        Run them with call(..., prepaid=True) and refund() the ones that turn out not to be needed.
+
+        Raises:
+            QuotaExhausted: If the requests do not fit the budget available to their priority together.
+        """
+        costs: Dict[str, int] = {}
+        for endpoint in endpoints:
+            costs[endpoint] = costs.get(endpoint, 0) + ENDPOINT_COSTS[endpoint]
+        if not self._try_charge(costs, priority):
+            raise QuotaExhausted(f"{', '.join(endpoints)} need {sum(costs.values())} units, "
+                                 f"{self.remaining} left today")
+        await asyncio.to_thread(self._save)
+
+    async def refund(self, endpoint: str) -> None:
+        """Gives back the units of a reserved request that was not made."""
+        with self._lock:
+            self._charge(endpoint, -ENDPOINT_COSTS[endpoint])
+        await asyncio.to_thread(self._save)
+
+    async def call(self, endpoint: str, request: Callable[[], T], priority: Priority = Priority.INTERACTIVE,
+                   prepaid: bool = False) -> T:
+        """
+        Runs a blocking YouTube API request once a slot is free and the budget allows it.
+        Units are charged before the call, since failed calls are billed too.
+
+        Args:
+            endpoint (str): Endpoint name, a key of ENDPOINT_COSTS.
+            request (Callable[[], T]): Executes the request, e.g. youtube.search().list(...).execute.
+            priority (Priority): Interactive requests are scheduled first and may use the reserve.
+            prepaid (bool): Whether the units were already charged by reserve().
+
+        Returns:
+            T: The API response.
+
+        Raises:
+            QuotaExhausted: If the request does not fit the budget available to its priority.
+        """
+        cost = ENDPOINT_COSTS[endpoint]
+        await self._semaphore.acquire(priority)
+        try:
+            if not prepaid:
+                if not self._try_charge({endpoint: cost}, priority):
+                    raise QuotaExhausted(f"{endpoint} needs {cost} units, {self.remaining} left today")
+                await asyncio.to_thread(self._save)
+            try:
+                return await asyncio.to_thread(request)
+            except HttpError as e:
+                if e.resp.status == 403 and b"quotaExceeded" in (e.content or b""):
+                    await asyncio.to_thread(self.mark_exhausted)
+                raise
+        finally:
+            self._semaphore.release()
+
+    async def cache_results(self, keyword: str, videos: List[dict]) -> None:
+        await self._cache.aset(keyword, {"time": time.time(), "videos": videos})
+
+    async def cached_results(self, keyword: str) -> Optional[List[dict]]:
+        entry = await self._cache.aget(keyword)
+        return entry["videos"] if entry else None
+
+    def snapshot(self) -> dict:
+        """
+        Quota metrics: units spent per endpoint today and what is left.
+        """
+        with self._lock:
+            self._roll_day()
+            spent = dict(self._spent)
+        return {
+            "day": self._day,
+            "daily_limit": self.daily_limit,
+            "spent": sum(spent.values()),
+            "remaining": max(0, self.daily_limit - sum(spent.values())),
+            "spent_by_endpoint": spent,
+            "interactive_reserve": self.reserve_units,
+            "search_cache": self._cache.stats(),
+        }
+
+
+_quota: Optional[QuotaAccountant] = None
+
+
+def get_quota() -> QuotaAccountant:
+    """Process-wide quota accountant configured from environment variables."""
+    global _quota
+    if _quota is None:
+        _quota = QuotaAccountant(
+            state_path=os.getenv("YOUTUBE_QUOTA_STATE", ".youtube_quota.json"),
+            daily_limit=int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")),
+            background_reserve=float(os.getenv("YOUTUBE_BACKGROUND_RESERVE", "0.2")),
+        )
+    return _quota